@@ -1,13 +1,21 @@
 # Register your models here.
 from django.contrib import admin
 
-from chat.models import Chat, Message
+from chat.models import Chat, ChatParticipant, Message
 from common.admin import BaseModelAdmin
 
 
+class ChatParticipantInline(admin.TabularInline):
+    model = ChatParticipant
+    raw_id_fields = ["company", "user"]
+    extra = 0
+
+
 @admin.register(Chat)
 class ChatAdmin(BaseModelAdmin):
     list_display = ["id"]
+    raw_id_fields = ["last_message"]
+    inlines = [ChatParticipantInline]
 
 
 @admin.register(Message)
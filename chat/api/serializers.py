@@ -1,30 +1,92 @@
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
 from chat.models import Message, Chat
+from chat.services.company_snapshots import (
+    get_chats_company_snapshots,
+    get_message_serializer_context,
+)
+from chat.services.presence import get_online_users
+from chat.services.unread_counters import mark_chat_read, mark_chat_unread
 from common.serializers import (
     NonNullDynamicFieldsModelSerializer,
 )
-from user.api.serializers import UserSerializer
+
+User = get_user_model()
+
+
+class MessageAuthorSerializer(NonNullDynamicFieldsModelSerializer):
+    """
+    Автор сообщения: вместо полного профиля компании только id и название
+    из снимка компаний чата (context["companies"], см. company_snapshots)
+    """
+
+    company = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = (
+            "id",
+            "last_name",
+            "first_name",
+            "middle_name",
+            "role",
+            "company",
+        )
+
+    def get_company(self, user):
+        if not user.company_id:
+            return None
+        companies = self.context.get("companies") or {}
+        if user.company_id in companies:
+            return companies[user.company_id]
+        return {"id": user.company_id, "name": user.company.name}
 
 
 class MessageSerializer(NonNullDynamicFieldsModelSerializer):
-    author = UserSerializer(fields=("id", "company", "email", "role"))
+    author = MessageAuthorSerializer()
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = Message
         fields = ("id", "chat", "author", "content", "is_read", "created_at")
 
+    def get_is_read(self, message: Message) -> bool:
+        # Прочтение определяется курсором читателя (см. ChatReadCursor)
+        reader = self.context.get("reader")
+        if not reader:
+            return False
+        if reader.get("user_id") == message.author_id or (
+            reader.get("company_id")
+            and reader.get("company_id") == message.author.company_id
+        ):
+            return True
+        return message.pk <= self.context["last_read_message_id"]
+
 
 class EditMessageSerializer(NonNullDynamicFieldsModelSerializer):
+    is_read = serializers.BooleanField(write_only=True)
+
     class Meta:
         model = Message
-        read_only_fields = ("id", "chat", "author", "content")
+        fields = ("is_read",)
+
+    def update(self, instance, validated_data):
+        user = self.context["request"].user
+        if validated_data["is_read"]:
+            mark_chat_read(instance.chat_id, user, instance.pk)
+        else:
+            mark_chat_unread(instance.chat_id, user, instance.pk)
+        return instance
 
     def to_representation(self, instance):
-        return MessageSerializer().to_representation(instance)
+        context = get_message_serializer_context(
+            instance.chat_id, [instance], user=self.context["request"].user
+        )
+        return MessageSerializer(context=context).to_representation(instance)
 
     def validate(self, attrs):
         if (
@@ -37,21 +99,65 @@ class EditMessageSerializer(NonNullDynamicFieldsModelSerializer):
         return super().validate(attrs)
 
 
+class ChatListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        chats = list(data.all() if hasattr(data, "all") else data)
+        # Присутствие всех чатов страницы одним запросом к кешу
+        self.context["online_users"] = get_online_users(
+            [chat.pk for chat in chats]
+        )
+        # Снимки компаний авторов последних сообщений - тоже одним
+        # get_many (и не более одного запроса к компаниям)
+        self.context["chat_companies"] = get_chats_company_snapshots(
+            {
+                chat.pk: {chat.last_message.author.company_id}
+                for chat in chats
+                if chat.last_message
+            }
+        )
+        return super().to_representation(chats)
+
+
 class ChatSerializer(NonNullDynamicFieldsModelSerializer):
     last_message = serializers.SerializerMethodField()
     unread_count = serializers.IntegerField(default=0)
+    online_users = serializers.SerializerMethodField()
 
     class Meta:
         model = Chat
-        read_only_fields = ["messages", "last_message", "unread_count"]
+        read_only_fields = [
+            "messages",
+            "last_message",
+            "unread_count",
+            "online_users",
+        ]
+        list_serializer_class = ChatListSerializer
+
+    def get_online_users(self, chat: Chat) -> list[int]:
+        """Пользователи, подключенные к чату (см. services.presence)"""
+        online_users = self.context.get("online_users")
+        if online_users is None or chat.pk not in online_users:
+            online_users = get_online_users([chat.pk])
+        return online_users[chat.pk]
 
     def get_last_message(self, chat: Chat):
-        try:
-            last_message = chat.messages.latest("created_at")
-        except Message.DoesNotExist:
-            last_message = None
+        # Chat.last_message поддерживается при создании сообщений
+        last_message = chat.last_message
         if last_message:
-            return MessageSerializer(last_message).data
+            request = self.context.get("request")
+            return MessageSerializer(
+                last_message,
+                context=get_message_serializer_context(
+                    chat.pk,
+                    [last_message],
+                    user=request.user if request else None,
+                    # Курсор аннотирован в annotate_unread_messages
+                    last_read_id=getattr(chat, "last_read_id", None),
+                    companies=self.context.get("chat_companies", {}).get(
+                        chat.pk
+                    ),
+                ),
+            ).data
         return MessageSerializer().data
 
 
@@ -79,4 +185,5 @@ class CreateMessageSerializer(NonNullDynamicFieldsModelSerializer):
         return instance
 
     def to_representation(self, instance):
-        return MessageSerializer().to_representation(instance)
+        context = get_message_serializer_context(instance.chat_id, [instance])
+        return MessageSerializer(context=context).to_representation(instance)
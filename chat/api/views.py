@@ -1,4 +1,5 @@
-from django.db.models import Sum
+from drf_yasg import openapi as api
+from drf_yasg.utils import swagger_auto_schema
 from rest_framework import generics
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
@@ -12,6 +13,12 @@ from chat.api.serializers import (
     EditMessageSerializer,
 )
 from chat.models import Chat, Message
+from chat.services.company_snapshots import get_message_serializer_context
+from chat.services.unread_counters import (
+    get_total_unread_count,
+    mark_chat_read,
+)
+from common.pagination import BeforeAfterPagination
 from common.views import MultiSerializerMixin
 
 
@@ -19,7 +26,7 @@ class ChatsViewSet(
     generics.ListAPIView, generics.RetrieveAPIView, GenericViewSet
 ):
     serializer_class = ChatSerializer
-    queryset = Chat.objects.prefetch_related("messages").all()
+    queryset = Chat.objects.select_related("last_message__author")
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
@@ -29,16 +36,12 @@ class ChatsViewSet(
             return queryset.none()
         queryset = queryset.filter_user_chats(user)
         queryset = (
-            queryset.annotate_unread_messages(user)
-            .annotate_latest_message()
-            .order_by("-latest_created_at")
+            queryset.annotate_unread_messages(user).order_by_last_message()
         )
         return queryset
 
     def get_total_unread_count(self):
-        return self.get_queryset().aggregate(
-            total_unread_count=Sum("unread_count")
-        )["total_unread_count"]
+        return get_total_unread_count(self.request.user)
 
     def list(self, request, *args, **kwargs):
         base_response = super().list(request, *args, **kwargs)
@@ -63,38 +66,65 @@ class MessageViewSet(
         "update": EditMessageSerializer,
         "partial_update": EditMessageSerializer,
     }
-    queryset = Message.objects.all().prefetch_related("author")
+    queryset = Message.objects.all().select_related("author")
     parent_lookup_kwargs = {"chat_pk": "chat__pk"}
     permission_classes = [IsAuthenticated]
+    pagination_class = BeforeAfterPagination
 
     def retrieve(self, request, *args, **kwargs):
         """Overriding retrieve method, so we can mark messages as read after request"""
 
         message = self.get_object()
-        if message.author != request.user and not message.is_read:
-            message.is_read = True
-            message.save()
-        serializer = MessageSerializer(message)
+        context = get_message_serializer_context(
+            message.chat_id, [message], user=request.user
+        )
+        mark_chat_read(message.chat_id, request.user, message.pk)
+        serializer = MessageSerializer(message, context=context)
         return Response(serializer.data)
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            api.Parameter(
+                "before",
+                api.IN_QUERY,
+                type=api.TYPE_INTEGER,
+                required=False,
+                description="Сообщения старше указанного (прокрутка истории)",
+            ),
+            api.Parameter(
+                "after",
+                api.IN_QUERY,
+                type=api.TYPE_INTEGER,
+                required=False,
+                description="Сообщения новее указанного (догрузка после "
+                "переподключения)",
+            ),
+        ]
+    )
     def list(self, request, *args, **kwargs):
         """Overriding retrieve method, so we can mark messages as read after request"""
         queryset = self.get_queryset()
+        chat_id = self.kwargs["chat_pk"]
 
         paginator_class = self.pagination_class()
         paginated_queryset = paginator_class.paginate_queryset(
             queryset, request, view=self
         )
         messages_data = paginator_class.get_paginated_response(
-            MessageSerializer(paginated_queryset, many=True).data
+            MessageSerializer(
+                paginated_queryset,
+                many=True,
+                context=get_message_serializer_context(
+                    chat_id, paginated_queryset, user=request.user
+                ),
+            ).data
         )
 
-        to_update = []
-        for message in paginated_queryset:
-            to_update.append(message.pk)
-            message.is_read = True
-
-        Message.objects.filter(id__in=to_update).exclude(
-            author=request.user
-        ).update(is_read=True)
+        # Вместо UPDATE сообщений страницы сдвигаем курсор прочтения
+        if paginated_queryset:
+            mark_chat_read(
+                chat_id,
+                request.user,
+                max(message.pk for message in paginated_queryset),
+            )
         return messages_data
@@ -1,20 +1,30 @@
+import asyncio
 import json
+import uuid
 
+from asgiref.sync import sync_to_async
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
-from django.db import close_old_connections
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import status
 
-from chat.models import Chat
+from chat.api.serializers import MessageSerializer
+from chat.models import Message
+from chat.services import presence
+from chat.services.access import has_chat_access
+from chat.services.company_snapshots import get_message_serializer_context
+from chat.services.message_writer import message_writer
 from common.utils import DecimalEncoder
 
 
 class ChatConsumer(AsyncJsonWebsocketConsumer):
+    presence_task = None
+
     async def connect(self):
-        await database_sync_to_async(close_old_connections)()
         self.user = self.scope["user"]
 
-        self.chat_id = self.scope["url_route"]["kwargs"]["chat_id"]
+        self.chat_id = int(self.scope["url_route"]["kwargs"]["chat_id"])
 
         # Group name should be str Group name must be a valid unicode string with length < 100
         # containing only ASCII alphanumerics, hyphens, underscores, or periods)
@@ -23,11 +33,13 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
             await self.disconnect(status.HTTP_401_UNAUTHORIZED)
             return
 
-        self.chat_db_obj, created = await database_sync_to_async(
-            Chat.objects.get_or_create
-        )(id=self.chat_id)
-
-        # TODO: Check if user has access to this chat
+        # Доступ по ChatParticipant, как в ChatsViewSet. Состав участников
+        # кешируется, в обычном случае подключение не обращается к БД
+        if not await database_sync_to_async(has_chat_access)(
+            self.chat_id, self.user
+        ):
+            await self.close(code=status.HTTP_403_FORBIDDEN)
+            return
 
         # Join room group
         await self.channel_layer.group_add(
@@ -36,15 +48,118 @@ class ChatConsumer(AsyncJsonWebsocketConsumer):
 
         await self.accept()
 
+        await sync_to_async(presence.heartbeat)(
+            self.chat_id, self.channel_name, self.user.pk
+        )
+        self.presence_task = asyncio.create_task(self.send_heartbeats())
+        await self.send_presence(online=True)
+
     async def disconnect(self, close_code):
+        if self.presence_task is not None:
+            self.presence_task.cancel()
+            self.presence_task = None
+            still_online = await sync_to_async(presence.leave)(
+                self.chat_id, self.channel_name, self.user.pk
+            )
+            if not still_online:
+                await self.send_presence(online=False)
+
         # Leave room group
         await self.channel_layer.group_discard(
             self.room_group_name, self.channel_name
         )
 
-        await database_sync_to_async(close_old_connections)()
+    async def send_heartbeats(self):
+        """Продлевает присутствие подключения, пока оно открыто"""
+        while True:
+            await asyncio.sleep(settings.CHAT_PRESENCE_HEARTBEAT_INTERVAL)
+            await sync_to_async(presence.heartbeat)(
+                self.chat_id, self.channel_name, self.user.pk
+            )
+
+    async def send_presence(self, online: bool):
+        await self.channel_layer.group_send(
+            self.room_group_name,
+            {
+                "type": "chat_presence",
+                "user_id": self.user.pk,
+                "online": online,
+            },
+        )
+
+    # Пользователь подключился к чату или отключился
+    async def chat_presence(self, event):
+        await self.send_json(
+            {
+                "type": "presence",
+                "user_id": event["user_id"],
+                "online": event["online"],
+            }
+        )
+
+    # Пользователь набирает сообщение, событие не сохраняется
+    async def chat_typing(self, event):
+        if event["sender_channel"] == self.channel_name:
+            return
+        await self.send_json({"type": "typing", "user_id": event["user_id"]})
 
     # Receive message from room group
     async def chat_message(self, event):
         message: dict = event["message"]
         await self.send_json(json.dumps(message, cls=DecimalEncoder))
+
+    async def receive_json(self, content, **kwargs):
+        """
+        Отправка сообщения: {"content": "...", "client_id": "..."}.
+        Сообщение сразу рассылается в группу чата с ack_id и client_id
+        (client_id - необязательный идентификатор клиента, возвращается
+        как есть), а id сохраненного сообщения приходит позже
+        в подтверждении (см. chat.services.message_writer).
+        Индикатор набора текста: {"type": "typing"}
+        """
+        if not isinstance(content, dict):
+            content = {}
+        if content.get("type") == "typing":
+            await self.channel_layer.group_send(
+                self.room_group_name,
+                {
+                    "type": "chat_typing",
+                    "user_id": self.user.pk,
+                    "sender_channel": self.channel_name,
+                },
+            )
+            return
+
+        client_id = content.get("client_id")
+        text = content.get("content")
+        if not isinstance(text, str) or not text.strip():
+            await self.send_json(
+                {
+                    "type": "error",
+                    "client_id": client_id,
+                    "detail": "Пустое сообщение",
+                }
+            )
+            return
+
+        message = Message(chat_id=self.chat_id, author=self.user, content=text)
+        message.created_at = timezone.now()
+        ack_id = uuid.uuid4().hex
+        data = await database_sync_to_async(self.serialize_message)(message)
+        data.update(ack_id=ack_id, client_id=client_id)
+
+        await self.channel_layer.group_send(
+            self.room_group_name, {"type": "chat_message", "message": data}
+        )
+        await message_writer.add(message, ack_id)
+
+    @staticmethod
+    def serialize_message(message: Message) -> dict:
+        context = get_message_serializer_context(message.chat_id, [message])
+        return dict(
+            MessageSerializer(context=context).to_representation(message)
+        )
+
+    # Сообщения, принятые по websocket, сохранены (или нет, id=None)
+    async def chat_message_ack(self, event):
+        await self.send_json({"type": "ack", "acks": event["acks"]})
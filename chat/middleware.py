@@ -1,10 +1,9 @@
 from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import AccessToken
 
-User = get_user_model()
+from user.services.user_cache import get_cached_user
 
 
 @database_sync_to_async
@@ -12,7 +11,7 @@ def get_user(token):
     """
     Parsing JWT token, checking it on expiration date.
     If token is valid -> getting user id from it.
-    Returning User object.
+    Returning User object (cached, see user.services.user_cache).
 
     Used code from channels documentation: https://channels.readthedocs.io/en/stable/topics/authentication.html
     """
@@ -24,7 +23,7 @@ def get_user(token):
         return AnonymousUser()
     user_id = access_token.payload["user_id"]
 
-    return User.objects.get(id=user_id)
+    return get_cached_user(user_id) or AnonymousUser()
 
 
 class QueryAuthMiddleware:
@@ -0,0 +1,59 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_last_message(apps, schema_editor):
+    Chat = apps.get_model("chat", "Chat")
+    Message = apps.get_model("chat", "Message")
+    last_message = Message.objects.filter(chat=OuterRef("pk")).order_by(
+        "-created_at", "-pk"
+    )
+    Chat.objects.update(
+        last_message=Subquery(last_message.values("pk")[:1]),
+        last_message_at=Subquery(last_message.values("created_at")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="chat",
+            name="last_message",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="+",
+                to="chat.message",
+                verbose_name="Последнее сообщение",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chat",
+            name="last_message_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Дата последнего сообщения"
+            ),
+        ),
+        migrations.RunPython(fill_last_message, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="chat",
+            index=models.Index(
+                models.OrderBy(
+                    models.F("last_message_at"),
+                    descending=True,
+                    nulls_last=True,
+                ),
+                models.OrderBy(models.F("id"), descending=True),
+                name="chats_last_message_at",
+            ),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+COMPANY_PATHS = (
+    "deal__buyer_company",
+    "deal__supplier_company",
+    "equipment_deal__buyer_company",
+    "equipment_deal__supplier_company",
+    "logisticsoffer__transportapplication__created_by__company",
+    "special_app__companies",
+)
+LOGIST_PATH = "logisticsoffer__logist"
+
+
+def fill_participants(apps, schema_editor):
+    Chat = apps.get_model("chat", "Chat")
+    ChatParticipant = apps.get_model("chat", "ChatParticipant")
+    participants = set()
+    rows = Chat.objects.values_list("pk", *COMPANY_PATHS, LOGIST_PATH)
+    for chat_id, *companies, logist in rows.iterator():
+        participants.update(
+            (chat_id, company_id, None)
+            for company_id in companies
+            if company_id
+        )
+        if logist:
+            participants.add((chat_id, None, logist))
+    ChatParticipant.objects.bulk_create(
+        [
+            ChatParticipant(
+                chat_id=chat_id, company_id=company_id, user_id=user_id
+            )
+            for chat_id, company_id, user_id in participants
+        ],
+        batch_size=5000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0009_geocode_cache"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("chat", "0003_chat_last_message"),
+        ("exchange", "0003_location_gist_index"),
+        ("logistics", "0004_route_statistics"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChatParticipant",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "chat",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="participants",
+                        to="chat.chat",
+                    ),
+                ),
+                (
+                    "company",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="company.company",
+                        verbose_name="Компания",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        db_index=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Логист",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Участник чата",
+                "verbose_name_plural": "Участники чатов",
+                "db_table": "chat_participants",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="chatparticipant",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("company__isnull", False)),
+                fields=("company", "chat"),
+                name="chat_participants_company",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="chatparticipant",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("user__isnull", False)),
+                fields=("user", "chat"),
+                name="chat_participants_user",
+            ),
+        ),
+        migrations.RunPython(fill_participants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,168 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:39
+
+from itertools import chain, islice
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Max, Q
+
+# Роли, которым get_reader дает собственный курсор и filter_user_chats
+# показывает все чаты (SUPER_ADMIN, ADMIN, MANAGER, COMPANY_STAFF)
+ALL_CHATS_ROLES = (1, 2, 3, 6)
+COMPANY_ADMIN = 5
+
+
+def fill_read_cursors(apps, schema_editor):
+    """
+    Флаг is_read был общим для всех читателей: курсор каждого участника
+    чата и каждого пользователя, которому видны все чаты, ставится на
+    последнее прочитанное сообщение чата
+    """
+    Message = apps.get_model("chat", "Message")
+    ChatParticipant = apps.get_model("chat", "ChatParticipant")
+    ChatReadCursor = apps.get_model("chat", "ChatReadCursor")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    last_read = dict(
+        Message.objects.filter(is_read=True)
+        .values("chat_id")
+        .annotate(last_read_id=Max("id"))
+        .values_list("chat_id", "last_read_id")
+    )
+    participants = (
+        ChatParticipant.objects.filter(chat_id__in=list(last_read))
+        .values_list("chat_id", "company_id", "user_id")
+        .iterator()
+    )
+    # Администратор компании без компании читает как пользователь
+    user_ids = list(
+        User.objects.filter(
+            Q(role__in=ALL_CHATS_ROLES)
+            | Q(role=COMPANY_ADMIN, company__isnull=True)
+        ).values_list("pk", flat=True)
+    )
+    readers = chain(
+        participants,
+        (
+            (chat_id, None, user_id)
+            for chat_id in last_read
+            for user_id in user_ids
+        ),
+    )
+    cursors = (
+        ChatReadCursor(
+            chat_id=chat_id,
+            company_id=company_id,
+            user_id=user_id,
+            last_read_message_id=last_read[chat_id],
+        )
+        for chat_id, company_id, user_id in readers
+    )
+    while batch := list(islice(cursors, 5000)):
+        ChatReadCursor.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("company", "0009_geocode_cache"),
+        ("chat", "0004_chat_participants"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ChatReadCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "last_read_message_id",
+                    models.BigIntegerField(
+                        default=0,
+                        verbose_name="Последнее прочитанное сообщение",
+                    ),
+                ),
+                (
+                    "last_read_at",
+                    models.DateTimeField(
+                        null=True, verbose_name="Дата прочтения"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Курсор прочтения чата",
+                "verbose_name_plural": "Курсоры прочтения чатов",
+                "db_table": "chat_read_cursors",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["chat", "id"], name="chat_messages_chat_id"
+            ),
+        ),
+        migrations.AddField(
+            model_name="chatreadcursor",
+            name="chat",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="read_cursors",
+                to="chat.chat",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chatreadcursor",
+            name="company",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="company.company",
+                verbose_name="Компания",
+            ),
+        ),
+        migrations.AddField(
+            model_name="chatreadcursor",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Пользователь",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="chatreadcursor",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("company__isnull", False)),
+                fields=("company", "chat"),
+                name="chat_read_cursors_company",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="chatreadcursor",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("user__isnull", False)),
+                fields=("user", "chat"),
+                name="chat_read_cursors_user",
+            ),
+        ),
+        migrations.RunPython(fill_read_cursors, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="message",
+            name="is_read",
+        ),
+    ]
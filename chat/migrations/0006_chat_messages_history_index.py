@@ -0,0 +1,20 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("chat", "0005_chat_read_cursors"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="message",
+            index=models.Index(
+                fields=["chat", "created_at", "id"],
+                name="chat_messages_history",
+            ),
+        ),
+    ]
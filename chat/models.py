@@ -2,26 +2,47 @@
 from bulk_update_or_create import BulkUpdateOrCreateQuerySet
 from django.conf import settings
 from django.db import models
-from django.db.models import Count, Q, Max
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse
+from django.utils import timezone
 
+from chat.signals import messages_created
 from common.models import BaseModel, BaseNameModel
 from user.models import UserRole
 
 
 class ChatsQuerySet(BulkUpdateOrCreateQuerySet, models.QuerySet):
     def annotate_unread_messages(self, user, *args, **kwargs):
-        return self.annotate(
-            unread_count=Count(
-                "messages",
-                filter=(
-                    Q(messages__is_read=False) & ~Q(messages__author=user)
-                ),
+        """
+        last_read_id - курсор прочтения читателя (см. ChatReadCursor),
+        unread_count - чужие сообщения после курсора. Коррелированные
+        подзапросы вместо JOIN + GROUP BY считаются только для чатов страницы
+        """
+        reader = ChatReadCursor.get_reader(user)
+        last_read_id = ChatReadCursor.objects.filter(
+            chat=OuterRef("pk"), **reader
+        ).values("last_read_message_id")[:1]
+        unread_count = (
+            Message.objects.filter(
+                chat=OuterRef("pk"), pk__gt=OuterRef("last_read_id")
             )
+            .exclude(ChatReadCursor.get_own_messages(reader))
+            .order_by()
+            .values("chat")
+            .annotate(count=Count("pk"))
+            .values("count")
         )
+        return self.annotate(
+            last_read_id=Coalesce(
+                Subquery(last_read_id),
+                0,
+                output_field=models.BigIntegerField(),
+            )
+        ).annotate(unread_count=Coalesce(Subquery(unread_count), 0))
 
-    def annotate_latest_message(self, *args, **kwargs):
-        return self.annotate(latest_created_at=Max("messages__created_at"))
+    def order_by_last_message(self):
+        return self.order_by(F("last_message_at").desc(nulls_last=True), "-pk")
 
     def filter_user_chats(self, user):
         if user.role == UserRole.COMPANY_ADMIN:
@@ -30,18 +51,26 @@ class ChatsQuerySet(BulkUpdateOrCreateQuerySet, models.QuerySet):
             return self.__filter_for_logist(user)
         return self
 
+    def filter_company_chats(self, company_id):
+        return self.filter(participants__company_id=company_id)
+
     def __filter_for_company_admin(self, user):
-        return self.filter(
-            Q(deal__buyer_company=user.company)
-            | Q(deal__supplier_company=user.company)
-            | Q(equipment_deal__buyer_company=user.company)
-            | Q(equipment_deal__supplier_company=user.company)
-            | Q(logisticsoffer__transportapplication__created_by__company=user.company)
-            | Q(special_app__companies__id=user.company.id)
-        )
+        return self.filter_company_chats(user.company_id)
 
     def __filter_for_logist(self, user):
-        return self.filter(logisticsoffer__logist=user)
+        return self.filter(participants__user=user)
+
+
+# Пути от чата к компаниям и логисту, которым он виден
+CHAT_COMPANY_PATHS = (
+    "deal__buyer_company",
+    "deal__supplier_company",
+    "equipment_deal__buyer_company",
+    "equipment_deal__supplier_company",
+    "logisticsoffer__transportapplication__created_by__company",
+    "special_app__companies",
+)
+CHAT_LOGIST_PATH = "logisticsoffer__logist"
 
 
 class Chat(BaseNameModel):
@@ -49,12 +78,118 @@ class Chat(BaseNameModel):
         db_table = "chats"
         verbose_name = "Чат"
         verbose_name_plural = "Чаты"
+        indexes = [
+            models.Index(
+                F("last_message_at").desc(nulls_last=True),
+                F("id").desc(),
+                name="chats_last_message_at",
+            )
+        ]
+
+    # Последнее сообщение чата, обновляется при создании сообщения
+    # (см. chat/receivers.py), используется для сортировки списка чатов
+    last_message = models.ForeignKey(
+        "Message",
+        verbose_name="Последнее сообщение",
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+    last_message_at = models.DateTimeField(
+        "Дата последнего сообщения", null=True, blank=True
+    )
 
     objects = ChatsQuerySet.as_manager()
 
     def get_absolute_url(self):
         return reverse("chats-detail", kwargs={"pk": self.pk})
 
+    def get_audience(self):
+        """
+        Компании и логисты, которым виден чат (см. filter_user_chats)
+        :return: (id компаний, id логистов)
+        """
+        company_ids, logist_ids = set(), set()
+        for company_id, user_id in ChatParticipant.objects.filter(
+            chat_id=self.pk
+        ).values_list("company_id", "user_id"):
+            if company_id:
+                company_ids.add(company_id)
+            if user_id:
+                logist_ids.add(user_id)
+        return company_ids, logist_ids
+
+    def compute_audience(self):
+        """Участники чата по сделкам, предложениям логистов и спец. заявкам"""
+        rows = Chat.objects.filter(pk=self.pk).values_list(
+            *CHAT_COMPANY_PATHS, CHAT_LOGIST_PATH
+        )
+        company_ids, logist_ids = set(), set()
+        for *companies, logist in rows:
+            company_ids.update(filter(None, companies))
+            if logist:
+                logist_ids.add(logist)
+        return company_ids, logist_ids
+
+    def sync_participants(self):
+        """
+        Приводит ChatParticipant в соответствие с compute_audience
+        :return: добавленные и удаленные пары (id компании, id логиста)
+        """
+        company_ids, logist_ids = self.compute_audience()
+        expected = {(company_id, None) for company_id in company_ids} | {
+            (None, user_id) for user_id in logist_ids
+        }
+        existing = {
+            (company_id, user_id): pk
+            for pk, company_id, user_id in ChatParticipant.objects.filter(
+                chat_id=self.pk
+            ).values_list("pk", "company_id", "user_id")
+        }
+        removed = set(existing) - expected
+        added = expected - set(existing)
+        if removed:
+            ChatParticipant.objects.filter(
+                pk__in=[existing[key] for key in removed]
+            ).delete()
+        if added:
+            ChatParticipant.objects.bulk_create(
+                [
+                    ChatParticipant(
+                        chat_id=self.pk, company_id=company_id, user_id=user_id
+                    )
+                    for company_id, user_id in added
+                ],
+                ignore_conflicts=True,
+            )
+        return added | removed
+
+    @staticmethod
+    def set_last_message(message):
+        """Сдвигает указатель на последнее сообщение только вперед"""
+        Chat.objects.filter(
+            Q(last_message_at__isnull=True)
+            | Q(last_message_at__lte=message.created_at),
+            pk=message.chat_id,
+        ).update(last_message=message, last_message_at=message.created_at)
+
+    def refresh_last_message(self):
+        last_message = self.messages.order_by("-created_at", "-pk").first()
+        self.last_message = last_message
+        self.last_message_at = (
+            last_message.created_at if last_message else None
+        )
+        self.save(update_fields=["last_message", "last_message_at"])
+
+
+class MessagesQuerySet(BulkUpdateOrCreateQuerySet, models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        # bulk_create не отправляет post_save (см. receivers.py)
+        messages_created.send(sender=self.model, messages=objs)
+        return objs
+
 
 class Message(BaseModel):
     chat = models.ForeignKey(
@@ -66,15 +201,188 @@ class Message(BaseModel):
         related_name="messages",
     )
     content = models.TextField()
-    is_read = models.BooleanField(default=False)
+
+    objects = MessagesQuerySet.as_manager()
 
     class Meta:
         ordering = ("-created_at",)
         db_table = "chat_messages"
         verbose_name = "Сообщение чата"
         verbose_name_plural = "Сообщения чата"
+        indexes = [
+            # Подсчет сообщений после курсора прочтения
+            models.Index(fields=["chat", "id"], name="chat_messages_chat_id"),
+            # История чата (BeforeAfterPagination)
+            models.Index(
+                fields=["chat", "created_at", "id"],
+                name="chat_messages_history",
+            ),
+        ]
 
     def get_absolute_url(self):
         return reverse(
             "messages", kwargs={"chat_pk": self.chat.pk, "pk": self.pk}
         )
+
+
+class ChatParticipant(models.Model):
+    """
+    Компания или логист, которым виден чат. Заполняется при создании
+    сделок, предложений логистов и спец. заявок (см. chat/receivers.py),
+    чтобы доступ к чатам проверялся одним индексным запросом
+    """
+
+    chat = models.ForeignKey(
+        Chat, on_delete=models.CASCADE, related_name="participants"
+    )
+    company = models.ForeignKey(
+        "company.Company",
+        verbose_name="Компания",
+        on_delete=models.CASCADE,
+        related_name="+",
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Логист",
+        on_delete=models.CASCADE,
+        related_name="+",
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+
+    class Meta:
+        db_table = "chat_participants"
+        verbose_name = "Участник чата"
+        verbose_name_plural = "Участники чатов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "chat"],
+                condition=Q(company__isnull=False),
+                name="chat_participants_company",
+            ),
+            models.UniqueConstraint(
+                fields=["user", "chat"],
+                condition=Q(user__isnull=False),
+                name="chat_participants_user",
+            ),
+        ]
+
+
+class ChatReadCursor(models.Model):
+    """
+    Курсор прочтения чата: сообщения с id не больше last_read_message_id
+    прочитаны читателем. Читатель - компания для администратора компании
+    (прочтение общее для компании), для остальных - сам пользователь
+    """
+
+    chat = models.ForeignKey(
+        Chat, on_delete=models.CASCADE, related_name="read_cursors"
+    )
+    company = models.ForeignKey(
+        "company.Company",
+        verbose_name="Компания",
+        on_delete=models.CASCADE,
+        related_name="+",
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        verbose_name="Пользователь",
+        on_delete=models.CASCADE,
+        related_name="+",
+        null=True,
+        blank=True,
+        db_index=False,
+    )
+    last_read_message_id = models.BigIntegerField(
+        "Последнее прочитанное сообщение", default=0
+    )
+    last_read_at = models.DateTimeField("Дата прочтения", null=True)
+
+    class Meta:
+        db_table = "chat_read_cursors"
+        verbose_name = "Курсор прочтения чата"
+        verbose_name_plural = "Курсоры прочтения чатов"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["company", "chat"],
+                condition=Q(company__isnull=False),
+                name="chat_read_cursors_company",
+            ),
+            models.UniqueConstraint(
+                fields=["user", "chat"],
+                condition=Q(user__isnull=False),
+                name="chat_read_cursors_user",
+            ),
+        ]
+
+    @staticmethod
+    def get_reader(user) -> dict:
+        if user.role == UserRole.COMPANY_ADMIN and user.company_id:
+            return {"company_id": user.company_id}
+        return {"user_id": user.pk}
+
+    @staticmethod
+    def get_own_messages(reader: dict) -> Q:
+        """Сообщения самого читателя, они не бывают непрочитанными"""
+        if "company_id" in reader:
+            return Q(author__company_id=reader["company_id"])
+        return Q(author_id=reader["user_id"])
+
+    @staticmethod
+    def get_last_read_id(chat_id, user) -> int:
+        return (
+            ChatReadCursor.objects.filter(
+                chat_id=chat_id, **ChatReadCursor.get_reader(user)
+            )
+            .values_list("last_read_message_id", flat=True)
+            .first()
+            or 0
+        )
+
+    @staticmethod
+    def mark_read(chat_id, user, message_id):
+        """
+        Сдвигает курсор вперед до message_id
+        :return: прежнее значение курсора или None, если курсор не сдвинулся
+        """
+        cursor, _ = ChatReadCursor.objects.get_or_create(
+            chat_id=chat_id, **ChatReadCursor.get_reader(user)
+        )
+        last_read_id = cursor.last_read_message_id
+        while last_read_id < message_id:
+            # Сравнение с прежним значением: из параллельных запросов курсор
+            # сдвигает только один, и только он уменьшает счетчики
+            updated = ChatReadCursor.objects.filter(
+                pk=cursor.pk, last_read_message_id=last_read_id
+            ).update(
+                last_read_message_id=message_id, last_read_at=timezone.now()
+            )
+            if updated:
+                return last_read_id
+            last_read_id = (
+                ChatReadCursor.objects.filter(pk=cursor.pk)
+                .values_list("last_read_message_id", flat=True)
+                .get()
+            )
+        return None
+
+    @staticmethod
+    def mark_unread(chat_id, user, message_id) -> bool:
+        """Сдвигает курсор назад: message_id и более поздние не прочитаны"""
+        return bool(
+            ChatReadCursor.objects.filter(
+                chat_id=chat_id,
+                last_read_message_id__gte=message_id,
+                **ChatReadCursor.get_reader(user),
+            ).update(
+                last_read_message_id=message_id - 1,
+                last_read_at=timezone.now(),
+            )
+        )
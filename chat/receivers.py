@@ -0,0 +1,123 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from chat.models import Chat, ChatParticipant, Message
+from chat.services import unread_counters
+from chat.services.access import reset_chat_exists
+from chat.signals import messages_created
+from exchange.models import (
+    EquipmentDeal,
+    RecyclablesDeal,
+    SpecialApplication,
+    SpecialApps,
+)
+from logistics.models import LogisticsOffer, TransportApplication
+
+
+@receiver(post_save, sender=Message)
+def handle_new_message(sender, instance: Message, created, **kwargs):
+    if created:
+        messages_created.send(sender=sender, messages=[instance])
+
+
+@receiver(messages_created, sender=Message)
+def update_unread_counters(sender, messages, **kwargs):
+    unread_counters.messages_created(messages)
+    # Автор прочитал чат до своего сообщения включительно
+    last_by_author = {}
+    for message in messages:
+        last_by_author[message.chat_id, message.author_id] = message
+    for message in last_by_author.values():
+        unread_counters.mark_chat_read(
+            message.chat_id, message.author, message.pk
+        )
+
+
+@receiver(messages_created, sender=Message)
+def update_last_message(sender, messages, **kwargs):
+    last_by_chat = {}
+    for message in messages:
+        last = last_by_chat.get(message.chat_id)
+        if last is None or message.created_at >= last.created_at:
+            last_by_chat[message.chat_id] = message
+    for message in last_by_chat.values():
+        Chat.set_last_message(message)
+
+
+@receiver(post_delete, sender=Message)
+def handle_message_delete(sender, instance: Message, **kwargs):
+    chat = Chat.objects.filter(
+        pk=instance.chat_id, last_message_at__gte=instance.created_at
+    ).first()
+    if chat:
+        chat.refresh_last_message()
+
+
+@receiver(post_save, sender=Chat)
+def handle_chat_save(sender, instance: Chat, created, **kwargs):
+    if created:
+        reset_chat_exists(instance.pk)
+
+
+@receiver(post_delete, sender=Chat)
+def handle_chat_delete(sender, instance: Chat, **kwargs):
+    reset_chat_exists(instance.pk)
+    # Участники удаляются каскадом, сбрасываем кеш их состава
+    unread_counters.participants_changed(instance.pk, ())
+
+
+def sync_chat_participants(chat_id):
+    if not chat_id:
+        return
+    changed = Chat(pk=chat_id).sync_participants()
+    if changed:
+        unread_counters.participants_changed(chat_id, changed)
+
+
+@receiver(post_save, sender=RecyclablesDeal)
+@receiver(post_save, sender=EquipmentDeal)
+def handle_new_deal(sender, instance, created, **kwargs):
+    if created:
+        sync_chat_participants(instance.chat_id)
+
+
+@receiver(post_save, sender=LogisticsOffer)
+def handle_logistics_offer_save(
+    sender, instance: LogisticsOffer, created, **kwargs
+):
+    # Чат предложения создается повторным сохранением после создания
+    if (
+        instance.chat_id
+        and not ChatParticipant.objects.filter(
+            chat_id=instance.chat_id, user_id=instance.logist_id
+        ).exists()
+    ):
+        sync_chat_participants(instance.chat_id)
+
+
+@receiver(post_save, sender=TransportApplication)
+def handle_approved_offer_change(
+    sender, instance: TransportApplication, **kwargs
+):
+    if not instance.offer_tracker.has_changed("approved_logistics_offer"):
+        return
+    offer_ids = {
+        instance.offer_tracker.previous("approved_logistics_offer"),
+        instance.approved_logistics_offer_id,
+    }
+    for chat_id in LogisticsOffer.objects.filter(
+        pk__in=offer_ids - {None}
+    ).values_list("chat_id", flat=True):
+        sync_chat_participants(chat_id)
+
+
+@receiver(post_save, sender=SpecialApps)
+@receiver(post_delete, sender=SpecialApps)
+def handle_special_application_companies_change(
+    sender, instance: SpecialApps, **kwargs
+):
+    sync_chat_participants(
+        SpecialApplication.objects.filter(pk=instance.special_application_id)
+        .values_list("chat_id", flat=True)
+        .first()
+    )
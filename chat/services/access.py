@@ -0,0 +1,44 @@
+"""
+Проверка доступа к чату при websocket-подключении без запросов к БД.
+
+Повторяет ChatsQuerySet.filter_user_chats по кешированному составу
+участников чата (get_chat_audience), который сбрасывается при изменении
+участников. Для ролей, которым видны все чаты, кешируется только факт
+существования чата.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from chat.services.unread_counters import get_chat_audience
+from user.models import UserRole
+
+
+def _exists_key(chat_id) -> str:
+    return f"chat_exists:{chat_id}"
+
+
+def chat_exists(chat_id) -> bool:
+    from chat.models import Chat
+
+    key = _exists_key(chat_id)
+    exists = cache.get(key)
+    if exists is None:
+        exists = Chat.objects.filter(pk=chat_id).exists()
+        cache.set(key, exists, settings.WS_AUTH_CACHE_TIMEOUT)
+    return exists
+
+
+def has_chat_access(chat_id, user) -> bool:
+    if user.role == UserRole.COMPANY_ADMIN:
+        company_ids, _ = get_chat_audience(chat_id)
+        return user.company_id in company_ids
+    if user.role == UserRole.LOGIST:
+        _, logist_ids = get_chat_audience(chat_id)
+        return user.pk in logist_ids
+    return chat_exists(chat_id)
+
+
+def reset_chat_exists(chat_id):
+    """Чат создан или удален: сбросить кеш после коммита"""
+    transaction.on_commit(lambda: cache.delete(_exists_key(chat_id)))
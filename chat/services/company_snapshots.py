@@ -0,0 +1,98 @@
+"""
+Краткие данные компаний (id, name) авторов сообщений, кешируются на чат.
+
+В чате пишут сотрудники нескольких компаний, поэтому снимок компаний
+чата почти всегда уже в кеше, и страница сообщений сериализуется без
+запросов к компаниям. Изменения названий подхватываются по истечении
+CHAT_COMPANY_SNAPSHOT_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _get_cache_key(chat_id) -> str:
+    return f"chat_companies:{chat_id}"
+
+
+def get_company_snapshots(chat_id, company_ids) -> dict[int, dict]:
+    """
+    :param company_ids: id компаний авторов сообщений
+    :return: {id компании: {"id": ..., "name": ...}}
+    """
+    return get_chats_company_snapshots({chat_id: company_ids})[chat_id]
+
+
+def get_chats_company_snapshots(
+    company_ids_by_chat: dict,
+) -> dict[int, dict[int, dict]]:
+    """
+    Снимки компаний для нескольких чатов (страница списка чатов):
+    один get_many из кеша и не более одного запроса к компаниям
+    :param company_ids_by_chat: {id чата: id компаний авторов}
+    :return: {id чата: {id компании: {"id": ..., "name": ...}}}
+    """
+    from company.models import Company
+
+    keys = {
+        chat_id: _get_cache_key(chat_id) for chat_id in company_ids_by_chat
+    }
+    cached = cache.get_many(list(keys.values()))
+    snapshots = {
+        chat_id: dict(cached.get(key) or {}) for chat_id, key in keys.items()
+    }
+    missing = {
+        chat_id: set(filter(None, company_ids)) - set(snapshots[chat_id])
+        for chat_id, company_ids in company_ids_by_chat.items()
+    }
+    missing = {chat_id: ids for chat_id, ids in missing.items() if ids}
+    if missing:
+        companies = {
+            company["id"]: company
+            for company in Company.objects.filter(
+                pk__in=set().union(*missing.values())
+            ).values("id", "name")
+        }
+        for chat_id, company_ids in missing.items():
+            snapshots[chat_id].update(
+                (company_id, companies[company_id])
+                for company_id in company_ids
+                if company_id in companies
+            )
+        cache.set_many(
+            {keys[chat_id]: snapshots[chat_id] for chat_id in missing},
+            settings.CHAT_COMPANY_SNAPSHOT_TIMEOUT,
+        )
+    return snapshots
+
+
+def get_message_serializer_context(
+    chat_id,
+    messages,
+    context=None,
+    user=None,
+    last_read_id=None,
+    companies=None,
+) -> dict:
+    """
+    Контекст MessageSerializer: снимки компаний авторов и, если передан
+    пользователь, его курсор прочтения чата (для поля is_read)
+    :param companies: уже полученные снимки компаний чата
+    """
+    from chat.models import ChatReadCursor
+
+    context = dict(context or {})
+    context["companies"] = (
+        get_company_snapshots(
+            chat_id, {message.author.company_id for message in messages}
+        )
+        if companies is None
+        else companies
+    )
+    if user is not None and not user.is_anonymous:
+        context["reader"] = ChatReadCursor.get_reader(user)
+        context["last_read_message_id"] = (
+            ChatReadCursor.get_last_read_id(chat_id, user)
+            if last_read_id is None
+            else last_read_id
+        )
+    return context
@@ -0,0 +1,121 @@
+"""
+Запись сообщений, принятых по websocket (ChatConsumer.receive_json).
+
+Сообщение рассылается участникам чата сразу при получении, без id, а в
+БД попадает пачкой: буфер процесса сбрасывается одним bulk_create через
+CHAT_WRITER_FLUSH_INTERVAL мс после первого сообщения или при
+накоплении CHAT_WRITER_BATCH_SIZE сообщений. После записи в группу чата
+отправляются подтверждения {ack_id, id, created_at}, по которым клиенты
+сопоставляют разосланные сообщения с сохраненными. Если пачка не
+записалась, она пишется по чатам и по одному сообщению, так что теряются
+только ошибочные сообщения. Сообщение с id=None в подтверждении или без
+подтверждения (остановка процесса) не сохранено, клиент может отправить
+его повторно.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+
+log = logging.getLogger(__name__)
+
+
+def _bulk_save(messages) -> bool:
+    from chat.models import Message
+
+    try:
+        with transaction.atomic():
+            Message.objects.bulk_create(messages)
+    except Exception:
+        log.exception("Failed to save %s chat messages", len(messages))
+        # При откате транзакции id, выданные базой, недействительны
+        for message in messages:
+            message.pk = None
+        return False
+    return True
+
+
+def _save_messages(messages) -> None:
+    """
+    Пачка пишется одним bulk_create. Если она не записалась (например,
+    чат удален после подключения), сообщения пишутся по чатам, а внутри
+    чата с ошибкой - по одному, чтобы терялись только ошибочные сообщения.
+    Сохраненные сообщения получают pk
+    """
+    if _bulk_save(messages) or len(messages) == 1:
+        return
+    by_chat = defaultdict(list)
+    for message in messages:
+        by_chat[message.chat_id].append(message)
+    for chat_messages in by_chat.values():
+        if len(by_chat) == 1 or not _bulk_save(chat_messages):
+            for message in chat_messages:
+                _bulk_save([message])
+
+
+class MessageWriter:
+    def __init__(self, batch_size: int, flush_interval: float):
+        """
+        :param batch_size: максимальный размер пачки
+        :param flush_interval: максимальная задержка записи, секунды
+        """
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._timer = None
+
+    async def add(self, message, ack_id: str):
+        """Поставить сообщение в очередь на запись"""
+        self._pending.append((message, ack_id))
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().create_task(
+                self._flush_later()
+            )
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        await self.flush()
+
+    async def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        try:
+            await database_sync_to_async(_save_messages)(
+                [message for message, _ in batch]
+            )
+        except Exception:
+            log.exception("Failed to save %s chat messages", len(batch))
+        await self._send_acks(batch)
+
+    @staticmethod
+    async def _send_acks(batch):
+        acks = defaultdict(list)
+        for message, ack_id in batch:
+            ack = {"ack_id": ack_id, "id": None, "created_at": None}
+            if message.pk is not None:
+                ack["id"] = message.pk
+                ack["created_at"] = message.created_at.isoformat()
+            acks[message.chat_id].append(ack)
+        channel_layer = get_channel_layer()
+        for chat_id, chat_acks in acks.items():
+            await channel_layer.group_send(
+                str(chat_id), {"type": "chat_message_ack", "acks": chat_acks}
+            )
+
+
+message_writer = MessageWriter(
+    batch_size=settings.CHAT_WRITER_BATCH_SIZE,
+    flush_interval=settings.CHAT_WRITER_FLUSH_INTERVAL / 1000,
+)
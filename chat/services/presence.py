@@ -0,0 +1,155 @@
+"""
+Присутствие пользователей в чатах (кто сейчас подключен к чату по
+websocket) без обращений к БД.
+
+Состав чата - sorted set Redis "chat_presence:<id чата>": элемент
+"<id пользователя>:<channel_name>", score - время последнего heartbeat.
+Каждое подключение ChatConsumer обновляет свой элемент (ZADD) раз в
+CHAT_PRESENCE_HEARTBEAT_INTERVAL секунд, элементы без heartbeat дольше
+CHAT_PRESENCE_TIMEOUT (например, процесс упал без disconnect) удаляются
+ZREMRANGEBYSCORE при записи и чтении, ключ чата истекает вместе с
+последним heartbeat. Все операции атомарны на стороне Redis, поэтому
+одновременные heartbeat и отключения разных процессов не перезаписывают
+друг друга. Элементы по подключениям, а не по пользователям: пользователь
+с несколькими вкладками остается в сети, пока открыта хотя бы одна.
+
+Статусы для страницы чатов читаются одним конвейером (pipeline) на все
+чаты страницы. Без Redis (LocMemCache в разработке) состав хранится в
+памяти процесса.
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+
+
+def _get_cache_key(chat_id) -> str:
+    return cache.make_key(f"chat_presence:{chat_id}")
+
+
+def _get_member(channel_name: str, user_id) -> str:
+    return f"{user_id}:{channel_name}"
+
+
+def _get_user_ids(members: Iterable) -> list[int]:
+    user_ids = set()
+    for member in members:
+        if isinstance(member, bytes):
+            member = member.decode()
+        user_ids.add(int(member.split(":", 1)[0]))
+    return sorted(user_ids)
+
+
+class RedisPresenceStore:
+    def __init__(self, client):
+        self.client = client
+
+    def add(self, key: str, member: str, now: float):
+        with self.client.pipeline() as pipe:
+            pipe.zadd(key, {member: now})
+            pipe.zremrangebyscore(
+                key, "-inf", now - settings.CHAT_PRESENCE_TIMEOUT
+            )
+            pipe.expire(key, settings.CHAT_PRESENCE_TIMEOUT)
+            pipe.execute()
+
+    def remove(self, key: str, member: str, now: float) -> list:
+        """:return: оставшиеся элементы"""
+        with self.client.pipeline() as pipe:
+            pipe.zrem(key, member)
+            pipe.zremrangebyscore(
+                key, "-inf", now - settings.CHAT_PRESENCE_TIMEOUT
+            )
+            pipe.zrange(key, 0, -1)
+            return pipe.execute()[-1]
+
+    def members(self, keys: list[str], now: float) -> list[list]:
+        deadline = now - settings.CHAT_PRESENCE_TIMEOUT
+        with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.zremrangebyscore(key, "-inf", deadline)
+                pipe.zrange(key, 0, -1)
+            return pipe.execute()[1::2]
+
+
+class LocalPresenceStore:
+    """Хранилище в памяти процесса для разработки (один процесс)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chats = defaultdict(dict)
+
+    def _alive(self, key: str, now: float) -> dict:
+        deadline = now - settings.CHAT_PRESENCE_TIMEOUT
+        members = {
+            member: seen
+            for member, seen in self.chats.pop(key, {}).items()
+            if seen > deadline
+        }
+        if members:
+            self.chats[key] = members
+        return members
+
+    def add(self, key: str, member: str, now: float):
+        with self.lock:
+            self._alive(key, now)
+            self.chats[key][member] = now
+
+    def remove(self, key: str, member: str, now: float) -> list:
+        with self.lock:
+            self.chats.get(key, {}).pop(member, None)
+            return list(self._alive(key, now))
+
+    def members(self, keys: list[str], now: float) -> list[list]:
+        with self.lock:
+            return [list(self._alive(key, now)) for key in keys]
+
+
+_local_store = LocalPresenceStore()
+
+
+def _get_store():
+    backend = caches["default"]
+    if isinstance(backend, RedisCache):
+        return RedisPresenceStore(backend._cache.get_client(write=True))
+    return _local_store
+
+
+def heartbeat(chat_id, channel_name: str, user_id):
+    """Подключение channel_name пользователя user_id активно"""
+    _get_store().add(
+        _get_cache_key(chat_id),
+        _get_member(channel_name, user_id),
+        time.time(),
+    )
+
+
+def leave(chat_id, channel_name: str, user_id) -> bool:
+    """
+    Подключение закрыто
+    :return: остался ли пользователь в сети (другие подключения)
+    """
+    members = _get_store().remove(
+        _get_cache_key(chat_id),
+        _get_member(channel_name, user_id),
+        time.time(),
+    )
+    return user_id in _get_user_ids(members)
+
+
+def get_online_users(chat_ids) -> dict[int, list[int]]:
+    """:return: {id чата: id пользователей в сети}"""
+    chat_ids = list(chat_ids)
+    if not chat_ids:
+        return {}
+    members = _get_store().members(
+        [_get_cache_key(chat_id) for chat_id in chat_ids], time.time()
+    )
+    return {
+        chat_id: _get_user_ids(chat_members)
+        for chat_id, chat_members in zip(chat_ids, members)
+    }
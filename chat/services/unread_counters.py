@@ -0,0 +1,180 @@
+"""
+Счетчики непрочитанных сообщений для total_unread_count в ChatsViewSet.list.
+
+Непрочитанные - чужие сообщения после курсора прочтения читателя
+(ChatReadCursor). Счетчик повторяет видимость чатов из
+ChatsQuerySet.filter_user_chats:
+- администратор компании: счетчик компании по чатам, где она участник
+  (администратор без компании считается по БД);
+- логист: счетчик логиста по чатам его предложений;
+- остальные роли видят все чаты. Для них хранится не само число
+  непрочитанных, а "погашенные" сообщения пользователя
+  consumed = messages - own - unread, где messages - общий счетчик
+  сообщений, own - счетчик сообщений пользователя. Тогда
+  unread = messages - own - consumed: новое сообщение увеличивает только
+  общие счетчики, а сдвиг курсора увеличивает consumed.
+Первые два счетчика увеличиваются при новом сообщении и уменьшаются при
+сдвиге курсора на количество сообщений в сдвинутом диапазоне.
+Состав участников чата (Chat.get_audience) кешируется.
+"""
+from collections import Counter
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+
+from common.counters import change_counters, get_counter, reset_counters
+from user.models import UserRole
+
+MESSAGES_KEY = "unread:chats:messages"
+
+
+def _company_key(company_id) -> str:
+    return f"unread:chats:company:{company_id}"
+
+
+def _logist_key(user_id) -> str:
+    return f"unread:chats:logist:{user_id}"
+
+
+def _consumed_key(user_id) -> str:
+    return f"unread:chats:consumed:{user_id}"
+
+
+def _own_key(user_id) -> str:
+    return f"unread:chats:own:{user_id}"
+
+
+def _audience_key(chat_id) -> str:
+    return f"chat_audience:{chat_id}"
+
+
+def _sees_all_chats(user) -> bool:
+    return user.role not in (UserRole.COMPANY_ADMIN, UserRole.LOGIST)
+
+
+def _get_counter_key(user) -> Optional[str]:
+    if user.role == UserRole.COMPANY_ADMIN:
+        # Администратор без компании - счетчика нет, считается по БД
+        return _company_key(user.company_id) if user.company_id else None
+    if user.role == UserRole.LOGIST:
+        return _logist_key(user.pk)
+    return _consumed_key(user.pk)
+
+
+def get_chat_audience(chat_id):
+    from chat.models import Chat
+
+    key = _audience_key(chat_id)
+    audience = cache.get(key)
+    if audience is None:
+        audience = Chat(pk=chat_id).get_audience()
+        cache.set(key, audience, settings.UNREAD_COUNTERS_TIMEOUT)
+    return audience
+
+
+def _compute_total_unread_count(user) -> int:
+    from chat.models import Chat
+
+    return (
+        Chat.objects.filter_user_chats(user)
+        .annotate_unread_messages(user)
+        .aggregate(total=Sum("unread_count"))["total"]
+        or 0
+    )
+
+
+def _get_all_chats_unread_count(user) -> int:
+    from chat.models import Message
+
+    keys = [MESSAGES_KEY, _own_key(user.pk), _consumed_key(user.pk)]
+    values = cache.get_many(keys)
+    if len(values) == len(keys):
+        messages, own, consumed = (values[key] for key in keys)
+        return max(messages - own - consumed, 0)
+
+    # Общий счетчик живет без срока, начальное значение - число сообщений,
+    # чтобы consumed не был отрицательным
+    if MESSAGES_KEY not in values:
+        cache.add(MESSAGES_KEY, Message.objects.count(), None)
+    cache.add(_own_key(user.pk), 0, settings.UNREAD_COUNTERS_TIMEOUT)
+    unread = _compute_total_unread_count(user)
+    messages = cache.get(MESSAGES_KEY, 0)
+    own = cache.get(_own_key(user.pk), 0)
+    cache.set(
+        _consumed_key(user.pk),
+        max(messages - own - unread, 0),
+        settings.UNREAD_COUNTERS_TIMEOUT,
+    )
+    return unread
+
+
+def get_total_unread_count(user) -> int:
+    if _sees_all_chats(user):
+        return _get_all_chats_unread_count(user)
+    key = _get_counter_key(user)
+    if key is None:
+        return _compute_total_unread_count(user)
+    return get_counter(key, lambda: _compute_total_unread_count(user))
+
+
+def messages_created(messages):
+    deltas = Counter()
+    for message in messages:
+        author = message.author
+        company_ids, logist_ids = get_chat_audience(message.chat_id)
+        for company_id in company_ids:
+            if company_id != author.company_id:
+                deltas[_company_key(company_id)] += 1
+        for logist_id in logist_ids:
+            if logist_id != message.author_id:
+                deltas[_logist_key(logist_id)] += 1
+        deltas[MESSAGES_KEY] += 1
+        if _sees_all_chats(author):
+            deltas[_own_key(author.pk)] += 1
+    change_counters(deltas)
+
+
+def mark_chat_read(chat_id, user, message_id):
+    """Сдвигает курсор прочтения пользователя и уменьшает его счетчик"""
+    from chat.models import ChatReadCursor, Message
+
+    last_read_id = ChatReadCursor.mark_read(chat_id, user, message_id)
+    key = _get_counter_key(user)
+    if last_read_id is None or key is None:
+        return
+    read_count = (
+        Message.objects.filter(
+            chat_id=chat_id, pk__gt=last_read_id, pk__lte=message_id
+        )
+        .exclude(
+            ChatReadCursor.get_own_messages(ChatReadCursor.get_reader(user))
+        )
+        .count()
+    )
+    # Для пользователей, видящих все чаты, счетчик - погашенные сообщения
+    change_counters(
+        {key: read_count if _sees_all_chats(user) else -read_count}
+    )
+
+
+def mark_chat_unread(chat_id, user, message_id):
+    from chat.models import ChatReadCursor
+
+    key = _get_counter_key(user)
+    if ChatReadCursor.mark_unread(chat_id, user, message_id) and key:
+        reset_counters(key)
+
+
+def participants_changed(chat_id, participants):
+    """
+    Состав участников чата изменился (Chat.sync_participants): счетчики
+    затронутых компаний и логистов пересчитываются при чтении
+    """
+    keys = [_audience_key(chat_id)]
+    for company_id, user_id in participants:
+        keys.append(
+            _company_key(company_id) if company_id else _logist_key(user_id)
+        )
+    reset_counters(*keys)
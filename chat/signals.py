@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Созданы сообщения (Message.objects.create и bulk_create),
+# аргумент messages - список созданных сообщений
+messages_created = Signal()
@@ -1,19 +1,153 @@
+import hashlib
 import json
+import time
 
 import requests
 import logging
 from requests.adapters import HTTPAdapter, Retry
 from urllib.parse import urlencode
 
+from asgiref.sync import sync_to_async
+from pydantic import BaseModel
+
 from common.HTTPClient import exceptions
 
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
 log = logging.getLogger(__name__)
 
 
+class RequestMetrics(BaseModel):
+    """Счетчики запросов клиента (время в секундах)"""
+
+    requests: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    last_time: float = 0.0
+
+    def observe(self, elapsed: float, error: bool = False):
+        self.requests += 1
+        self.errors += int(error)
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.last_time = elapsed
+
+    @property
+    def average_time(self) -> float:
+        return self.total_time / self.requests if self.requests else 0.0
+
+
 class BaseClient:
+    """
+    HTTP-транспорт для клиентов внешних API.
+
+    Одна сессия requests с пулом соединений и ретраями живет столько же,
+    сколько клиент, поэтому соединения переиспользуются между запросами.
+    Повторяются только ошибки соединения (запрос не ушел на сервер) и,
+    если _RETRY_STATUS, ответы 5xx на идемпотентные методы; таймаут
+    чтения не повторяется, так как сервер мог уже выполнить запрос.
+    Количество повторов ограничено _MAX_RETRIES.
+    Для ASGI-кода есть асинхронный вариант запроса (_arequest) на
+    httpx.AsyncClient, он повторяет только ошибки соединения. Опционально подключается кеш ответов GET-запросов:
+    любой объект с методами get(key) и set(key, value, timeout) (например,
+    django.core.cache.cache).
+    """
+
     _DEFAULT_BASE_URL = None
+    # (connect, read), секунды
+    _DEFAULT_TIMEOUT = (3.05, 10)
+    _DEFAULT_RETRIES = 2
+    _MAX_RETRIES = 3
+    # Повторять ответы 5xx (для API с побочными эффектами отключить)
+    _RETRY_STATUS = True
+    _POOL_CONNECTIONS = 10
+    _POOL_MAXSIZE = 20
+
+    def __init__(
+        self,
+        base_url=None,
+        timeout=None,
+        retries=None,
+        cache=None,
+        cache_timeout=None,
+        **kwargs,
+    ):
+        """
+        :param base_url: базовый URL API, по умолчанию _DEFAULT_BASE_URL
+        :param timeout: таймаут (connect, read) или одно число, секунды
+        :param retries: количество повторов при ошибках соединения и 5xx,
+            не больше _MAX_RETRIES
+        :param cache: хранилище ответов GET-запросов (get/set)
+        :param cache_timeout: время жизни ответа в кеше, секунды
+        :param kwargs: дополнительные параметры запроса (headers и т.п.)
+        """
+        self.base_url = base_url or self._DEFAULT_BASE_URL
+        self.timeout = timeout or self._DEFAULT_TIMEOUT
+        self.retries = min(
+            self._DEFAULT_RETRIES if retries is None else retries,
+            self._MAX_RETRIES,
+        )
+        self.cache = cache
+        self.cache_timeout = cache_timeout
+        self.kwargs = kwargs or {}
+        self.metrics = RequestMetrics()
+        self._session = self._create_session()
+        self._async_client = None
+        self._req = None
+
+    def _create_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self._POOL_CONNECTIONS,
+            pool_maxsize=self._POOL_MAXSIZE,
+            max_retries=Retry(
+                total=self.retries,
+                connect=self.retries,
+                read=0,
+                status=self.retries if self._RETRY_STATUS else 0,
+                backoff_factor=0.1,
+                status_forcelist=[500, 502, 503, 504],
+                # Последний ответ 5xx разбирается в _get_body
+                raise_on_status=False,
+            ),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _get_async_client(self):
+        if httpx is None:
+            raise RuntimeError("Асинхронный режим требует пакет httpx")
+        if self._async_client is None:
+            connect, read = (
+                self.timeout
+                if isinstance(self.timeout, tuple)
+                else (self.timeout, self.timeout)
+            )
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(
+                    max_connections=self._POOL_MAXSIZE,
+                    max_keepalive_connections=self._POOL_CONNECTIONS,
+                ),
+                # Повторяет только ошибки соединения
+                transport=httpx.AsyncHTTPTransport(retries=self.retries),
+            )
+        return self._async_client
+
+    def close(self):
+        self._session.close()
 
-    # TODO: Add init method
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
 
     @staticmethod
     def _generate_auth_url(path, params):
@@ -42,12 +176,29 @@ class BaseClient:
             path + "?" + requests.utils.unquote_unreserved(urlencode(params))
         )
 
+    def _get_cache_key(self, url, get_params):
+        """Ключ кеша для GET-запроса, клиенты могут переопределить"""
+        authed_url = self._generate_auth_url(url, get_params)
+        digest = hashlib.md5(authed_url.encode()).hexdigest()
+        return f"http_client:{self.__class__.__name__}:{digest}"
+
+    def _get_request_kwargs(self, post_params):
+        final_requests_kwargs = dict(self.kwargs)
+        final_requests_kwargs.setdefault("timeout", self.timeout)
+        if post_params is not None:
+            headers = final_requests_kwargs.get("headers", {})
+            if headers.get("Content-Type") == "application/json":
+                final_requests_kwargs["json"] = post_params
+            else:
+                # Send as x-www-form-urlencoded key-value pair string (e.g. Mapbox API)
+                final_requests_kwargs["data"] = post_params
+        return final_requests_kwargs
+
     def _request(
         self,
         url,
         get_params=None,
         post_params=None,
-        retry_counter=5,
         dry_run=None,
     ):
         """Performs HTTP GET/POST with credentials, returning the body as
@@ -62,13 +213,6 @@ class BaseClient:
         param post_params: HTTP POST parameters. Only specified by calling method.
         type post_params: dict
 
-        param first_request_time: The time of the first request (None if no
-            retries have occurred).
-        type first_request_time: :class:`datetime.datetime`
-
-        param retry_counter: The number of this retry, or zero for first attempt.
-        type retry_counter: int
-
         param dry_run: If true, only prints URL and parameters. true or false.
         type dry_run: bool
 
@@ -80,61 +224,104 @@ class BaseClient:
         returns: raw JSON response.
         rtype: dict
         """
-        retries = Retry(
-            total=retry_counter,
-            backoff_factor=0.1,
-            status_forcelist=[500, 502, 503, 504],
-        )
-
-        self._session.mount("https://", HTTPAdapter(max_retries=retries))
-
         authed_url = self._generate_auth_url(url, get_params)
-
-        final_requests_kwargs = self.kwargs
-
-        # Determine GET/POST.
-        requests_method = self._session.get
-        if post_params is not None:
-            requests_method = self._session.post
-            if (
-                final_requests_kwargs["headers"]["Content-Type"]
-                == "application/json"
-            ):
-                final_requests_kwargs["json"] = post_params
-            else:
-                # Send as x-www-form-urlencoded key-value pair string (e.g. Mapbox API)
-                final_requests_kwargs["data"] = post_params
+        final_requests_kwargs = self._get_request_kwargs(post_params)
 
         # Only print URL and parameters for dry_run
         if dry_run:
             print(
                 "url:\n{}\nParameters:\n{}".format(
                     self.base_url + authed_url,
-                    json.dumps(final_requests_kwargs, indent=2),
+                    json.dumps(final_requests_kwargs, indent=2, default=str),
                 )
             )
             return
 
-        try:
+        use_cache = self.cache is not None and post_params is None
+        if use_cache:
+            cache_key = self._get_cache_key(url, get_params)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.metrics.cache_hits += 1
+                return cached
 
-            log.debug(
-                f"_request: requests_method({self.base_url + authed_url}, {final_requests_kwargs})"
-            )
+        # Determine GET/POST.
+        requests_method = self._session.get
+        if post_params is not None:
+            requests_method = self._session.post
 
+        log.debug(
+            f"_request: requests_method({self.base_url + authed_url}, {final_requests_kwargs})"
+        )
+
+        started = time.perf_counter()
+        error = True
+        try:
             response = requests_method(
                 self.base_url + authed_url, **final_requests_kwargs
             )
             self._req = response.request
-
+            result = self._get_body(response)
+            error = False
         except requests.exceptions.Timeout:
             raise exceptions.Timeout()
-
-        result = self._get_body(response)
+        finally:
+            self._observe(authed_url, started, error)
 
         log.debug(f"_request: result = {result}")
 
+        if use_cache:
+            self.cache.set(cache_key, result, self.cache_timeout)
         return result
 
+    async def _arequest(self, url, get_params=None, post_params=None):
+        """Асинхронный вариант _request на httpx.AsyncClient"""
+        authed_url = self._generate_auth_url(url, get_params)
+        final_requests_kwargs = self._get_request_kwargs(post_params)
+        # Таймауты и пул заданы в самом AsyncClient
+        final_requests_kwargs.pop("timeout")
+
+        use_cache = self.cache is not None and post_params is None
+        if use_cache:
+            cache_key = self._get_cache_key(url, get_params)
+            cached = await sync_to_async(self.cache.get)(cache_key)
+            if cached is not None:
+                self.metrics.cache_hits += 1
+                return cached
+
+        client = self._get_async_client()
+        method = "GET" if post_params is None else "POST"
+
+        started = time.perf_counter()
+        error = True
+        try:
+            response = await client.request(
+                method, authed_url, **final_requests_kwargs
+            )
+            result = self._get_body(response)
+            error = False
+        except httpx.TimeoutException:
+            raise exceptions.Timeout()
+        finally:
+            self._observe(authed_url, started, error)
+
+        if use_cache:
+            await sync_to_async(self.cache.set)(
+                cache_key, result, self.cache_timeout
+            )
+        return result
+
+    def _observe(self, authed_url, started, error):
+        elapsed = time.perf_counter() - started
+        self.metrics.observe(elapsed, error)
+        log.info(
+            "%s request %s took %.1f ms%s",
+            self.__class__.__name__,
+            authed_url.split("?")[0],
+            elapsed * 1000,
+            " (error)" if error else "",
+        )
+
     @property
     def req(self):
         """Holds the :class:`requests.PreparedRequest` property for the last request."""
@@ -0,0 +1,63 @@
+"""
+Счетчики в кеше (Redis) с пересчетом из БД.
+
+Значение счетчика хранится в кеше и меняется атомарно (INCR/DECR) после
+коммита транзакции, которая его изменила. Если ключа нет, он не
+создается при изменении: следующее чтение посчитает значение по БД.
+Время жизни ключа (UNREAD_COUNTERS_TIMEOUT) ограничивает расхождение
+с БД, если какое-то изменение прошло мимо счетчиков.
+"""
+import logging
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+log = logging.getLogger(__name__)
+
+
+def get_counters(computes: dict[str, Callable[[], int]]) -> dict[str, int]:
+    """
+    Значения счетчиков по ключам, отсутствующие в кеше считаются
+    соответствующей функцией и сохраняются
+    """
+    values = cache.get_many(list(computes))
+    missing = {
+        key: compute()
+        for key, compute in computes.items()
+        if key not in values
+    }
+    if missing:
+        cache.set_many(missing, settings.UNREAD_COUNTERS_TIMEOUT)
+        values.update(missing)
+    return values
+
+
+def get_counter(key: str, compute: Callable[[], int]) -> int:
+    return get_counters({key: compute})[key]
+
+
+def _change_counters(deltas: dict[str, int]):
+    for key, delta in deltas.items():
+        if not delta:
+            continue
+        try:
+            value = cache.incr(key, delta)
+        except ValueError:
+            # Ключа нет - посчитается по БД при чтении
+            continue
+        if value < 0:
+            log.warning("Counter %s went negative, resetting", key)
+            cache.delete(key)
+
+
+def change_counters(deltas: dict[str, int]):
+    """Изменить счетчики после коммита текущей транзакции"""
+    deltas = dict(deltas)
+    transaction.on_commit(lambda: _change_counters(deltas))
+
+
+def reset_counters(*keys: str):
+    """Сбросить счетчики после коммита, они будут пересчитаны при чтении"""
+    transaction.on_commit(lambda: cache.delete_many(list(keys)))
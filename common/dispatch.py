@@ -0,0 +1,98 @@
+"""
+Отложенные обработчики сигналов.
+
+Обработчик, подключенный через deferred_receiver, не выполняется в момент
+отправки сигнала: вызов откладывается до коммита текущей транзакции
+(transaction.on_commit), поэтому он видит зафиксированные данные и не
+срабатывает при откате. Тяжелые обработчики (heavy=True) выполняются в пуле
+потоков процесса и не увеличивают время ответа на запрос. При ошибке вызов
+повторяется с экспоненциальной задержкой, поэтому обработчики должны быть
+идемпотентными.
+
+DEFERRED_SIGNALS_WORKERS=0 выполняет тяжелые обработчики сразу после
+коммита в потоке запроса (удобно для отладки).
+"""
+import atexit
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+log = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.DEFERRED_SIGNALS_WORKERS,
+            thread_name_prefix="deferred-signals",
+        )
+        atexit.register(_executor.shutdown)
+    return _executor
+
+
+def _run(func, retries, backoff, kwargs, in_worker):
+    name = f"{func.__module__}.{func.__qualname__}"
+    for attempt in range(retries + 1):
+        if in_worker:
+            close_old_connections()
+        try:
+            with transaction.atomic():
+                func(**kwargs)
+            return
+        except Exception:
+            if attempt == retries:
+                log.exception("Deferred receiver %s failed", name)
+                return
+            log.warning(
+                "Deferred receiver %s failed, retry %s of %s",
+                name,
+                attempt + 1,
+                retries,
+                exc_info=True,
+            )
+            time.sleep(backoff * 2**attempt)
+        finally:
+            if in_worker:
+                close_old_connections()
+
+
+def _dispatch(func, heavy, retries, backoff, kwargs):
+    if heavy and settings.DEFERRED_SIGNALS_WORKERS:
+        _get_executor().submit(_run, func, retries, backoff, kwargs, True)
+    else:
+        _run(func, retries, backoff, kwargs, False)
+
+
+def deferred_receiver(signal, heavy=False, retries=3, backoff=0.5, **kwargs):
+    """
+    Аналог django.dispatch.receiver для отложенных обработчиков
+    :param signal: сигнал или список сигналов
+    :param heavy: выполнять в пуле потоков
+    :param retries: количество повторов при ошибке
+    :param backoff: задержка перед первым повтором, секунды
+    :param kwargs: параметры Signal.connect (sender, dispatch_uid)
+    """
+
+    def _decorator(func):
+        @functools.wraps(func)
+        def wrapper(**signal_kwargs):
+            transaction.on_commit(
+                functools.partial(
+                    _dispatch, func, heavy, retries, backoff, signal_kwargs
+                )
+            )
+
+        signals = signal if isinstance(signal, (list, tuple)) else [signal]
+        for s in signals:
+            # weak=False: wrapper не хранится больше нигде
+            s.connect(wrapper, weak=False, **kwargs)
+        return func
+
+    return _decorator
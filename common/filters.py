@@ -1,5 +1,7 @@
-from common.utils import str2bool
 from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+
+from common.utils import str2bool
 
 
 class FavoriteFilterBackend(filters.BaseFilterBackend):
@@ -17,3 +19,80 @@ class FavoriteFilterBackend(filters.BaseFilterBackend):
                 queryset = queryset.filter(is_favorite=True)
 
         return queryset
+
+
+class DistanceFilterBackend(filters.BaseFilterBackend):
+    """
+    Поиск по расстоянию от точки (latitude, longitude):
+    ?radius= - объекты в радиусе, км;
+    ?nearest= - K ближайших объектов.
+    С radius или nearest результат сортируется по расстоянию, без них
+    только добавляется поле distance. Queryset должен поддерживать
+    методы GeoQuerySetMixin.
+    """
+
+    max_nearest = 500
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        if params.get("latitude") is None or params.get("longitude") is None:
+            return queryset
+
+        try:
+            latitude = float(params["latitude"])
+            longitude = float(params["longitude"])
+            radius = float(params["radius"]) if params.get("radius") else None
+            nearest = int(params["nearest"]) if params.get("nearest") else None
+        except ValueError:
+            raise ValidationError("Некорректные параметры поиска по расстоянию")
+
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError("Некорректные координаты")
+        if radius is not None and radius <= 0:
+            raise ValidationError("Радиус должен быть больше 0")
+        if nearest is not None and not 0 < nearest <= self.max_nearest:
+            raise ValidationError(
+                f"Количество ближайших должно быть от 1 до {self.max_nearest}"
+            )
+
+        if radius is not None:
+            queryset = queryset.within_radius(latitude, longitude, radius)
+        if nearest is not None:
+            queryset = queryset.nearest(latitude, longitude, nearest)
+        if radius is None and nearest is None:
+            # Без ограничения (radius/nearest) только считаем расстояние:
+            # сортировка по нему требовала бы расчета для всей таблицы
+            queryset = queryset.annotate_distance(latitude, longitude)
+        return queryset
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": "latitude",
+                "required": False,
+                "in": "query",
+                "description": "Широта точки поиска по расстоянию",
+                "schema": {"type": "number"},
+            },
+            {
+                "name": "longitude",
+                "required": False,
+                "in": "query",
+                "description": "Долгота точки поиска по расстоянию",
+                "schema": {"type": "number"},
+            },
+            {
+                "name": "radius",
+                "required": False,
+                "in": "query",
+                "description": "Радиус поиска, км",
+                "schema": {"type": "number"},
+            },
+            {
+                "name": "nearest",
+                "required": False,
+                "in": "query",
+                "description": "Количество ближайших объектов",
+                "schema": {"type": "integer"},
+            },
+        ]
@@ -0,0 +1,119 @@
+"""
+Поиск по расстоянию на основе расширений PostgreSQL cube/earthdistance.
+
+Координаты переводятся в точку на сфере функцией ll_to_earth, по этому
+выражению строится функциональный GiST-индекс (см. earth_location_index).
+Поиск в радиусе сначала отбирает кандидатов по индексу через earth_box,
+затем уточняет их точным earth_distance. Поиск ближайших K использует
+KNN-оператор cube "<->", который также обслуживается GiST-индексом.
+"""
+from django.contrib.postgres.indexes import GistIndex
+from django.db import models
+from django.db.models import Exists, F, FloatField, Func, OuterRef, Value
+from django.db.models.functions import Cast
+
+
+class LlToEarth(Func):
+    function = "ll_to_earth"
+    output_field = models.Field()
+
+
+class EarthBox(Func):
+    function = "earth_box"
+    output_field = models.Field()
+
+
+class EarthDistance(Func):
+    function = "earth_distance"
+    output_field = FloatField()
+
+
+class CubeContains(Func):
+    """cube @> cube"""
+
+    arg_joiner = " @> "
+    template = "%(expressions)s"
+    output_field = models.BooleanField()
+
+
+class CubeDistance(Func):
+    """Евклидово расстояние между cube (KNN-оператор для GiST)"""
+
+    arg_joiner = " <-> "
+    template = "(%(expressions)s)"
+    output_field = FloatField()
+
+
+def location_to_earth(latitude_field="latitude", longitude_field="longitude"):
+    """Выражение ll_to_earth для полей модели, совпадает с выражением индекса"""
+    return LlToEarth(
+        Cast(F(latitude_field), FloatField()),
+        Cast(F(longitude_field), FloatField()),
+    )
+
+
+def point_to_earth(latitude: float, longitude: float):
+    return LlToEarth(
+        Value(float(latitude), output_field=FloatField()),
+        Value(float(longitude), output_field=FloatField()),
+    )
+
+
+def earth_location_index(name):
+    """GiST-индекс по ll_to_earth(latitude, longitude)"""
+    return GistIndex(location_to_earth(), name=name)
+
+
+class GeoQuerySetMixin:
+    """
+    Методы поиска по расстоянию для моделей с полями latitude/longitude.
+    Расстояние (annotate "distance") возвращается в километрах.
+    """
+
+    def annotate_distance(self, latitude: float, longitude: float):
+        return self.annotate(
+            distance=EarthDistance(
+                point_to_earth(latitude, longitude), location_to_earth()
+            )
+            / 1000
+        )
+
+    def within_radius(self, latitude: float, longitude: float, radius_km):
+        radius_m = float(radius_km) * 1000
+        return (
+            self.filter(
+                CubeContains(
+                    EarthBox(
+                        point_to_earth(latitude, longitude),
+                        Value(radius_m, output_field=FloatField()),
+                    ),
+                    location_to_earth(),
+                )
+            )
+            .annotate_distance(latitude, longitude)
+            .filter(distance__lte=radius_km)
+            .order_by("distance")
+        )
+
+    def nearest(self, latitude: float, longitude: float, limit: int):
+        # KNN-запрос строится по модели без аннотаций: JOIN и GROUP BY
+        # аннотаций (например, Count в CompanyViewSet) не дают Postgres
+        # сортировать по "<->" через GiST-индекс. Условия исходного
+        # queryset проверяются коррелированным EXISTS только для
+        # кандидатов, которые отдает индекс
+        candidates = self.model._default_manager.filter(
+            latitude__isnull=False, longitude__isnull=False
+        )
+        if self.query.has_filters():
+            candidates = candidates.filter(
+                Exists(self.filter(pk=OuterRef("pk")).order_by())
+            )
+        nearest_ids = candidates.order_by(
+            CubeDistance(
+                location_to_earth(), point_to_earth(latitude, longitude)
+            )
+        ).values("pk")[:limit]
+        queryset = self.filter(pk__in=nearest_ids)
+        if "distance" not in queryset.query.annotations:
+            queryset = queryset.annotate_distance(latitude, longitude)
+        return queryset.order_by("distance")
@@ -1,3 +1,4 @@
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
 
@@ -54,3 +55,71 @@ class PageSizePagination(PageNumberPagination):
                 "results": schema,
             },
         }
+
+
+class BeforeAfterPagination(PageSizePagination):
+    """
+    Курсорная (keyset) навигация по записям, упорядоченным по
+    (created_at, id) от новых к старым:
+    ?before=<id> - записи старше указанной (прокрутка истории назад),
+    ?after=<id> - записи новее указанной (догрузка после переподключения).
+    Условие на (created_at, id) обслуживается составным индексом, поэтому
+    стоимость страницы не зависит от глубины прокрутки. Без параметров
+    работает обычная постраничная навигация.
+    """
+
+    before_query_param = "before"
+    after_query_param = "after"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor = None
+        before = request.query_params.get(self.before_query_param)
+        after = request.query_params.get(self.after_query_param)
+        if before is None and after is None:
+            return super().paginate_queryset(queryset, request, view=view)
+
+        self.cursor = (
+            self.after_query_param if after else self.before_query_param
+        )
+        anchor_id = after or before
+        try:
+            anchor_id = int(anchor_id)
+            anchor = queryset.filter(pk=anchor_id).values("created_at").get()
+        except (ValueError, queryset.model.DoesNotExist):
+            raise NotFound(f"Запись {anchor_id} не найдена")
+        created_at = anchor["created_at"]
+
+        page_size = self.get_page_size(request)
+        if after:
+            queryset = (
+                queryset.filter(created_at__gte=created_at)
+                .exclude(created_at=created_at, pk__lte=anchor_id)
+                .order_by("created_at", "pk")
+            )
+        else:
+            queryset = (
+                queryset.filter(created_at__lte=created_at)
+                .exclude(created_at=created_at, pk__gte=anchor_id)
+                .order_by("-created_at", "-pk")
+            )
+        items = list(queryset[: page_size + 1])
+        self.has_more = len(items) > page_size
+        items = items[:page_size]
+        if after:
+            # Ответ всегда от новых к старым, как и без курсора
+            items.reverse()
+        self.items = items
+        return items
+
+    def get_paginated_response(self, data):
+        if self.cursor is None:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "has_more": self.has_more,
+                # Курсоры для следующих запросов
+                "before": self.items[-1].pk if self.items else None,
+                "after": self.items[0].pk if self.items else None,
+                "results": data,
+            }
+        )
@@ -5,8 +5,10 @@ from django.http import HttpResponseRedirect
 from django.shortcuts import render
 from import_export import resources, fields
 from import_export.admin import ImportExportModelAdmin
+from import_export.results import RowResult
 from django import forms
 from common.admin import BaseModelAdmin
+from company.services.company_import.importer import CompanyBulkImporter
 from company.models import (
     Company,
     CompanyDocument,
@@ -19,18 +21,12 @@ from company.models import (
     CompanyActivityType,
     City,
     Region,
-    CompanyStatus,
     Subscribe, Proposal, SubscribesLevels, SubscribesPeriod, District
 )
-from exchange.models import (
-    RecyclablesApplication,
-    ApplicationStatus,
-    DealType,
-    UrgencyType, SpecialApplication,
-)
-from product.models import RecyclablesCategory, Recyclables
+from exchange.models import SpecialApplication
 
 import logging
+import traceback
 
 log = logging.getLogger(__name__)
 
@@ -89,232 +85,70 @@ class CompanyResource(resources.ModelResource):
     inn = fields.Field(column_name="inn", attribute="inn")
     phone = fields.Field(column_name="Рабочий телефон", attribute="phone")
 
-    def __parse_number(self, phone_number: str):
-        if phone_number.startswith("8"):
-            phone_number = "+7" + phone_number[1:]
-        if phone_number.startswith("7"):
-            phone_number = "+" + phone_number
-        if phone_number.startswith("9"):
-            phone_number = "+7" + phone_number
-
-        return phone_number
-
-    def __parse_price(self, price: str):
-        if price is None or price == "None":
-            return 0
-        price = (
-            price.replace("руб.", "")
-            .replace(" ", "")
-            .replace(",", ".")
-            .strip()
-        )
-        return float(price)
-
-    def __parse_coordinates(self, address: str):
-        import re
-
-        pattern = r"\(([-+]?[0-9]*\.?[0-9]+), ([-+]?[0-9]*\.?[0-9]+)\)"
-
-        matched = re.search(pattern, address)
-        if not matched:
-            return None, None
-        latitude, longitude = float(matched.group(1)), float(matched.group(2))
-        return latitude, longitude
-
-    def before_import_row(self, row, row_number=None, **kwargs):
-
-        phone_number = str(row.get("Рабочий телефон"))
-        phone_number = self.__parse_number(phone_number)
-
-        row["Рабочий телефон"] = phone_number
-
-        row["monthly_volume"] = row.get("Ежемесячный объём")
-
-        city = self.__get_city(row)
-
-        row["city"] = city.pk if city else None
-
-        row["price"] = (
-                str(row.get("Стоимость продукции в рублях за КГ с НДС")) or "0"
-        )
-        row["price"] = self.__parse_price(row["price"])
-
-        row["address"] = row.get("Адрес Компании", "")
-        address = row.get("address")
-        if address and address != "None":
-            row["latitude"], row["longitude"] = self.__parse_coordinates(
-                row["Адрес Компании"]
-            )
-
-    def __get_city(self, row):
-        city_name = row.get("Город")
-        if city_name:
-            if City.objects.filter(name__iexact=city_name).exists():
-                return City.objects.filter(name__iexact=city_name).first()
-            return City.objects.create(name=city_name)
-
-    def after_import_row(self, row, row_result, row_number=None, **kwargs):
-        from django.contrib.auth import get_user_model
-
-        User = get_user_model()
-
-        nds = str(row.get("НДС", "0")) == "1"
-
-        recyclables_name = row.get("Вид сырья")
-        if recyclables_name:
-            recyclables_subcategory = row.get("Подкатегория")
-            recyclables_category = row.get("Категория")
-            recyclables = self.__create_recyclables_and_category(
-                recyclables_category=recyclables_category,
-                recyclables_name=recyclables_name,
-                recyclables_subcategory=recyclables_subcategory,
-            )
-
-        company = Company.objects.get(
-            name=row.get("Название компании"), inn=row.get("inn")
+    def import_data(
+        self,
+        dataset,
+        dry_run=False,
+        raise_errors=False,
+        use_transactions=None,
+        collect_failed_rows=False,
+        rollback_on_validation_errors=False,
+        **kwargs,
+    ):
+        """
+        Импорт из админки идет через CompanyBulkImporter (справочники и
+        компании пачками) вместо построчных before/after_import_row.
+        Результат собирается в формате django-import-export для страницы
+        предпросмотра и журнала админки
+        """
+        result = self.get_result_class()()
+        result.diff_headers = ["inn", "Название компании"]
+        result.total_rows = len(dataset)
+        rows = dataset.dict
+        existing_inns = set(
+            Company.objects.filter(
+                inn__in={str(row.get("inn") or "") for row in rows}
+            ).values_list("inn", flat=True)
         )
 
-        manager_phone = self.__parse_number(str(row.get("Телефон менеджера")))
-        company.manager = User.objects.filter(phone=manager_phone).first()
-        company.status = CompanyStatus.VERIFIED
-        company.save()
-        if recyclables_name:
-            application_deal_type = (
-                DealType.BUY
-                if str(row.get("Покупка")) == "1"
-                else DealType.SELL
-            )
-
-            CompanyRecyclables.objects.get_or_create(
-                company=company,
-                recyclables=recyclables,
-                monthly_volume=row.get("monthly_volume"),
-                price=row.get("price", 0.0),
-                action=application_deal_type,
-            )
-
-            RecyclablesApplication.objects.get_or_create(
-                company=company,
-                recyclables=recyclables,
-                status=ApplicationStatus.PUBLISHED,
-                deal_type=application_deal_type,
-                urgency_type=UrgencyType.SUPPLY_CONTRACT,
-                price=row["price"],
-                volume=row["monthly_volume"],
-                with_nds=nds,
-                longitude=company.longitude,
-                latitude=company.latitude,
-                city=company.city,
-                address=(company.address or ""),
+        try:
+            report = CompanyBulkImporter(rows, dry_run=dry_run).run()
+        except Exception as e:
+            log.exception("Company import failed")
+            if raise_errors:
+                raise
+            result.append_base_error(
+                self.get_error_result_class()(e, traceback.format_exc())
             )
+            return result
 
-        advantages = self.__create_advantages(row)
-        collection_types = self.__create_recycling_collection(row, row_number)
-
-        for key in advantages.keys():
-            activity_type, created = CompanyActivityType.objects.get_or_create(
-                company=company, activity=key
+        errors = {error.row_number: error for error in report.errors}
+        companies = {}
+        if not dry_run:
+            companies = Company.objects.in_bulk(
+                {str(row.get("inn") or "") for row in rows}, field_name="inn"
             )
-            activity_type.rec_col_types.set(collection_types[key])
-            activity_type.advantages.set(advantages[key])
-            activity_type.save()
-
-    def __create_recyclables_and_category(
-            self, recyclables_category, recyclables_name, recyclables_subcategory
-    ):
-        parent_category, created = RecyclablesCategory.objects.get_or_create(
-            name=recyclables_category, defaults={"name": recyclables_category}
-        )
-        subcategory, created = RecyclablesCategory.objects.get_or_create(
-            name=recyclables_subcategory,
-            parent=parent_category,
-            defaults={
-                "name": recyclables_subcategory,
-                "parent": parent_category,
-            },
-        )
-        recyclables, created = Recyclables.objects.get_or_create(
-            name=recyclables_name, category=subcategory
-        )
-        return recyclables
-
-    def __create_advantages(self, row):
-        supplier = (
-            row.get("Преимущества_поставщик").split(",")
-            if row.get("Преимущества_поставщик")
-            else []
-        )
-        processor = (
-            row.get("Преимущества__переработчик").split(",")
-            if row.get("Преимущества__переработчик")
-            else []
-        )
-        buyer = (
-            row.get("Преимущества_покупатель").split(",")
-            if row.get("Преимущества_покупатель")
-            else []
-        )
-        adv = {
-            ActivityType.SUPPLIER: [
-                CompanyAdvantage.objects.get_or_create(
-                    name=name, activity=ActivityType.SUPPLIER
-                )[0]
-                for name in supplier
-            ],
-            ActivityType.PROCESSOR: [
-                CompanyAdvantage.objects.get_or_create(
-                    name=name, activity=ActivityType.PROCESSOR
-                )[0]
-                for name in processor
-            ],
-            ActivityType.BUYER: [
-                CompanyAdvantage.objects.get_or_create(
-                    name=name, activity=ActivityType.BUYER
-                )[0]
-                for name in buyer
-            ],
-        }
-
-        return adv
-
-    def __create_recycling_collection(self, row, row_number=None):
-        supplier = (
-            row.get("Тип сбора/переработки_поставщик").split(",")
-            if row.get("Тип сбора/переработки_поставщик")
-            else []
-        )
-        processor = (
-            row.get("Тип сбора/переработки_переработчик").split(",")
-            if row.get("Тип сбора/переработки_переработчик")
-            else []
-        )
-        buyer = (
-            row.get("Тип сбора/переработки_покупатель").split(",")
-            if row.get("Тип сбора/переработки_покупатель")
-            else []
-        )
-        recycling_collection = {
-            ActivityType.SUPPLIER: [
-                RecyclingCollectionType.objects.get_or_create(
-                    name=name, activity=ActivityType.SUPPLIER
-                )[0]
-                for name in supplier
-            ],
-            ActivityType.PROCESSOR: [
-                RecyclingCollectionType.objects.get_or_create(
-                    name=name, activity=ActivityType.PROCESSOR
-                )[0]
-                for name in processor
-            ],
-            ActivityType.BUYER: [
-                RecyclingCollectionType.objects.get_or_create(
-                    name=name, activity=ActivityType.BUYER
-                )[0]
-                for name in buyer
-            ],
-        }
-
-        return recycling_collection
+        for row_number, row in enumerate(rows, start=1):
+            row_result = self.get_row_result_class()()
+            inn = str(row.get("inn") or "")
+            error = errors.get(row_number)
+            if error and error.skipped:
+                row_result.import_type = RowResult.IMPORT_TYPE_ERROR
+                row_result.errors.append(
+                    self.get_error_result_class()(error.message, row=row)
+                )
+            else:
+                row_result.import_type = (
+                    RowResult.IMPORT_TYPE_UPDATE
+                    if inn in existing_inns
+                    else RowResult.IMPORT_TYPE_NEW
+                )
+                existing_inns.add(inn)
+                row_result.diff = [inn, row.get("Название компании")]
+                row_result.add_instance_info(companies.get(inn))
+            result.increment_row_result_total(row_result)
+            result.append_row_result(row_result)
+        return result
 
 
 class AssignManagerForm(forms.Form):
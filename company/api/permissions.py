@@ -0,0 +1,40 @@
+from rest_framework import permissions
+
+from company.models import Company
+from user.models import UserRole
+
+
+class CompanyStaffPermission(permissions.BasePermission):
+    """
+    Доступ к сотрудникам компании (id компании в query-параметре "id"):
+    владелец, пользователь компании (кроме отстраненных) или сотрудник
+    ВторПрайс
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        if user.is_anonymous:
+            return False
+        if user.role in (
+            UserRole.SUPER_ADMIN,
+            UserRole.ADMIN,
+            UserRole.MANAGER,
+        ):
+            return True
+        try:
+            company_id = int(request.query_params.get("id"))
+        except (TypeError, ValueError):
+            return False
+        company = (
+            Company.objects.filter(pk=company_id)
+            .values("owner_id", "suspend_staff")
+            .first()
+        )
+        if company is None:
+            return False
+        if company["owner_id"] == user.id:
+            return True
+        return (
+            user.company_id == company_id
+            and user.id not in company["suspend_staff"]
+        )
@@ -76,6 +76,16 @@ class CitySerializer(NonNullDynamicFieldsModelSerializer):
         model = City
 
 
+class CompactCompanySerializer(NonNullDynamicFieldsModelSerializer):
+    """Краткое представление компании для вложенного использования"""
+
+    city = serializers.CharField(source="city.name", default=None)
+
+    class Meta:
+        model = Company
+        fields = ("id", "name", "inn", "image", "status", "city", "with_nds")
+
+
 class CompanyDocumentSerializer(NonNullDynamicFieldsModelSerializer):
     class Meta:
         model = CompanyDocument
@@ -496,7 +506,7 @@ class CompanySerializer(NonNullDynamicFieldsModelSerializer):
     reviews_count = serializers.SerializerMethodField(read_only=True)
     deals_count = serializers.SerializerMethodField(read_only=True)
     average_review_rate = serializers.SerializerMethodField(read_only=True)
-    reviews = serializers.SerializerMethodField()
+    # Отзывы отдаются постранично: /companies/{id}/reviews/
     deals_by_recyclable_for_offers = serializers.IntegerField(read_only=True)
     last_deal_date = serializers.CharField(read_only=True)
     buy_apps_by_recyclable_for_offers = serializers.IntegerField(read_only=True)
@@ -512,11 +522,6 @@ class CompanySerializer(NonNullDynamicFieldsModelSerializer):
     def get_total_applications_count(self, obj):
         return obj.recyclables_applications.count()
 
-    def get_reviews(self, instance):
-        from exchange.api.serializers import DealReviewSerializer
-
-        return DealReviewSerializer(instance.review_set, many=True).data
-
     def get_reviews_count(self, instance: Company):
         return instance.review_set.count()
 
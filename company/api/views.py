@@ -3,9 +3,11 @@ import os
 from itertools import chain
 
 import django_filters
+from django.contrib.contenttypes.models import ContentType
 from django.db import models
 from django.db.models import Count, Q
 from django.forms import model_to_dict
+from django.http import Http404
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
 from djangorestframework_camel_case.parser import (
     CamelCaseFormParser,
@@ -24,7 +26,7 @@ from rest_framework.response import Response
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.viewsets import GenericViewSet
 from rest_framework_nested.viewsets import NestedViewSetMixin
-from common.filters import FavoriteFilterBackend
+from common.filters import FavoriteFilterBackend, DistanceFilterBackend
 from common.permissions import IsOwner
 from common.subscribe_services.create_payment import create_payment
 from common.subscribe_services.payment_acceptance import payment_acceptance
@@ -81,9 +83,23 @@ from company.models import (
     Subscribe, SubscribesCompanies, EquipmentProposal, District
 )
 from company.services.company_data.get_data import get_companies
+from company.services.facets import get_company_facets
+from company.services.profile_cache import (
+    get_cached_company_profile,
+    set_cached_company_profile,
+)
 from exchange.api.serializers import DealReviewSerializer
 from exchange.models import Review, RecyclablesApplication, RecyclablesDeal, DealStatus, UrgencyType, ApplicationStatus
-from user.models import UserRole
+from user.models import UserRole, Favorite
+
+
+FACETS_PARAMETER = api.Parameter(
+    "facets",
+    api.IN_QUERY,
+    type=api.TYPE_BOOLEAN,
+    required=False,
+    description="Добавить в ответ количество компаний по значениям фильтров",
+)
 
 
 class CompanyViewSet(
@@ -119,6 +135,7 @@ class CompanyViewSet(
         filters.OrderingFilter,
         DjangoFilterBackend,
         FavoriteFilterBackend,
+        DistanceFilterBackend,
     )
 
     search_fields = ("name", "inn")
@@ -159,6 +176,42 @@ class CompanyViewSet(
 
         return Response(serializer.data)
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Профиль компании собирается из множества связанных таблиц, поэтому
+        кешируется целиком. is_favorite зависит от пользователя и
+        вычисляется на каждый запрос.
+        """
+        try:
+            company_id = int(kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+
+        # Фильтрация queryset и права на объект проверяются и для
+        # профиля из кеша (без prefetch связанных таблиц)
+        instance = get_object_or_404(
+            self.filter_queryset(self.get_queryset()).prefetch_related(None),
+            **{self.lookup_field: company_id},
+        )
+        self.check_object_permissions(request, instance)
+
+        data = get_cached_company_profile(company_id)
+        if data is None:
+            instance = self.get_object()
+            data = dict(self.get_serializer(instance).data)
+            set_cached_company_profile(company_id, data)
+            return Response(data)
+
+        is_favorite = (
+            not request.user.is_anonymous
+            and Favorite.objects.filter(
+                user=request.user,
+                content_type=ContentType.objects.get_for_model(Company),
+                object_id=company_id,
+            ).exists()
+        )
+        return Response({**data, "is_favorite": is_favorite})
+
     def get_queryset(self):
         qs = super().get_queryset()
         if (self.request.query_params.get('activity_types')):
@@ -196,6 +249,7 @@ class CompanyViewSet(
                 api.IN_QUERY,
                 type=api.TYPE_BOOLEAN,
             ),
+            FACETS_PARAMETER,
         ],
     )
     def list(self, request, *args, **kwargs):
@@ -218,7 +272,9 @@ class CompanyViewSet(
                 serializer = NonExistCompanySerializer(page, many=True)
             else:
                 serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return self.get_paginated_response_with_facets(
+                queryset, serializer.data
+            )
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
@@ -331,20 +387,20 @@ class CompanyViewSet(
     def nds_tax(self, request, *args, **kwargs):
         return Response(get_nds_tax(), status=status.HTTP_200_OK)
 
+    def get_paginated_response_with_facets(self, queryset, data):
+        """Adds facet counts of the filtered queryset when ?facets=true"""
+        response = self.get_paginated_response(data)
+        if str2bool(
+            self.request.query_params.get("facets", "false")
+        ) and not isinstance(queryset, list):
+            response.data["facets"] = get_company_facets(queryset).dict()
+        return response
+
+    @swagger_auto_schema(manual_parameters=[FACETS_PARAMETER])
     @action(methods=["GET"], detail=False)
     def companies_with_applications_for_main_filter(self, request, *args, **kwargs):
-        filter_query = self.filter_queryset(self.get_queryset().select_related("city")
-                                            .prefetch_related(
-            "documents",
-            "recyclables",
-            "contacts",
-            "activity_types",
-            "review_set",
-            "city__region",
-            "city__region__district",
-        )
-                                            .annotate(recyclables_count=Count("recyclables"))
-                                            .annotate(monthly_volume=models.Sum("recyclables__monthly_volume")))
+        # get_queryset() уже содержит select_related/prefetch_related/annotate
+        filter_query = self.filter_queryset(self.get_queryset())
         filter_query = self.query_filters(filter_query, request.query_params)
         # filter_query = filter_query.filter(company_recyclables__contains=recyclable)
 
@@ -393,7 +449,9 @@ class CompanyViewSet(
             serializer = NonExistCompanySerializer(page, many=True)
         else:
             serializer = CompaniesListForMainFilterSerializer(page, many=True)
-        return self.get_paginated_response(serializer.data)
+        return self.get_paginated_response_with_facets(
+            filter_query, serializer.data
+        )
 
 
 class CompanySettingsViewMixin:
@@ -666,8 +724,12 @@ class CompanyActivityTypeViewSet(
 class CompanyReviewsViewset(
     NestedViewSetMixin, GenericViewSet, generics.ListAPIView
 ):
+    """Отзывы о компании, постранично"""
+
     parent_lookup_kwargs = {"company_pk": "company__pk"}
-    queryset = Review.objects.get_queryset()
+    queryset = Review.objects.select_related(
+        "created_by__company__city", "created_by__my_company__city"
+    ).order_by("-created_at")
     serializer_class = DealReviewSerializer
 
 
@@ -711,13 +773,13 @@ class CityViewSet(
 
     # Определяет координаты города (широту и долготу) и изменяет экземпляр данного города в БД
     def retrieve(self, request, *args, **kwargs):
-        from services.yandex_geo import YandexGeocoderClient
-        from config.settings import YANDEX_GEOCODER_API_KEY
+        from services.yandex_geo import get_geocoder_client
 
-        geocoder_client = YandexGeocoderClient(YANDEX_GEOCODER_API_KEY)
         city = self.get_object()
         if not (city.latitude and city.longitude):
-            address_data = geocoder_client.get_coordinates_from_city(city)
+            address_data = get_geocoder_client().get_coordinates_from_city(
+                city
+            )
             city.latitude, city.longitude = (
                 address_data.latitude,
                 address_data.longitude,
@@ -0,0 +1,100 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from company.api.serializers import CompanySerializer
+from company.api.views import CompanyReviewsViewset, CompanyViewSet
+from company.models import Company
+from company.services.profile_cache import invalidate_company_profile
+from user.api.serializers import UserSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Размер ответа и количество запросов к БД для профиля компании: "
+        "прежний профиль с вложенными отзывами, профиль без кеша и из кеша, "
+        "первая страница отзывов"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("company_id", type=int)
+
+    def handle(self, *args, **options):
+        company_id = options["company_id"]
+        if not Company.objects.filter(pk=company_id).exists():
+            raise CommandError(f"Компания {company_id} не найдена")
+
+        factory = APIRequestFactory()
+        retrieve = CompanyViewSet.as_view({"get": "retrieve"})
+        reviews = CompanyReviewsViewset.as_view({"get": "list"})
+
+        self._report(
+            "legacy profile", lambda: self._legacy_profile(company_id)
+        )
+
+        invalidate_company_profile(company_id)
+        self._report(
+            "profile (cold cache)",
+            lambda: self._render(
+                retrieve(
+                    factory.get(f"/api/companies/{company_id}/"), pk=company_id
+                )
+            ),
+        )
+        self._report(
+            "profile (warm cache)",
+            lambda: self._render(
+                retrieve(
+                    factory.get(f"/api/companies/{company_id}/"), pk=company_id
+                )
+            ),
+        )
+        self._report(
+            "reviews page",
+            lambda: self._render(
+                reviews(
+                    factory.get(f"/api/companies/{company_id}/reviews/"),
+                    company_pk=company_id,
+                )
+            ),
+        )
+
+    def _report(self, name, func):
+        with CaptureQueriesContext(connection) as queries:
+            size = func()
+        self.stdout.write(
+            f"{name:<22} queries: {len(queries):>5}  bytes: {size:>10}"
+        )
+
+    @staticmethod
+    def _render(response) -> int:
+        response.render()
+        return len(response.content)
+
+    @staticmethod
+    def _legacy_profile(company_id) -> int:
+        """Профиль в прежнем виде: все отзывы с полным профилем автора"""
+        company = CompanyViewSet.queryset.get(pk=company_id)
+        data = dict(CompanySerializer(company).data)
+        data["reviews"] = [
+            {
+                "rate": review.rate,
+                "created_at": review.created_at,
+                "comment": review.comment,
+                "created_by": UserSerializer(
+                    review.created_by,
+                    fields=(
+                        "id",
+                        "first_name",
+                        "last_name",
+                        "middle_name",
+                        "company",
+                    ),
+                ).data,
+            }
+            for review in company.review_set.all()
+        ]
+        return len(json.dumps(data, default=str))
@@ -0,0 +1,111 @@
+import time
+from decimal import Decimal
+
+import requests
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from common.HTTPClient import exceptions
+from company.models import City
+from services.yandex_geo import get_geocoder_client
+
+# Широты городов России. Если координаты города были сохранены в обратном
+# порядке, его "долгота" - на самом деле широта и лежит в этих пределах
+RUSSIA_LATITUDES = (41, 82)
+
+# Допустимое расхождение при сравнении с ответом геокодера, градусы
+COORDINATES_TOLERANCE = Decimal("0.0001")
+
+GEOCODER_ERRORS = (
+    exceptions.RouterError,
+    exceptions.Timeout,
+    exceptions.JSONParseError,
+    requests.RequestException,
+    KeyError,
+    IndexError,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполнение координат городов через геокодер (с использованием "
+        "кеша ответов), чтобы расчет доставки не обращался к геокодеру"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=None, help="Не больше N городов"
+        )
+        parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.0,
+            help="Пауза между запросами к геокодеру, секунды",
+        )
+        parser.add_argument(
+            "--recheck",
+            action="store_true",
+            help=(
+                "Проверить города с координатами, которые могли быть "
+                "сохранены в обратном порядке (долгота на месте широты), "
+                "и исправить их"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if options["recheck"]:
+            cities = City.objects.filter(
+                latitude__isnull=False,
+                longitude__range=RUSSIA_LATITUDES,
+            )
+            process = self._recheck_city
+        else:
+            cities = City.objects.filter(
+                Q(latitude__isnull=True) | Q(longitude__isnull=True)
+            )
+            process = self._geocode_city
+        cities = cities.order_by("pk")
+        if options["limit"]:
+            cities = cities[: options["limit"]]
+
+        client = get_geocoder_client()
+        updated = failed = 0
+        for city in cities.iterator():
+            try:
+                updated += process(client, city)
+            except GEOCODER_ERRORS as e:
+                failed += 1
+                self.stderr.write(f"{city.pk} {city.name}: {e!r}")
+            if options["delay"]:
+                time.sleep(options["delay"])
+
+        if options["recheck"]:
+            message = f"Исправлены координаты городов: {updated}"
+        else:
+            message = f"Заполнены координаты городов: {updated}"
+        self.stdout.write(self.style.SUCCESS(f"{message}, ошибок: {failed}"))
+
+    @staticmethod
+    def _geocode_city(client, city) -> bool:
+        client.get_coordinates_from_city(city)
+        return True
+
+    @staticmethod
+    def _recheck_city(client, city) -> bool:
+        """
+        Меняет местами широту и долготу города, если геокодер подтверждает,
+        что они были сохранены в обратном порядке
+        """
+        address = client.geocode_city(city)
+        latitude = Decimal(str(address.latitude))
+        longitude = Decimal(str(address.longitude))
+        swapped = (
+            abs(city.latitude - longitude) <= COORDINATES_TOLERANCE
+            and abs(city.longitude - latitude) <= COORDINATES_TOLERANCE
+        )
+        if not swapped:
+            return False
+        City.objects.filter(pk=city.pk).update(
+            latitude=city.longitude, longitude=city.latitude
+        )
+        return True
@@ -0,0 +1,65 @@
+import os
+
+import tablib
+from django.core.management.base import BaseCommand, CommandError
+
+from company.services.company_import.importer import (
+    DEFAULT_CHUNK_SIZE,
+    CompanyBulkImporter,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Массовый импорт компаний из файла (xlsx/xls/csv) в формате "
+        "CompanyResource"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Путь к файлу импорта")
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Выполнить импорт и откатить транзакцию",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Количество строк в одной пачке",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        if not os.path.exists(path):
+            raise CommandError(f"Файл {path} не найден")
+
+        file_format = os.path.splitext(path)[1].lstrip(".").lower()
+        mode = "r" if file_format == "csv" else "rb"
+        with open(path, mode) as f:
+            dataset = tablib.Dataset().load(f.read(), format=file_format)
+
+        importer = CompanyBulkImporter(
+            dataset.dict,
+            chunk_size=options["chunk_size"],
+            dry_run=options["dry_run"],
+            progress=self._print_progress,
+        )
+        report = importer.run()
+
+        for error in report.errors:
+            self.stderr.write(f"Строка {error.row_number}: {error.message}")
+
+        summary = report.dict(exclude={"errors"})
+        for key, value in summary.items():
+            self.stdout.write(f"{key}: {value}")
+
+        if report.dry_run:
+            self.stdout.write(
+                self.style.WARNING("Dry run: изменения откачены")
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS("Импорт завершен"))
+
+    def _print_progress(self, processed, total):
+        self.stdout.write(f"Обработано {processed}/{total}")
@@ -0,0 +1,34 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:04
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+from django.contrib.postgres.operations import CreateExtension
+from django.db import migrations, models
+
+import common.geo
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0006_company_suspend_staff"),
+    ]
+
+    operations = [
+        CreateExtension("cube"),
+        CreateExtension("earthdistance"),
+        migrations.AddIndex(
+            model_name="company",
+            index=django.contrib.postgres.indexes.GistIndex(
+                common.geo.LlToEarth(
+                    django.db.models.functions.comparison.Cast(
+                        models.F("latitude"), models.FloatField()
+                    ),
+                    django.db.models.functions.comparison.Cast(
+                        models.F("longitude"), models.FloatField()
+                    ),
+                ),
+                name="companies_location_gist",
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0007_location_gist_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GeocodeCache",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "query",
+                    models.CharField(max_length=1024, verbose_name="Запрос"),
+                ),
+                (
+                    "results",
+                    models.PositiveSmallIntegerField(
+                        verbose_name="Количество результатов"
+                    ),
+                ),
+                ("response", models.JSONField(verbose_name="Ответ геокодера")),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Дата обновления"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ответ геокодера",
+                "verbose_name_plural": "Кеш геокодера",
+                "db_table": "geocode_cache",
+                "unique_together": {("query", "results")},
+            },
+        ),
+    ]
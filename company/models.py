@@ -1,5 +1,6 @@
 import uuid
 
+from bulk_update_or_create import BulkUpdateOrCreateQuerySet
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
 from django.contrib.postgres.fields import ArrayField
@@ -8,6 +9,7 @@ from django.urls import reverse
 from model_utils import FieldTracker
 from phonenumber_field.modelfields import PhoneNumberField
 
+from common.geo import GeoQuerySetMixin, earth_location_index
 from common.model_fields import (
     get_field_from_choices,
     AmountField,
@@ -71,6 +73,21 @@ class City(BaseNameModel):
         db_table = "cities"
 
 
+class GeocodeCache(models.Model):
+    """Ответы геокодера по нормализованному запросу (см. services.yandex_geo)"""
+
+    query = models.CharField("Запрос", max_length=1024)
+    results = models.PositiveSmallIntegerField("Количество результатов")
+    response = models.JSONField("Ответ геокодера")
+    updated_at = models.DateTimeField("Дата обновления", auto_now=True)
+
+    class Meta:
+        verbose_name = "Ответ геокодера"
+        verbose_name_plural = "Кеш геокодера"
+        db_table = "geocode_cache"
+        unique_together = [["query", "results"]]
+
+
 class CompanyStatus(models.IntegerChoices):
     NOT_VERIFIED = 1, "Не проверенная"
     VERIFIED = 2, "Проверенная"
@@ -78,6 +95,12 @@ class CompanyStatus(models.IntegerChoices):
     NOT_RELIABLE = 4, "Ненадёжная"
 
 
+class CompanyQuerySet(
+    GeoQuerySetMixin, BulkUpdateOrCreateQuerySet, models.QuerySet
+):
+    pass
+
+
 class Company(AddressFieldsModelMixin, BaseNameDescModel):
     # Main
     image = models.ImageField(
@@ -150,10 +173,15 @@ class Company(AddressFieldsModelMixin, BaseNameDescModel):
     #    blank=True,
     # )
 
+    objects = CompanyQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Компания"
         verbose_name_plural = "Компании"
         db_table = "companies"
+        indexes = [
+            earth_location_index("companies_location_gist"),
+        ]
 
 
 class CompanyDocumentType(models.IntegerChoices):
@@ -0,0 +1,86 @@
+"""
+Сброс кеша профиля компании при изменении данных, которые в него входят
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from company.models import (
+    Company,
+    CompanyActivityType,
+    CompanyAdditionalContact,
+    CompanyDocument,
+    CompanyRecyclables,
+)
+from company.services.profile_cache import invalidate_company_profile
+from exchange.models import (
+    EquipmentDeal,
+    RecyclablesApplication,
+    RecyclablesDeal,
+    Review,
+)
+
+User = get_user_model()
+
+COMPANY_RELATED_MODELS = (
+    CompanyDocument,
+    CompanyRecyclables,
+    CompanyAdditionalContact,
+    CompanyActivityType,
+    RecyclablesApplication,
+    Review,
+)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def handle_company_change(sender, instance: Company, **kwargs):
+    invalidate_company_profile(instance.pk)
+
+
+def handle_company_related_change(sender, instance, **kwargs):
+    invalidate_company_profile(instance.company_id)
+
+
+for model in COMPANY_RELATED_MODELS:
+    post_save.connect(handle_company_related_change, sender=model)
+    post_delete.connect(handle_company_related_change, sender=model)
+
+
+@receiver(m2m_changed, sender=CompanyActivityType.rec_col_types.through)
+@receiver(m2m_changed, sender=CompanyActivityType.advantages.through)
+def handle_activity_type_m2m_change(sender, instance, action, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if isinstance(instance, CompanyActivityType):
+        invalidate_company_profile(instance.company_id)
+
+
+# Поля сделки, от которых зависит профиль (deals_count, has_failed_deals,
+# объемы сделок, дата последней сделки)
+PROFILE_DEAL_FIELDS = {"status", "weight", "supplier_company", "buyer_company"}
+
+
+@receiver(post_save, sender=RecyclablesDeal)
+@receiver(post_save, sender=EquipmentDeal)
+@receiver(post_delete, sender=RecyclablesDeal)
+@receiver(post_delete, sender=EquipmentDeal)
+def handle_deal_change(sender, instance, update_fields=None, **kwargs):
+    # Сохранения с update_fields, не затрагивающие профиль, пропускаем;
+    # остальные (в том числе смена статуса через save()) сбрасывают кеш
+    if update_fields and not PROFILE_DEAL_FIELDS & set(update_fields):
+        return
+    invalidate_company_profile(
+        instance.supplier_company_id, instance.buyer_company_id
+    )
+
+
+@receiver(post_save, sender=User)
+def handle_user_change(sender, instance: User, **kwargs):
+    # Владелец и менеджер входят в профиль компании
+    invalidate_company_profile(
+        *Company.objects.filter(
+            Q(owner=instance) | Q(manager=instance)
+        ).values_list("pk", flat=True)
+    )
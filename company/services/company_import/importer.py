@@ -0,0 +1,612 @@
+"""
+Двухфазный массовый импорт компаний из файла выгрузки.
+
+1. Предварительный проход по всем строкам: собираем справочные сущности
+   (города, категории, вторсырье, преимущества, типы сбора, менеджеров)
+   и создаем недостающие пачкой, раскладывая их по словарям в памяти.
+2. Построчные данные (компании, вторсырье компаний, заявки, виды
+   деятельности и их M2M) пишутся чанками через bulk_create/bulk_update.
+
+Весь импорт выполняется в одной транзакции, в режиме dry_run она
+откатывается, а отчет содержит то, что было бы создано.
+"""
+import logging
+import re
+from decimal import Decimal
+from typing import Callable, Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.functions import Lower
+from phonenumber_field.phonenumber import to_python
+
+from company.models import (
+    ActivityType,
+    City,
+    Company,
+    CompanyActivityType,
+    CompanyAdvantage,
+    CompanyRecyclables,
+    CompanyStatus,
+    RecyclingCollectionType,
+)
+from company.services.company_import.models import (
+    ImportReport,
+    ImportRow,
+    ImportRowError,
+)
+from exchange.models import (
+    ApplicationStatus,
+    DealType,
+    RecyclablesApplication,
+    UrgencyType,
+)
+from product.models import Recyclables, RecyclablesCategory
+
+log = logging.getLogger(__name__)
+
+User = get_user_model()
+
+DEFAULT_CHUNK_SIZE = 500
+
+COORDINATES_PATTERN = re.compile(
+    r"\(([-+]?[0-9]*\.?[0-9]+), ([-+]?[0-9]*\.?[0-9]+)\)"
+)
+
+ADVANTAGES_COLUMNS = {
+    ActivityType.SUPPLIER: "Преимущества_поставщик",
+    ActivityType.PROCESSOR: "Преимущества__переработчик",
+    ActivityType.BUYER: "Преимущества_покупатель",
+}
+
+COLLECTION_TYPES_COLUMNS = {
+    ActivityType.SUPPLIER: "Тип сбора/переработки_поставщик",
+    ActivityType.PROCESSOR: "Тип сбора/переработки_переработчик",
+    ActivityType.BUYER: "Тип сбора/переработки_покупатель",
+}
+
+ProgressCallback = Callable[[int, int], None]
+
+
+def parse_phone_number(phone_number: str) -> str:
+    if phone_number.startswith("8"):
+        phone_number = "+7" + phone_number[1:]
+    if phone_number.startswith("7"):
+        phone_number = "+" + phone_number
+    if phone_number.startswith("9"):
+        phone_number = "+7" + phone_number
+
+    return phone_number
+
+
+def parse_price(price: str) -> float:
+    if price is None or price == "None":
+        return 0
+    price = (
+        price.replace("руб.", "").replace(" ", "").replace(",", ".").strip()
+    )
+    return float(price)
+
+
+def parse_coordinates(address: str):
+    matched = COORDINATES_PATTERN.search(address)
+    if not matched:
+        return None, None
+    latitude, longitude = float(matched.group(1)), float(matched.group(2))
+    return latitude, longitude
+
+
+def _split_names(value) -> list[str]:
+    return value.split(",") if value else []
+
+
+def _phone_key(phone: Optional[str]) -> Optional[str]:
+    phone_number = to_python(phone)
+    if not phone_number or not phone_number.is_valid():
+        return None
+    return phone_number.as_e164
+
+
+def _amount(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(Decimal("0.01"))
+
+
+def parse_row(row: dict, row_number: int) -> ImportRow:
+    """Приводит строку файла к ImportRow, повторяя правила CompanyResource"""
+
+    address = row.get("Адрес Компании") or ""
+    latitude, longitude = None, None
+    if address and address != "None":
+        latitude, longitude = parse_coordinates(address)
+
+    monthly_volume = row.get("Ежемесячный объём")
+    price = str(row.get("Стоимость продукции в рублях за КГ с НДС")) or "0"
+
+    return ImportRow(
+        row_number=row_number,
+        inn=str(row.get("inn") or ""),
+        name=str(row.get("Название компании") or ""),
+        phone=parse_phone_number(str(row.get("Рабочий телефон"))),
+        city_name=row.get("Город") or None,
+        address=address,
+        latitude=latitude,
+        longitude=longitude,
+        manager_phone=parse_phone_number(str(row.get("Телефон менеджера"))),
+        with_nds=str(row.get("НДС", "0")) == "1",
+        deal_type=(
+            DealType.BUY if str(row.get("Покупка")) == "1" else DealType.SELL
+        ),
+        category_name=row.get("Категория") or None,
+        subcategory_name=row.get("Подкатегория") or None,
+        recyclables_name=row.get("Вид сырья") or None,
+        monthly_volume=float(monthly_volume or 0),
+        price=parse_price(price),
+        advantages={
+            activity: _split_names(row.get(column))
+            for activity, column in ADVANTAGES_COLUMNS.items()
+        },
+        collection_types={
+            activity: _split_names(row.get(column))
+            for activity, column in COLLECTION_TYPES_COLUMNS.items()
+        },
+    )
+
+
+class CompanyBulkImporter:
+    """
+    Массовый импорт компаний.
+
+    :param rows: строки файла (dict колонка -> значение), например Dataset.dict
+    :param chunk_size: размер пачки для bulk-операций
+    :param dry_run: выполнить импорт и откатить транзакцию
+    :param progress: callback(processed_rows, total_rows), вызывается после
+        каждой пачки
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[dict],
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        dry_run: bool = False,
+        progress: Optional[ProgressCallback] = None,
+    ):
+        self.raw_rows = list(rows)
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.progress = progress
+        self.report = ImportReport(
+            total_rows=len(self.raw_rows), dry_run=dry_run
+        )
+
+        self.cities: dict[str, City] = {}
+        self.categories: dict[str, RecyclablesCategory] = {}
+        self.subcategories: dict[tuple, RecyclablesCategory] = {}
+        self.recyclables: dict[tuple, Recyclables] = {}
+        self.advantages: dict[tuple, CompanyAdvantage] = {}
+        self.collection_types: dict[tuple, RecyclingCollectionType] = {}
+        self.managers: dict[str, User] = {}
+
+    def run(self) -> ImportReport:
+        rows = self._parse_rows()
+
+        with transaction.atomic():
+            self._create_references(rows)
+
+            for start in range(0, len(rows), self.chunk_size):
+                chunk = rows[start : start + self.chunk_size]
+                self._import_chunk(chunk)
+                self.report.processed_rows += len(chunk)
+                if self.progress:
+                    self.progress(
+                        self.report.processed_rows, self.report.total_rows
+                    )
+
+            if self.dry_run:
+                transaction.set_rollback(True)
+
+        return self.report
+
+    def _add_error(self, row_number: int, message: str, skipped=True):
+        log.warning(f"Company import row {row_number}: {message}")
+        self.report.errors.append(
+            ImportRowError(
+                row_number=row_number, message=message, skipped=skipped
+            )
+        )
+
+    def _parse_rows(self) -> list[ImportRow]:
+        rows = []
+        for row_number, raw_row in enumerate(self.raw_rows, start=1):
+            try:
+                row = parse_row(raw_row, row_number)
+            except (TypeError, ValueError) as e:
+                self._add_error(row_number, str(e))
+                continue
+
+            if not row.inn or not row.name:
+                self._add_error(row_number, "Не указан ИНН или название")
+                continue
+            if row.recyclables_name and not (
+                row.category_name and row.subcategory_name
+            ):
+                self._add_error(
+                    row_number,
+                    "Не указана категория или подкатегория сырья",
+                    skipped=False,
+                )
+                row.recyclables_name = None
+            rows.append(row)
+        return rows
+
+    # Phase 1: reference entities
+
+    def _create_references(self, rows: list[ImportRow]):
+        self._create_cities(rows)
+        self._create_categories(rows)
+        self._create_recyclables(rows)
+        (
+            self.advantages,
+            self.report.advantages_created,
+        ) = self._create_activity_names(CompanyAdvantage, rows, "advantages")
+        (
+            self.collection_types,
+            self.report.collection_types_created,
+        ) = self._create_activity_names(
+            RecyclingCollectionType, rows, "collection_types"
+        )
+        self._load_managers(rows)
+
+    def _create_cities(self, rows: list[ImportRow]):
+        names = {}
+        for row in rows:
+            if row.city_name:
+                names.setdefault(row.city_name.lower(), row.city_name)
+        if not names:
+            return
+
+        existing = (
+            City.objects.annotate(lower_name=Lower("name"))
+            .filter(lower_name__in=names.keys())
+            .order_by("-id")
+        )
+        # order_by("-id") - при дублях остается первый город, как в .first()
+        self.cities = {city.lower_name: city for city in existing}
+
+        to_create = [
+            City(name=name)
+            for key, name in names.items()
+            if key not in self.cities
+        ]
+        for city in City.objects.bulk_create(to_create):
+            self.cities[city.name.lower()] = city
+        self.report.cities_created = len(to_create)
+
+    def _create_categories(self, rows: list[ImportRow]):
+        pairs = {
+            (row.category_name, row.subcategory_name)
+            for row in rows
+            if row.recyclables_name
+        }
+        if not pairs:
+            return
+
+        # RecyclablesCategory - MPTT-дерево, поэтому новые узлы создаются
+        # через save(), чтобы пересчитались lft/rght. Категорий немного.
+        parent_names = {parent for parent, _ in pairs}
+        for category in RecyclablesCategory.objects.filter(
+            name__in=parent_names
+        ).order_by("-id"):
+            self.categories[category.name] = category
+        for name in parent_names - self.categories.keys():
+            self.categories[name] = RecyclablesCategory.objects.create(
+                name=name
+            )
+            self.report.categories_created += 1
+
+        for category in RecyclablesCategory.objects.filter(
+            name__in={sub for _, sub in pairs},
+            parent__in=self.categories.values(),
+        ).order_by("-id"):
+            self.subcategories[(category.name, category.parent_id)] = category
+        for parent_name, name in pairs:
+            parent = self.categories[parent_name]
+            if (name, parent.pk) in self.subcategories:
+                continue
+            self.subcategories[
+                (name, parent.pk)
+            ] = RecyclablesCategory.objects.create(name=name, parent=parent)
+            self.report.categories_created += 1
+
+    def _get_subcategory(self, row: ImportRow) -> RecyclablesCategory:
+        parent = self.categories[row.category_name]
+        return self.subcategories[(row.subcategory_name, parent.pk)]
+
+    def _create_recyclables(self, rows: list[ImportRow]):
+        keys = {
+            (row.recyclables_name, self._get_subcategory(row).pk)
+            for row in rows
+            if row.recyclables_name
+        }
+        if not keys:
+            return
+
+        existing = Recyclables.objects.filter(
+            name__in={name for name, _ in keys},
+            category_id__in={category_id for _, category_id in keys},
+        ).order_by("-id")
+        self.recyclables = {
+            (recyclables.name, recyclables.category_id): recyclables
+            for recyclables in existing
+        }
+
+        to_create = [
+            Recyclables(name=name, category_id=category_id)
+            for name, category_id in keys
+            if (name, category_id) not in self.recyclables
+        ]
+        for recyclables in Recyclables.objects.bulk_create(to_create):
+            self.recyclables[
+                (recyclables.name, recyclables.category_id)
+            ] = recyclables
+        self.report.recyclables_created = len(to_create)
+
+    def _create_activity_names(self, model, rows: list[ImportRow], attr):
+        """
+        Справочники вида (name, activity): преимущества и типы сбора.
+        Возвращает словарь (name, activity) -> объект и число созданных.
+        """
+
+        keys = {
+            (name, activity)
+            for row in rows
+            for activity, names in getattr(row, attr).items()
+            for name in names
+        }
+        if not keys:
+            return {}, 0
+
+        lookup = {
+            (obj.name, obj.activity): obj
+            for obj in model.objects.filter(
+                name__in={name for name, _ in keys}
+            )
+        }
+        to_create = [
+            model(name=name, activity=activity)
+            for name, activity in keys
+            if (name, activity) not in lookup
+        ]
+        for obj in model.objects.bulk_create(to_create):
+            lookup[(obj.name, obj.activity)] = obj
+        return lookup, len(to_create)
+
+    def _load_managers(self, rows: list[ImportRow]):
+        phones = {_phone_key(row.manager_phone) for row in rows} - {None}
+        if not phones:
+            return
+        for user in User.objects.filter(phone__in=phones).order_by("-id"):
+            self.managers[user.phone.as_e164] = user
+
+    # Phase 2: per-company data
+
+    def _import_chunk(self, chunk: list[ImportRow]):
+        companies = self._upsert_companies(chunk)
+        self._create_company_recyclables(chunk, companies)
+        self._create_applications(chunk, companies)
+        self._set_activity_types(chunk, companies)
+
+    def _upsert_companies(self, chunk: list[ImportRow]) -> dict[str, Company]:
+        # При повторе ИНН побеждает последняя строка, как при построчном импорте
+        last_rows = {row.inn: row for row in chunk}
+        existing = Company.objects.in_bulk(last_rows.keys(), field_name="inn")
+
+        to_create, to_update = [], []
+        for inn, row in last_rows.items():
+            company = existing.get(inn) or Company(inn=inn)
+            company.name = row.name
+            company.phone = row.phone
+            company.city = (
+                self.cities.get(row.city_name.lower())
+                if row.city_name
+                else None
+            )
+            company.address = row.address
+            company.latitude = row.latitude
+            company.longitude = row.longitude
+            company.manager = self.managers.get(_phone_key(row.manager_phone))
+            company.status = CompanyStatus.VERIFIED
+            (to_update if company.pk else to_create).append(company)
+
+        Company.objects.bulk_create(to_create, batch_size=self.chunk_size)
+        Company.objects.bulk_update(
+            to_update,
+            fields=(
+                "name",
+                "phone",
+                "city",
+                "address",
+                "latitude",
+                "longitude",
+                "manager",
+                "status",
+            ),
+            batch_size=self.chunk_size,
+        )
+        self.report.companies_created += len(to_create)
+        self.report.companies_updated += len(to_update)
+
+        return {company.inn: company for company in to_create + to_update}
+
+    def _row_recyclables(self, row: ImportRow) -> Optional[Recyclables]:
+        if not row.recyclables_name:
+            return None
+        subcategory = self._get_subcategory(row)
+        return self.recyclables[(row.recyclables_name, subcategory.pk)]
+
+    def _create_company_recyclables(
+        self, chunk: list[ImportRow], companies: dict[str, Company]
+    ):
+        existing = set(
+            CompanyRecyclables.objects.filter(
+                company__in=companies.values()
+            ).values_list(
+                "company_id",
+                "recyclables_id",
+                "monthly_volume",
+                "price",
+                "action",
+            )
+        )
+        to_create = []
+        for row in chunk:
+            recyclables = self._row_recyclables(row)
+            if not recyclables:
+                continue
+            company = companies[row.inn]
+            key = (
+                company.pk,
+                recyclables.pk,
+                row.monthly_volume,
+                _amount(row.price),
+                row.deal_type,
+            )
+            if key in existing:
+                continue
+            existing.add(key)
+            to_create.append(
+                CompanyRecyclables(
+                    company=company,
+                    recyclables=recyclables,
+                    monthly_volume=row.monthly_volume,
+                    price=row.price,
+                    action=row.deal_type,
+                )
+            )
+
+        CompanyRecyclables.objects.bulk_create(to_create)
+        self.report.company_recyclables_created += len(to_create)
+
+    def _create_applications(
+        self, chunk: list[ImportRow], companies: dict[str, Company]
+    ):
+        existing = set(
+            RecyclablesApplication.objects.filter(
+                company__in=companies.values(),
+                status=ApplicationStatus.PUBLISHED,
+                urgency_type=UrgencyType.SUPPLY_CONTRACT,
+            ).values_list(
+                "company_id",
+                "recyclables_id",
+                "deal_type",
+                "price",
+                "volume",
+                "with_nds",
+            )
+        )
+        to_create = []
+        for row in chunk:
+            recyclables = self._row_recyclables(row)
+            if not recyclables:
+                continue
+            company = companies[row.inn]
+            key = (
+                company.pk,
+                recyclables.pk,
+                row.deal_type,
+                _amount(row.price),
+                row.monthly_volume,
+                row.with_nds,
+            )
+            if key in existing:
+                continue
+            existing.add(key)
+            # bulk_create не вызывает save() и post_save, поэтому статус
+            # задается явно, а уведомления подписчикам не рассылаются
+            to_create.append(
+                RecyclablesApplication(
+                    company=company,
+                    recyclables=recyclables,
+                    status=ApplicationStatus.PUBLISHED,
+                    deal_type=row.deal_type,
+                    urgency_type=UrgencyType.SUPPLY_CONTRACT,
+                    price=row.price,
+                    volume=row.monthly_volume,
+                    with_nds=row.with_nds,
+                    longitude=company.longitude,
+                    latitude=company.latitude,
+                    city=company.city,
+                    address=(company.address or ""),
+                )
+            )
+
+        RecyclablesApplication.objects.bulk_create(to_create)
+        self.report.applications_created += len(to_create)
+
+    def _set_activity_types(
+        self, chunk: list[ImportRow], companies: dict[str, Company]
+    ):
+        last_rows = {row.inn: row for row in chunk}
+
+        activity_types = {
+            (activity_type.company_id, activity_type.activity): activity_type
+            for activity_type in CompanyActivityType.objects.filter(
+                company__in=companies.values()
+            ).order_by("-id")
+        }
+        to_create = [
+            CompanyActivityType(company=company, activity=activity)
+            for company in companies.values()
+            for activity in ActivityType.values
+            if (company.pk, activity) not in activity_types
+        ]
+        for activity_type in CompanyActivityType.objects.bulk_create(
+            to_create
+        ):
+            activity_types[
+                (activity_type.company_id, activity_type.activity)
+            ] = activity_type
+        self.report.activity_types_created += len(to_create)
+
+        # Аналог .set(): очищаем связи и создаем заново
+        rec_col_types_through = CompanyActivityType.rec_col_types.through
+        advantages_through = CompanyActivityType.advantages.through
+        activity_type_ids = [
+            activity_types[(company.pk, activity)].pk
+            for company in companies.values()
+            for activity in ActivityType.values
+        ]
+        rec_col_types_through.objects.filter(
+            companyactivitytype_id__in=activity_type_ids
+        ).delete()
+        advantages_through.objects.filter(
+            companyactivitytype_id__in=activity_type_ids
+        ).delete()
+
+        rec_col_types_links, advantages_links = {}, {}
+        for inn, row in last_rows.items():
+            company = companies[inn]
+            for activity in ActivityType.values:
+                activity_type_id = activity_types[(company.pk, activity)].pk
+                for name in row.collection_types.get(activity, []):
+                    collection_type = self.collection_types[(name, activity)]
+                    rec_col_types_links[
+                        (activity_type_id, collection_type.pk)
+                    ] = rec_col_types_through(
+                        companyactivitytype_id=activity_type_id,
+                        recyclingcollectiontype_id=collection_type.pk,
+                    )
+                for name in row.advantages.get(activity, []):
+                    advantage = self.advantages[(name, activity)]
+                    advantages_links[
+                        (activity_type_id, advantage.pk)
+                    ] = advantages_through(
+                        companyactivitytype_id=activity_type_id,
+                        companyadvantage_id=advantage.pk,
+                    )
+
+        rec_col_types_through.objects.bulk_create(
+            rec_col_types_links.values(), batch_size=self.chunk_size
+        )
+        advantages_through.objects.bulk_create(
+            advantages_links.values(), batch_size=self.chunk_size
+        )
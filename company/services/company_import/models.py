@@ -0,0 +1,57 @@
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    row_number: int
+    message: str
+    # Строка пропущена целиком, иначе импортирована частично
+    skipped: bool = True
+
+
+class ImportReport(BaseModel):
+    """Итоги массового импорта компаний"""
+
+    total_rows: int = 0
+    processed_rows: int = 0
+    dry_run: bool = False
+
+    cities_created: int = 0
+    categories_created: int = 0
+    recyclables_created: int = 0
+    advantages_created: int = 0
+    collection_types_created: int = 0
+
+    companies_created: int = 0
+    companies_updated: int = 0
+    company_recyclables_created: int = 0
+    applications_created: int = 0
+    activity_types_created: int = 0
+
+    errors: list[ImportRowError] = []
+
+
+class ImportRow(BaseModel):
+    """Разобранная строка файла импорта"""
+
+    row_number: int
+    inn: str
+    name: str
+    phone: str
+    city_name: str | None = None
+    address: str = ""
+    latitude: float | None = None
+    longitude: float | None = None
+
+    manager_phone: str | None = None
+    with_nds: bool = False
+    deal_type: int
+
+    category_name: str | None = None
+    subcategory_name: str | None = None
+    recyclables_name: str | None = None
+    monthly_volume: float = 0.0
+    price: float = 0.0
+
+    # activity -> названия преимуществ / типов сбора
+    advantages: dict[int, list[str]] = {}
+    collection_types: dict[int, list[str]] = {}
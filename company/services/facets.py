@@ -0,0 +1,121 @@
+"""
+Фасеты для страницы фильтрации компаний (/companies/main).
+
+Все счетчики считаются одним запросом с GROUP BY GROUPING SETS поверх
+уже отфильтрованного набора компаний. Ключи фасетов совпадают с
+query-параметрами фильтров, значения - со значениями этих параметров.
+"""
+from django.db import connection
+from django.db.models import QuerySet
+from pydantic import BaseModel, StrictBool
+
+from company.models import City, Company, CompanyActivityType
+from exchange.models import DealType, RecyclablesApplication, UrgencyType
+
+
+class FacetValue(BaseModel):
+    value: StrictBool | int
+    count: int
+
+
+class CompanyFacets(BaseModel):
+    status: list[FacetValue] = []
+    city__region: list[FacetValue] = []
+    activity_types__rec_col_types: list[FacetValue] = []
+    with_nds: list[FacetValue] = []
+    deal_type: list[FacetValue] = []
+    company_has_applications: list[FacetValue] = []
+
+
+# Колонки группировки: (выражение, фасет, значение фасета для булевых флагов)
+FACET_COLUMNS = (
+    ("c.status", "status", None),
+    ("city.region_id", "city__region", None),
+    ("rct.recyclingcollectiontype_id", "activity_types__rec_col_types", None),
+    ("c.with_nds", "with_nds", None),
+    ("apps.has_buy", "deal_type", DealType.BUY),
+    ("apps.has_sell", "deal_type", DealType.SELL),
+    (
+        "apps.has_ready_for_shipment",
+        "company_has_applications",
+        UrgencyType.READY_FOR_SHIPMENT,
+    ),
+    (
+        "apps.has_supply_contract",
+        "company_has_applications",
+        UrgencyType.SUPPLY_CONTRACT,
+    ),
+)
+
+FACETS_SQL = """
+SELECT {grouping_columns}, GROUPING({grouping_columns}) AS grouping_id,
+       COUNT(DISTINCT c.id)
+FROM {companies} c
+LEFT JOIN {cities} city ON city.id = c.city_id
+LEFT JOIN {activity_types} cat ON cat.company_id = c.id
+LEFT JOIN {rec_col_types} rct ON rct.companyactivitytype_id = cat.id
+CROSS JOIN LATERAL (
+    SELECT
+        COALESCE(bool_or(a.deal_type = %s), false) AS has_buy,
+        COALESCE(bool_or(a.deal_type = %s), false) AS has_sell,
+        COALESCE(bool_or(a.urgency_type = %s), false)
+            AS has_ready_for_shipment,
+        COALESCE(bool_or(a.urgency_type = %s), false)
+            AS has_supply_contract
+    FROM {applications} a
+    WHERE a.company_id = c.id
+) apps
+WHERE c.id IN ({filtered})
+GROUP BY GROUPING SETS ({grouping_sets})
+"""
+
+
+def get_company_facets(queryset: QuerySet) -> CompanyFacets:
+    filtered_sql, filtered_params = (
+        queryset.order_by().values("pk").query.sql_with_params()
+    )
+    columns = [column for column, _, _ in FACET_COLUMNS]
+    sql = FACETS_SQL.format(
+        grouping_columns=", ".join(columns),
+        grouping_sets=", ".join(f"({column})" for column in columns),
+        companies=Company._meta.db_table,
+        cities=City._meta.db_table,
+        activity_types=CompanyActivityType._meta.db_table,
+        rec_col_types=CompanyActivityType.rec_col_types.through._meta.db_table,
+        applications=RecyclablesApplication._meta.db_table,
+        filtered=filtered_sql,
+    )
+    params = (
+        int(DealType.BUY),
+        int(DealType.SELL),
+        int(UrgencyType.READY_FOR_SHIPMENT),
+        int(UrgencyType.SUPPLY_CONTRACT),
+        *filtered_params,
+    )
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    facets = CompanyFacets()
+    for row in rows:
+        *values, grouping_id, count = row
+        # В GROUPING бит колонки равен 0, если по ней идет группировка
+        index = next(
+            i
+            for i in range(len(columns))
+            if not grouping_id & (1 << (len(columns) - 1 - i))
+        )
+        _, facet, flag_value = FACET_COLUMNS[index]
+        value = values[index]
+        if value is None:
+            continue
+        if flag_value is not None:
+            if not value:
+                continue
+            value = int(flag_value)
+        getattr(facets, facet).append(FacetValue(value=value, count=count))
+
+    for facet in facets.__fields__:
+        getattr(facets, facet).sort(key=lambda item: -item.count)
+    return facets
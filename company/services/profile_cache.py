@@ -0,0 +1,33 @@
+"""
+Кеш собранного профиля компании (CompanySerializer для CompanyViewSet.retrieve).
+Сбрасывается обработчиками из company/receivers.py при изменении данных,
+которые входят в профиль.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+
+def get_company_profile_cache_key(company_id) -> str:
+    return f"company_profile:{company_id}"
+
+
+def get_cached_company_profile(company_id):
+    return cache.get(get_company_profile_cache_key(company_id))
+
+
+def set_cached_company_profile(company_id, data: dict):
+    cache.set(
+        get_company_profile_cache_key(company_id),
+        data,
+        settings.COMPANY_PROFILE_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_company_profile(*company_ids):
+    cache.delete_many(
+        [
+            get_company_profile_cache_key(company_id)
+            for company_id in company_ids
+            if company_id
+        ]
+    )
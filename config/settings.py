@@ -294,7 +294,11 @@ DADATA_API_KEY = os.getenv(
 YANDEX_GEOCODER_API_KEY = os.getenv(
     "YANDEX_GEOCODER_API_KEY", "90bf0a8e-8e85-42c9-b8f6-b264cf884460"
 )
-YANDEX_GEOCODER_BASE_URL = "https://geocode-maps.yandex.ru"
+YANDEX_GEOCODER_BASE_URL = os.getenv(
+    "YANDEX_GEOCODER_BASE_URL", "https://geocode-maps.yandex.ru"
+)
+# Lifetime of the geocoder responses cache (company.GeocodeCache), seconds
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", 60 * 60 * 24 * 30))
 
 # Channels
 # https://channels.readthedocs.io/
@@ -338,6 +342,52 @@ READY_FOR_SHIPMENT_MAX_TOTAL_WEIGHT = os.getenv(
     "READY_FOR_SHIPMENT_MAX_TOTAL_WEIGHT", 24000.00
 )  # kg
 
+# Lifetime of the cached company profile (CompanyViewSet.retrieve), seconds
+COMPANY_PROFILE_CACHE_TIMEOUT = int(
+    os.getenv("COMPANY_PROFILE_CACHE_TIMEOUT", 600)
+)
+
+# Lifetime of the cached company names of chat message authors, seconds
+CHAT_COMPANY_SNAPSHOT_TIMEOUT = int(
+    os.getenv("CHAT_COMPANY_SNAPSHOT_TIMEOUT", 600)
+)
+
+# Lifetime of the cached websocket auth data (users, chat existence), seconds
+WS_AUTH_CACHE_TIMEOUT = int(os.getenv("WS_AUTH_CACHE_TIMEOUT", 60))
+
+# Batching of chat messages received over websocket
+# (chat.services.message_writer): max batch size and max delay, ms
+CHAT_WRITER_BATCH_SIZE = int(os.getenv("CHAT_WRITER_BATCH_SIZE", 50))
+CHAT_WRITER_FLUSH_INTERVAL = int(os.getenv("CHAT_WRITER_FLUSH_INTERVAL", 200))
+
+# Chat presence (chat.services.presence): heartbeat period of a websocket
+# connection and the time after which a silent connection is offline, seconds
+CHAT_PRESENCE_HEARTBEAT_INTERVAL = int(
+    os.getenv("CHAT_PRESENCE_HEARTBEAT_INTERVAL", 20)
+)
+CHAT_PRESENCE_TIMEOUT = int(os.getenv("CHAT_PRESENCE_TIMEOUT", 60))
+
+# Parse document_generator templates at startup (template_cache), 0 disables
+DOCUMENT_TEMPLATES_WARMUP = bool(int(os.getenv("DOCUMENT_TEMPLATES_WARMUP", 1)))
+
+# Lifetime of the cached unread counters (notifications, chats), seconds.
+# Counters are recalculated from the DB after expiry
+UNREAD_COUNTERS_TIMEOUT = int(os.getenv("UNREAD_COUNTERS_TIMEOUT", 60 * 60))
+
+# Worker threads for deferred signal receivers (common.dispatch),
+# 0 runs them in the request thread right after commit
+DEFERRED_SIGNALS_WORKERS = int(os.getenv("DEFERRED_SIGNALS_WORKERS", 4))
+
+# Retention of notifications (see purge_notifications command), days.
+# NOTIFICATION_UNREAD_RETENTION_DAYS=0 keeps unread notifications forever
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", 90))
+NOTIFICATION_BROADCAST_RETENTION_DAYS = int(
+    os.getenv("NOTIFICATION_BROADCAST_RETENTION_DAYS", 30)
+)
+NOTIFICATION_UNREAD_RETENTION_DAYS = int(
+    os.getenv("NOTIFICATION_UNREAD_RETENTION_DAYS", 365)
+)
+
 # Using because when we have two instances on same server we need to have different ports
 BASE_URL = os.getenv("BASE_URL", "http://212.67.15.102:8000")  # "http://localhost:8000")
 
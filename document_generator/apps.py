@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class DocumentGeneratorConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "document_generator"
+
+    def ready(self):
+        from django.conf import settings
+
+        if settings.DOCUMENT_TEMPLATES_WARMUP:
+            from document_generator.generators.template_cache import (
+                warm_templates,
+            )
+
+            warm_templates()
@@ -1,9 +1,10 @@
 import datetime
 import os
-from docx import Document
 from rest_framework import serializers
 
 from config import settings
+from document_generator.generators.placeholders import replace_placeholders
+from document_generator.generators.template_cache import load_template
 from finance.models import InvoicePayment
 from logistics.models import TransportApplication
 from exchange.models import RecyclablesDeal, EquipmentApplication
@@ -53,15 +54,9 @@ class BaseGenerator:
             os.makedirs(f"{settings.MEDIA_ROOT}/generated_storage")
 
     def replace_all_and_save(self):
-        for template_string in self.replacing_mapping.keys():
-            self.replace_string(
-                template_string, self.replacing_mapping[template_string]
-            )
-            # Замена строк документа на строки из БД
-            # Выдаёт ошибку при создании УПД --> разобраться!
-            self.replace_string_in_table(
-                template_string, self.replacing_mapping[template_string]
-            )
+        # Замена строк документа на строки из БД за один проход
+        # по параграфам и таблицам (см. placeholders.py)
+        replace_placeholders(self.document, self.replacing_mapping)
         return self.save()
 
     def save(self):
@@ -69,7 +64,10 @@ class BaseGenerator:
         return self.output_file_name
 
     def replace_string(self, string_to_replace, replace_to):
-        """Replaces given string to another in documents paragraph"""
+        """
+        Replaces given string to another in documents paragraph
+        (previous per-key implementation, kept for document_generator_benchmark)
+        """
         for p in self.document.paragraphs:
             if string_to_replace in p.text:
                 p.text = p.text.replace(string_to_replace, str(replace_to))
@@ -181,7 +179,7 @@ class UnloadingAgreement(ContractorWithDeliveryInfoMixin, BaseGenerator):
         self.output_file_name = f"generated_storage/deal_id_{self.transport_application.object_id}/Договор на отгрузку по заявке №{self.transport_application.id}.docx"
         self.replacing_mapping = self.build_replacing_mapping()
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/Copy of Доверенность на отгрузку.docx"
-        self.document = Document(self.input_template_file_path)
+        self.document = load_template(self.input_template_file_path)
 
     def build_replacing_mapping(self):
         # Добавил, НУЖНО ПРОВЕРЯТЬ
@@ -212,7 +210,7 @@ class Waybill(ContractorWithDeliveryInfoMixin, BaseGenerator):
             os.makedirs(f"{settings.MEDIA_ROOT}/generated_storage/deal_id_{self.transport_application.object_id}")
         self.output_file_name = f"generated_storage/deal_id_{self.transport_application.object_id}/ТТН по заявке №{self.transport_application.id}.docx"
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/trn-2021.docx"
-        self.document = Document(self.input_template_file_path)
+        self.document = load_template(self.input_template_file_path)
         self.replacing_mapping = self.build_replacing_mapping()
 
     def build_replacing_mapping(self):
@@ -243,7 +241,7 @@ class Invoice(ContractorWithDeliveryInfoMixin, BaseGenerator):
         super().__init__(transport_application)
         self.output_file_name = f"generated_storage/Счет-фактура по заявке №{self.transport_application.id}.docx"
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/Счет-фактура.docx"
-        self.document = Document(self.input_template_file_path)
+        self.document = load_template(self.input_template_file_path)
         self.replacing_mapping = self.build_replacing_mapping()
 
     def build_replacing_mapping(self):
@@ -281,7 +279,7 @@ class AgreementSpecification(BaseGenerator):
     def __init__(self, deal: RecyclablesDeal):
         super().__init__()
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/Договор_приложение_спецификация.docx"
-        self.document = Document(self.input_template_file_path)
+        self.document = load_template(self.input_template_file_path)
         self.deal = deal
 
         if not os.path.exists(f"{settings.MEDIA_ROOT}/generated_storage/deal_id_{deal.id}"):
@@ -394,7 +392,7 @@ class AgreementApplication(ContractorApplicationGeneratorMixin, BaseGenerator):
     def __init__(self, transport_application: TransportApplication):
         super().__init__(transport_application)
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/Договор-Заявка.docx"
-        self.document = Document(self.input_template_file_path)
+        self.document = load_template(self.input_template_file_path)
 
         if not os.path.exists(
                 f"{settings.MEDIA_ROOT}/generated_storage/deal_id_{self.transport_application.object_id}"):
@@ -459,7 +457,7 @@ class UniformTransferDocument(
             f"{settings.PROJECT_DIR}/document_generator/templates/УПД.docx"
         )
 
-        self.document = Document(self.input_template_file_path)
+        self.document = load_template(self.input_template_file_path)
         self.replacing_mapping = self.build_replacing_mapping()
         self.output_file_name = f"generated_storage/deal_id_{self.transport_application.object_id}/УПД по заявке № {self.transport_application.id}.docx"
 
@@ -506,7 +504,7 @@ class Act(BaseGenerator):
         self.input_template_file_path = (
             f"{settings.PROJECT_DIR}/document_generator/templates/Акт.docx"
         )
-        self.document = Document(self.input_template_file_path)
+        self.document = load_template(self.input_template_file_path)
         self.price_per_kg = 1
         self.replacing_mapping = self.build_replacing_mapping()
         name = self.company.name.replace('"', '')
@@ -546,7 +544,7 @@ class InvoiceDocument(AgreementSpecification, BaseGenerator):
             os.makedirs(f"{settings.MEDIA_ROOT}/generated_storage/deal_id_{self.invoice.deal.id}")
 
         self.input_template_file_path = f"{settings.PROJECT_DIR}/document_generator/templates/Счёт поставка.docx"
-        self.document = Document(self.input_template_file_path)
+        self.document = load_template(self.input_template_file_path)
         self.output_file_name = (
             f"generated_storage/deal_id_{self.invoice.deal.id}/Счёт поставка {self.invoice.deal.id}.docx"
             # f"generated_storage/Счёт поставка {invoice.id}.docx"
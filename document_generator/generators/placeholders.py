@@ -0,0 +1,79 @@
+"""
+Подстановка значений в шаблон docx за один проход.
+
+Все параграфы документа (включая таблицы, вложенные таблицы и надписи)
+обходятся один раз, в тексте параграфа одним регулярным выражением
+ищутся все ключи замены. Word часто разбивает "%placeholder%" на
+несколько run (проверка орфографии, правки), поэтому поиск идет по
+склеенному тексту всех w:t параграфа, а замена пишется в первый w:t
+совпадения, из остальных удаляются символы ключа. Форматирование run
+сохраняется.
+
+Ключи ищутся от самого длинного к короткому ("%date%" раньше "%date"),
+совпадения не перекрываются, а подставленные значения повторно не
+просматриваются.
+"""
+import re
+
+from docx.oxml.ns import qn
+
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+
+def compile_placeholders(mapping: dict) -> re.Pattern:
+    keys = sorted(mapping, key=len, reverse=True)
+    return re.compile("|".join(map(re.escape, keys)))
+
+
+def _replace_in_paragraph(paragraph, pattern: re.Pattern, values: dict) -> int:
+    nodes = list(paragraph.iter(qn("w:t")))
+    if not nodes:
+        return 0
+    texts = [node.text or "" for node in nodes]
+    matches = list(pattern.finditer("".join(texts)))
+    if not matches:
+        return 0
+
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text)
+
+    # С конца, чтобы смещения предыдущих совпадений не менялись
+    for match in reversed(matches):
+        start, end = match.span()
+        replacement = values[match.group()]
+        for i, text in enumerate(texts):
+            node_start = starts[i]
+            if node_start + len(text) <= start:
+                continue
+            if node_start >= end:
+                break
+            # Начало совпадения - в этом узле: сюда пишется значение
+            if node_start <= start:
+                head = text[: start - node_start] + replacement
+            else:
+                head = ""
+            texts[i] = head + text[end - node_start :]
+
+    for node, text in zip(nodes, texts):
+        if node.text != text:
+            node.text = text
+            node.set(XML_SPACE, "preserve")
+    return len(matches)
+
+
+def replace_placeholders(document, mapping: dict) -> int:
+    """
+    Заменяет ключи mapping в документе python-docx
+    :return: количество замен
+    """
+    if not mapping:
+        return 0
+    pattern = compile_placeholders(mapping)
+    values = {key: str(value) for key, value in mapping.items()}
+    return sum(
+        _replace_in_paragraph(paragraph, pattern, values)
+        for paragraph in document.element.body.iter(qn("w:p"))
+    )
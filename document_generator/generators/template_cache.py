@@ -0,0 +1,56 @@
+"""
+Разобранные шаблоны docx в памяти процесса.
+
+Document(path) распаковывает и разбирает шаблон при каждой генерации.
+Здесь каждый шаблон разбирается один раз, а генератор получает его
+глубокую копию (copy.deepcopy), которую можно менять и сохранять
+независимо от других запросов. Шаблон перечитывается при изменении
+mtime файла. Шаблоны из document_generator/templates загружаются при
+старте (DocumentGeneratorConfig.ready, DOCUMENT_TEMPLATES_WARMUP).
+"""
+import copy
+import logging
+import os
+import threading
+
+from django.conf import settings
+from docx import Document
+
+log = logging.getLogger(__name__)
+
+# {путь: (mtime, Document)}
+_templates = {}
+_lock = threading.Lock()
+
+
+def get_templates_dir() -> str:
+    return f"{settings.PROJECT_DIR}/document_generator/templates"
+
+
+def _get_template(path: str):
+    mtime = os.path.getmtime(path)
+    cached = _templates.get(path)
+    if cached is None or cached[0] != mtime:
+        with _lock:
+            cached = _templates.get(path)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, Document(path))
+                _templates[path] = cached
+    return cached[1]
+
+
+def load_template(path: str):
+    """Копия разобранного шаблона, заменяет Document(path)"""
+    return copy.deepcopy(_get_template(os.path.abspath(path)))
+
+
+def warm_templates():
+    templates_dir = get_templates_dir()
+    for name in sorted(os.listdir(templates_dir)):
+        if not name.endswith(".docx"):
+            continue
+        path = os.path.abspath(os.path.join(templates_dir, name))
+        try:
+            _get_template(path)
+        except Exception:
+            log.exception("Failed to load document template %s", name)
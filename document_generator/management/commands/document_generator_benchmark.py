@@ -0,0 +1,83 @@
+import os
+import re
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from docx import Document
+from docx.oxml.ns import qn
+
+from document_generator.generators.document_generators import BaseGenerator
+from document_generator.generators.placeholders import replace_placeholders
+
+# Шаблоны УПД (UniformTransferDocument) и спецификации
+# (AgreementSpecification)
+DEFAULT_TEMPLATES = ("УПД.docx", "Договор_приложение_спецификация.docx")
+PLACEHOLDER_RE = re.compile(r"%[a-z_]+%")
+
+
+class Command(BaseCommand):
+    help = (
+        "Время подстановки значений в шаблоны документов: прежний поиск "
+        "по каждому ключу и однопроходная замена (placeholders.py)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "templates",
+            nargs="*",
+            default=DEFAULT_TEMPLATES,
+            help="файлы из document_generator/templates",
+        )
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        for name in options["templates"]:
+            path = (
+                f"{settings.PROJECT_DIR}/document_generator/templates/{name}"
+            )
+            if not os.path.exists(path):
+                raise CommandError(f"Шаблон {path} не найден")
+            mapping = self._build_mapping(path)
+
+            legacy = self._measure(
+                path, mapping, options["repeat"], self._legacy
+            )
+            single_pass = self._measure(
+                path, mapping, options["repeat"], replace_placeholders
+            )
+            self.stdout.write(
+                f"{name}: keys: {len(mapping)}  "
+                f"legacy: {legacy * 1000:.1f} ms  "
+                f"single pass: {single_pass * 1000:.1f} ms  "
+                f"x{legacy / single_pass:.1f}"
+            )
+
+    @staticmethod
+    def _measure(path, mapping, repeat, replace) -> float:
+        """Среднее время замены без учета загрузки шаблона, секунды"""
+        total = 0.0
+        for _ in range(repeat):
+            document = Document(path)
+            started = time.perf_counter()
+            replace(document, mapping)
+            total += time.perf_counter() - started
+        return total / repeat
+
+    @staticmethod
+    def _build_mapping(path) -> dict:
+        """Значения для всех ключей шаблона"""
+        document = Document(path)
+        keys = set()
+        for paragraph in document.element.body.iter(qn("w:p")):
+            text = "".join(t.text or "" for t in paragraph.iter(qn("w:t")))
+            keys.update(PLACEHOLDER_RE.findall(text))
+        return {key: f"value of {key.strip('%')}" for key in sorted(keys)}
+
+    @staticmethod
+    def _legacy(document, mapping):
+        generator = BaseGenerator.__new__(BaseGenerator)
+        generator.document = document
+        for key, value in mapping.items():
+            generator.replace_string(key, value)
+            generator.replace_string_in_table(key, value)
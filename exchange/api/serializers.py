@@ -349,7 +349,7 @@ class DealReviewSerializer(NonNullDynamicFieldsModelSerializer):
 
     def get_created_by(self, instance):
         context = self.context
-        context["pop_company_review"] = True
+        context["compact_company"] = True
         return UserSerializer(
             instance.created_by,
             fields=("id", "first_name", "last_name", "middle_name", "company"),
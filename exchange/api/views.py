@@ -27,7 +27,7 @@ from rest_framework.viewsets import GenericViewSet
 from rest_framework_nested.viewsets import NestedViewSetMixin
 
 from chat.models import Chat
-from common.filters import FavoriteFilterBackend
+from common.filters import FavoriteFilterBackend, DistanceFilterBackend
 from common.subscribe_services.create_payment import create_payment_for_special_app
 from common.subscribe_services.payment_acceptance import payment_acceptance_special_application
 from common.utils import generate_random_sequence
@@ -265,6 +265,7 @@ class RecyclablesApplicationViewSet(
         filters.OrderingFilter,
         DjangoFilterBackend,
         FavoriteFilterBackend,
+        DistanceFilterBackend,
     )
     filterset_class = RecyclablesApplicationFilterSet
 
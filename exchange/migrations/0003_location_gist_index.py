@@ -0,0 +1,32 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:04
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+import common.geo
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0007_location_gist_index"),
+        ("exchange", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="recyclablesapplication",
+            index=django.contrib.postgres.indexes.GistIndex(
+                common.geo.LlToEarth(
+                    django.db.models.functions.comparison.Cast(
+                        models.F("latitude"), models.FloatField()
+                    ),
+                    django.db.models.functions.comparison.Cast(
+                        models.F("longitude"), models.FloatField()
+                    ),
+                ),
+                name="recyclables_apps_location_gist",
+            ),
+        ),
+    ]
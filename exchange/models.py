@@ -21,6 +21,7 @@ from django.db.models import (
 from django.urls import reverse
 
 from chat.models import Chat
+from common.geo import GeoQuerySetMixin, earth_location_index
 from common.model_fields import (
     get_field_from_choices,
     AmountField,
@@ -178,7 +179,7 @@ class SpecialApplicationPeriod(models.IntegerChoices):
 
 
 class RecyclablesApplicationQuerySet(
-    BulkUpdateOrCreateQuerySet, models.QuerySet
+    GeoQuerySetMixin, BulkUpdateOrCreateQuerySet, models.QuerySet
 ):
     def annotate_total_weight(self, *args, **kwargs):
         return self.annotate(
@@ -340,6 +341,9 @@ class RecyclablesApplication(BaseRecyclablesApplication, ApplicationSaveMixin):
         verbose_name = "Заявка по вторсырью"
         verbose_name_plural = "Заявки по вторсырью"
         db_table = "recyclables_applications"
+        indexes = [
+            earth_location_index("recyclables_apps_location_gist")
+        ]
 
     @staticmethod
     def get_total_weight(application):
@@ -1,12 +1,22 @@
-from django.dispatch import receiver
+from django.contrib.contenttypes.models import ContentType
 
+from common.dispatch import deferred_receiver
 from exchange.models import RecyclablesDeal
 from exchange.signals import deal_completed
 from finance.models import InvoicePayment
 
 
-@receiver(deal_completed, sender=RecyclablesDeal)
+@deferred_receiver(deal_completed, sender=RecyclablesDeal, heavy=True)
 def handle_completed_deal(sender, instance, **kwargs):
+    # Сигнал отправляется при каждом сохранении завершенной сделки,
+    # а обработчик может быть повторен: счета создаются один раз
+    already_invoiced = InvoicePayment.objects.filter(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+    ).exists()
+    if already_invoiced:
+        return
+
     buyer_company = instance.buyer_company
     supplier_company = instance.supplier_company
     # плата за сделку равняется кол-ву перевезенных килограммов
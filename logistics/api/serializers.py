@@ -1,5 +1,4 @@
 from django.contrib.contenttypes.models import ContentType
-from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
 
@@ -11,7 +10,9 @@ from exchange.api.serializers import (
 )
 from exchange.models import DealStatus, RecyclablesDeal, EquipmentDeal
 from logistics.models import (
+    CityRouteStatistics,
     Contractor,
+    RegionRouteStatistics,
     ContractorType,
     TransportApplication,
     LogisticsOffer,
@@ -333,7 +334,32 @@ class LogisticsOfferSerializer(NonNullDynamicFieldsModelSerializer):
                 self.context
         ):  # FIXME: разобраться почему не передается контекст при создании оффера
             user = self.context["request"].user
-            chat.unread_count = chat.messages.filter(
-                Q(is_read=False) & ~Q(author=user)
-            ).count()
+            chat.unread_count = (
+                Chat.objects.filter(pk=chat.pk)
+                .annotate_unread_messages(user)
+                .values_list("unread_count", flat=True)
+                .first()
+            )
         return ChatSerializer(chat, context=self.context).data
+
+
+class CityRouteStatisticsSerializer(serializers.ModelSerializer):
+    shipping_city_name = serializers.CharField(source="shipping_city.name")
+    delivery_city_name = serializers.CharField(source="delivery_city.name")
+
+    class Meta:
+        model = CityRouteStatistics
+        exclude = ("id",)
+
+
+class RegionRouteStatisticsSerializer(serializers.ModelSerializer):
+    shipping_region_name = serializers.CharField(
+        source="shipping_region.name"
+    )
+    delivery_region_name = serializers.CharField(
+        source="delivery_region.name"
+    )
+
+    class Meta:
+        model = RegionRouteStatistics
+        exclude = ("id",)
@@ -46,6 +46,8 @@ from logistics.api.permisssions import (
     LogisticsOffersPermission,
 )
 from logistics.api.serializers import (
+    CityRouteStatisticsSerializer,
+    RegionRouteStatisticsSerializer,
     CreateContractorSerializer,
     ContractorSerializer,
     CreateTransportApplicationSerializer,
@@ -56,7 +58,9 @@ from logistics.api.serializers import (
     UpdateTransportApplicationSerializer,
 )
 from logistics.models import (
+    CityRouteStatistics,
     Contractor,
+    RegionRouteStatistics,
     TransportApplication,
     LogisticsOffer,
     TransportApplicationStatus,
@@ -311,6 +315,16 @@ class LogisticsOffersViewSet(
     permission_classes = [LogisticsOffersPermission]
 
 
+ROUTE_MATRIX_LEVELS = {
+    "city": (CityRouteStatistics, CityRouteStatisticsSerializer, "city"),
+    "region": (
+        RegionRouteStatistics,
+        RegionRouteStatisticsSerializer,
+        "region",
+    ),
+}
+
+
 class AnalyticsViewSet(GenericViewSet):
     queryset = TransportApplication.objects.get_completed().select_related(
         "shipping_city", "delivery_city"
@@ -350,11 +364,85 @@ class AnalyticsViewSet(GenericViewSet):
             city_qs, pk=shipping_city
         ), get_object_or_404(city_qs, pk=delivery_city)
 
-        applications = self.get_queryset().filter(
-            shipping_city=shipping_city, delivery_city=delivery_city
+        # Средняя цена берется из статистики маршрутов, которая
+        # пересчитывается при выполнении заявки
+        average_price = (
+            CityRouteStatistics.objects.filter(
+                shipping_city=shipping_city, delivery_city=delivery_city
+            )
+            .values_list("average_price", flat=True)
+            .first()
+        )
+        return Response({"average_price": average_price or 0.0})
+
+    @swagger_auto_schema(
+        method="get",
+        manual_parameters=[
+            api.Parameter(
+                "level",
+                api.IN_QUERY,
+                type=api.TYPE_STRING,
+                enum=list(ROUTE_MATRIX_LEVELS),
+                default="city",
+                description="Уровень маршрутов: между городами или регионами",
+            ),
+            api.Parameter(
+                "shipping",
+                api.IN_QUERY,
+                type=api.TYPE_ARRAY,
+                items=api.Items(api.TYPE_INTEGER),
+                description="ID городов (регионов) отгрузки",
+            ),
+            api.Parameter(
+                "delivery",
+                api.IN_QUERY,
+                type=api.TYPE_ARRAY,
+                items=api.Items(api.TYPE_INTEGER),
+                description="ID городов (регионов) доставки",
+            ),
+        ],
+    )
+    @action(methods=["GET"], detail=False)
+    def route_matrix(self, request):
+        """
+        Статистика стоимости доставки для набора маршрутов за один запрос.
+        Нужно указать хотя бы один из списков shipping/delivery
+        """
+        level = request.query_params.get("level", "city")
+        if level not in ROUTE_MATRIX_LEVELS:
+            levels = ", ".join(ROUTE_MATRIX_LEVELS)
+            raise ValidationError(
+                {"level": f"Допустимые значения: {levels}"}
+            )
+        model, serializer_class, location = ROUTE_MATRIX_LEVELS[level]
+
+        shipping = self._get_ids_param(request, "shipping")
+        delivery = self._get_ids_param(request, "delivery")
+        if not shipping and not delivery:
+            raise ValidationError(
+                "Необходимо указать shipping и/или delivery"
+            )
+
+        queryset = model.objects.select_related(
+            f"shipping_{location}", f"delivery_{location}"
         )
-        average_price = applications.get_average_delivery_price() or 0.0
-        return Response({"average_price": average_price})
+        if shipping:
+            queryset = queryset.filter(
+                **{f"shipping_{location}__in": shipping}
+            )
+        if delivery:
+            queryset = queryset.filter(
+                **{f"delivery_{location}__in": delivery}
+            )
+
+        return Response(serializer_class(queryset, many=True).data)
+
+    @staticmethod
+    def _get_ids_param(request, name):
+        try:
+            return [int(value) for value in request.query_params.getlist(name)]
+        except ValueError:
+            raise ValidationError({name: "ID должны быть числами"})
 
     @swagger_auto_schema(
         manual_parameters=[
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from geopy.distance import geodesic
+
+from services.distance import GEODESIC_RELATIVE_TOLERANCE, distance_matrix
+from services.models import DeliveryCost
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение пакетного расчета расстояний/стоимости доставки с "
+        "поштучным geopy.geodesic: время и расхождение"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--origins", type=int, default=1)
+        parser.add_argument("--destinations", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        # Точки в пределах России
+        origins = self._random_points(rng, options["origins"])
+        destinations = self._random_points(rng, options["destinations"])
+        pairs = len(origins) * len(destinations)
+
+        started = time.perf_counter()
+        expected = np.array(
+            [[geodesic(o, d).km for d in destinations] for o in origins]
+        )
+        geodesic_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = distance_matrix(origins, destinations)
+        vectorized_time = time.perf_counter() - started
+
+        started = time.perf_counter()
+        DeliveryCost.matrix_from_coordinates(
+            origins, destinations, settings.PRICE_PER_KM
+        )
+        costs_time = time.perf_counter() - started
+
+        relative_error = np.abs(actual - expected) / np.maximum(expected, 1e-9)
+        absolute_error = np.abs(actual - expected)
+
+        self.stdout.write(f"pairs: {pairs}")
+        self.stdout.write(f"geodesic:        {geodesic_time * 1000:10.2f} ms")
+        self.stdout.write(
+            f"distance_matrix: {vectorized_time * 1000:10.2f} ms"
+        )
+        self.stdout.write(f"DeliveryCost:    {costs_time * 1000:10.2f} ms")
+        self.stdout.write(
+            f"max error: {absolute_error.max() * 1000:.2f} m, "
+            f"{relative_error.max():.2e} relative "
+            f"(tolerance {GEODESIC_RELATIVE_TOLERANCE:.0e})"
+        )
+        if relative_error.max() > GEODESIC_RELATIVE_TOLERANCE:
+            self.stderr.write(self.style.ERROR("Tolerance exceeded"))
+
+    @staticmethod
+    def _random_points(rng, count):
+        return np.column_stack(
+            [rng.uniform(41, 77, count), rng.uniform(19, 180, count)]
+        )
@@ -0,0 +1,177 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Case, OuterRef, Q, Value, When
+from django.utils import timezone
+
+from logistics.models import (
+    Contractor,
+    ContractorType,
+    LoadingType,
+    LogisticOfferStatus,
+    LogisticsOffer,
+    LogistTransportApplicationStatus,
+    TransportApplication,
+)
+from user.models import User, UserRole
+
+
+def legacy_annotate_logist_status(queryset, user):
+    """Прежняя аннотация: CASE из трех коррелированных id__in подзапросов"""
+
+    def has_offer(status):
+        return Q(
+            id__in=LogisticsOffer.objects.filter(
+                logist=user, application=OuterRef("pk"), status=status
+            ).values("application")
+        )
+
+    return queryset.annotate(
+        logist_status=Case(
+            When(
+                has_offer(LogisticOfferStatus.APPROVED),
+                then=Value(LogistTransportApplicationStatus.APPROVED),
+            ),
+            When(
+                has_offer(LogisticOfferStatus.PENDING),
+                then=Value(LogistTransportApplicationStatus.PENDING),
+            ),
+            When(
+                has_offer(LogisticOfferStatus.DECLINED),
+                then=Value(LogistTransportApplicationStatus.DECLINED),
+            ),
+            default=Value(LogistTransportApplicationStatus.NEW),
+        )
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение прежней и текущей аннотации logist_status на "
+        "синтетических данных. Данные создаются в транзакции и "
+        "откатываются после замеров"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--applications", type=int, default=50_000)
+        parser.add_argument("--offers", type=int, default=500_000)
+        parser.add_argument("--logists", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        random.seed(0)
+        with transaction.atomic():
+            logist = self._populate(options)
+
+            base_queryset = TransportApplication.objects.order_by(
+                "-created_at"
+            )
+            cases = {
+                "legacy": lambda: legacy_annotate_logist_status(
+                    base_queryset, logist
+                ),
+                "subquery": lambda: base_queryset.annotate_logist_status(
+                    logist
+                ),
+            }
+            filters = {
+                "no filter": None,
+                "new": [LogistTransportApplicationStatus.NEW],
+                "approved+pending": [
+                    LogistTransportApplicationStatus.APPROVED,
+                    LogistTransportApplicationStatus.PENDING,
+                ],
+            }
+
+            for filter_name, statuses in filters.items():
+                for case_name, build in cases.items():
+                    queryset = build()
+                    if statuses:
+                        queryset = queryset.filter(logist_status__in=statuses)
+                    timings = self._measure(queryset, options["repeat"])
+                    self.stdout.write(
+                        f"{filter_name:<18} {case_name:<9} "
+                        f"median: {statistics.median(timings) * 1000:9.1f} ms  "
+                        f"max: {max(timings) * 1000:9.1f} ms"
+                    )
+
+            transaction.set_rollback(True)
+
+    @staticmethod
+    def _measure(queryset, repeat):
+        """Время получения страницы списка: count + первые 10 записей"""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            queryset.count()
+            list(queryset.values("id", "logist_status")[:10])
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    def _populate(self, options):
+        batch_size = options["batch_size"]
+        now = timezone.now()
+
+        logists = User.objects.bulk_create(
+            [
+                User(
+                    phone=f"+7900{index:07d}",
+                    role=UserRole.LOGIST,
+                    first_name="Benchmark",
+                )
+                for index in range(options["logists"])
+            ]
+        )
+        contractor = Contractor.objects.create(
+            name="Benchmark",
+            contractor_type=ContractorType.TRANSPORT,
+            created_by=logists[0],
+        )
+
+        applications = TransportApplication.objects.bulk_create(
+            (
+                TransportApplication(
+                    sender="Benchmark",
+                    recipient="Benchmark",
+                    cargo_type="Benchmark",
+                    loading_type=LoadingType.REAR,
+                    weight=1000,
+                    created_by=logists[0],
+                )
+                for _ in range(options["applications"])
+            ),
+            batch_size=batch_size,
+        )
+        application_ids = [application.pk for application in applications]
+        self.stdout.write(f"Создано заявок: {len(application_ids)}")
+
+        statuses = LogisticOfferStatus.values
+        remaining = options["offers"]
+        while remaining > 0:
+            count = min(batch_size, remaining)
+            LogisticsOffer.objects.bulk_create(
+                LogisticsOffer(
+                    name="Benchmark",
+                    status=random.choice(statuses),
+                    amount=random.randint(10_000, 100_000),
+                    shipping_date=now + timedelta(days=random.randint(1, 30)),
+                    logist=random.choice(logists),
+                    application_id=random.choice(application_ids),
+                    contractor=contractor,
+                )
+                for _ in range(count)
+            )
+            remaining -= count
+        self.stdout.write(f"Создано предложений: {options['offers']}")
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"ANALYZE {TransportApplication._meta.db_table}, "
+                f"{LogisticsOffer._meta.db_table}"
+            )
+        return logists[0]
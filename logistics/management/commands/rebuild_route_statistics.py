@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from logistics.services.route_statistics import rebuild_route_statistics
+
+
+class Command(BaseCommand):
+    help = (
+        "Полная перестройка статистики стоимости доставки по маршрутам "
+        "(город-город и регион-регион) по выполненным заявкам"
+    )
+
+    def handle(self, *args, **options):
+        for table, count in rebuild_route_statistics().items():
+            self.stdout.write(f"{table}: {count}")
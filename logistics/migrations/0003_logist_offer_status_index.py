@@ -0,0 +1,20 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("logistics", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="logisticsoffer",
+            index=models.Index(
+                fields=["logist", "application", "status"],
+                name="logistic_offers_logist_status",
+            ),
+        ),
+    ]
@@ -0,0 +1,241 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+import common.model_fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0007_location_gist_index"),
+        ("logistics", "0003_logist_offer_status_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RegionRouteStatistics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "applications_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество выполненных заявок"
+                    ),
+                ),
+                (
+                    "average_price",
+                    common.model_fields.AmountField(
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        verbose_name="Средняя стоимость доставки",
+                    ),
+                ),
+                (
+                    "median_price",
+                    common.model_fields.AmountField(
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        verbose_name="Медианная стоимость доставки",
+                    ),
+                ),
+                (
+                    "average_price_per_km",
+                    common.model_fields.AmountField(
+                        blank=True,
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Средняя стоимость за км",
+                    ),
+                ),
+                (
+                    "median_price_per_km",
+                    common.model_fields.AmountField(
+                        blank=True,
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Медианная стоимость за км",
+                    ),
+                ),
+                (
+                    "p10_price_per_km",
+                    common.model_fields.AmountField(
+                        blank=True,
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="10-й перцентиль стоимости за км",
+                    ),
+                ),
+                (
+                    "p90_price_per_km",
+                    common.model_fields.AmountField(
+                        blank=True,
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="90-й перцентиль стоимости за км",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Дата обновления"
+                    ),
+                ),
+                (
+                    "delivery_region",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="company.region",
+                        verbose_name="Регион доставки",
+                    ),
+                ),
+                (
+                    "shipping_region",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="company.region",
+                        verbose_name="Регион отгрузки",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика маршрута между регионами",
+                "verbose_name_plural": "Статистика маршрутов между регионами",
+                "db_table": "region_route_statistics",
+                "unique_together": {("shipping_region", "delivery_region")},
+            },
+        ),
+        migrations.CreateModel(
+            name="CityRouteStatistics",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "applications_count",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Количество выполненных заявок"
+                    ),
+                ),
+                (
+                    "average_price",
+                    common.model_fields.AmountField(
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        verbose_name="Средняя стоимость доставки",
+                    ),
+                ),
+                (
+                    "median_price",
+                    common.model_fields.AmountField(
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        verbose_name="Медианная стоимость доставки",
+                    ),
+                ),
+                (
+                    "average_price_per_km",
+                    common.model_fields.AmountField(
+                        blank=True,
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Средняя стоимость за км",
+                    ),
+                ),
+                (
+                    "median_price_per_km",
+                    common.model_fields.AmountField(
+                        blank=True,
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Медианная стоимость за км",
+                    ),
+                ),
+                (
+                    "p10_price_per_km",
+                    common.model_fields.AmountField(
+                        blank=True,
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="10-й перцентиль стоимости за км",
+                    ),
+                ),
+                (
+                    "p90_price_per_km",
+                    common.model_fields.AmountField(
+                        blank=True,
+                        decimal_places=2,
+                        default=0.0,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="90-й перцентиль стоимости за км",
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        auto_now=True, verbose_name="Дата обновления"
+                    ),
+                ),
+                (
+                    "delivery_city",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="company.city",
+                        verbose_name="Город доставки",
+                    ),
+                ),
+                (
+                    "shipping_city",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="company.city",
+                        verbose_name="Город отгрузки",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика маршрута между городами",
+                "verbose_name_plural": "Статистика маршрутов между городами",
+                "db_table": "city_route_statistics",
+                "unique_together": {("shipping_city", "delivery_city")},
+            },
+        ),
+    ]
@@ -8,7 +8,17 @@ from django.contrib.contenttypes.fields import (
 )
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
-from django.db.models import Case, When, Q, OuterRef, Value, Avg, Sum
+from django.db.models import (
+    Case,
+    When,
+    OuterRef,
+    Value,
+    Avg,
+    Sum,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
+from model_utils import FieldTracker
 from phonenumber_field.modelfields import PhoneNumberField
 
 from chat.models import Chat
@@ -113,39 +123,40 @@ class TransportApplicationQuerySet(
     BulkUpdateOrCreateQuerySet, models.QuerySet
 ):
     def annotate_logist_status(self, user, *args, **kwargs):
-        return self.annotate(
-            logist_status=Case(
-                When(
-                    condition=Q(
-                        id__in=LogisticsOffer.objects.filter(
-                            logist=user,
-                            application=OuterRef("pk"),
-                            status=LogisticOfferStatus.APPROVED,
-                        ).values("application")
-                    ),
-                    then=Value(LogistTransportApplicationStatus.APPROVED),
+        # Статус берется из одного коррелированного подзапроса по индексу
+        # (logist, application, status): если у логиста несколько предложений
+        # по заявке, приоритет у одобренного, затем у ожидающего
+        logist_offer_status = (
+            LogisticsOffer.objects.filter(
+                logist=user, application=OuterRef("pk")
+            )
+            .annotate(
+                priority=Case(
+                    When(status=LogisticOfferStatus.APPROVED, then=Value(0)),
+                    When(status=LogisticOfferStatus.PENDING, then=Value(1)),
+                    default=Value(2),
                 ),
-                When(
-                    condition=Q(
-                        id__in=LogisticsOffer.objects.filter(
-                            logist=user,
-                            application=OuterRef("pk"),
-                            status=LogisticOfferStatus.PENDING,
-                        ).values("application")
+                logist_status=Case(
+                    When(
+                        status=LogisticOfferStatus.APPROVED,
+                        then=Value(LogistTransportApplicationStatus.APPROVED),
                     ),
-                    then=Value(LogistTransportApplicationStatus.PENDING),
-                ),
-                When(
-                    condition=Q(
-                        id__in=LogisticsOffer.objects.filter(
-                            logist=user,
-                            application=OuterRef("pk"),
-                            status=LogisticOfferStatus.DECLINED,
-                        ).values("application")
+                    When(
+                        status=LogisticOfferStatus.PENDING,
+                        then=Value(LogistTransportApplicationStatus.PENDING),
                     ),
-                    then=Value(LogistTransportApplicationStatus.DECLINED),
+                    default=Value(LogistTransportApplicationStatus.DECLINED),
                 ),
-                default=Value(LogistTransportApplicationStatus.NEW),
+            )
+            .order_by("priority")
+            .values("logist_status")[:1]
+        )
+        return self.annotate(
+            logist_status=Coalesce(
+                Subquery(
+                    logist_offer_status, output_field=models.IntegerField()
+                ),
+                Value(LogistTransportApplicationStatus.NEW),
             )
         )
 
@@ -254,6 +265,11 @@ class TransportApplication(DeliveryFieldsModelMixin, BaseModel):
 
     objects = TransportApplicationQuerySet.as_manager()
 
+    # Переход в статус "Выполнена" обновляет статистику маршрутов
+    status_tracker = FieldTracker(fields=["status"])
+    # Выбор предложения логиста меняет участников его чата
+    offer_tracker = FieldTracker(fields=["approved_logistics_offer"])
+
     class Meta:
         verbose_name = "Заявка на транспорт"
         verbose_name_plural = "Заявки на транспорт"
@@ -296,6 +312,12 @@ class LogisticsOffer(BaseNameModel):
         db_table = "logistic_offers"
         verbose_name = "Предложение логиста"
         verbose_name_plural = "Предложения логистов"
+        indexes = [
+            models.Index(
+                fields=["logist", "application", "status"],
+                name="logistic_offers_logist_status",
+            )
+        ]
 
     def decline_all_other_offers(self):
         """
@@ -320,3 +342,75 @@ class LogisticsOffer(BaseNameModel):
                 name=f"Предложение по логистике № {self.pk} к заявке № {self.application.pk}"
             )
             self.save()
+
+
+class RouteStatisticsModel(models.Model):
+    """
+    Статистика стоимости доставки по выполненным заявкам на маршруте.
+    Цена за км считается по расстоянию между точками отгрузки и доставки
+    (или координатами городов, если точки не указаны)
+    """
+
+    applications_count = models.PositiveIntegerField(
+        "Количество выполненных заявок", default=0
+    )
+    average_price = AmountField("Средняя стоимость доставки")
+    median_price = AmountField("Медианная стоимость доставки")
+    average_price_per_km = AmountField(
+        "Средняя стоимость за км", null=True, blank=True
+    )
+    median_price_per_km = AmountField(
+        "Медианная стоимость за км", null=True, blank=True
+    )
+    p10_price_per_km = AmountField(
+        "10-й перцентиль стоимости за км", null=True, blank=True
+    )
+    p90_price_per_km = AmountField(
+        "90-й перцентиль стоимости за км", null=True, blank=True
+    )
+    updated_at = models.DateTimeField("Дата обновления", auto_now=True)
+
+    class Meta:
+        abstract = True
+
+
+class CityRouteStatistics(RouteStatisticsModel):
+    shipping_city = models.ForeignKey(
+        "company.City",
+        verbose_name="Город отгрузки",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    delivery_city = models.ForeignKey(
+        "company.City",
+        verbose_name="Город доставки",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+
+    class Meta:
+        verbose_name = "Статистика маршрута между городами"
+        verbose_name_plural = "Статистика маршрутов между городами"
+        db_table = "city_route_statistics"
+        unique_together = [["shipping_city", "delivery_city"]]
+
+
+class RegionRouteStatistics(RouteStatisticsModel):
+    shipping_region = models.ForeignKey(
+        "company.Region",
+        verbose_name="Регион отгрузки",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    delivery_region = models.ForeignKey(
+        "company.Region",
+        verbose_name="Регион доставки",
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+
+    class Meta:
+        verbose_name = "Статистика маршрута между регионами"
+        verbose_name_plural = "Статистика маршрутов между регионами"
+        db_table = "region_route_statistics"
+        unique_together = [["shipping_region", "delivery_region"]]
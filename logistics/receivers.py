@@ -0,0 +1,54 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from logistics.models import (
+    CityRouteStatistics,
+    RegionRouteStatistics,
+    TransportApplication,
+    TransportApplicationStatus,
+)
+from logistics.services.route_statistics import (
+    rebuild_route_statistics,
+    refresh_route_statistics,
+)
+
+
+@receiver(post_save, sender=TransportApplication)
+def update_route_statistics(sender, instance, **kwargs):
+    # Заявка вошла в статус "Выполнена" или вышла из него
+    if not instance.status_tracker.has_changed("status"):
+        return
+    if TransportApplicationStatus.COMPLETED in (
+        instance.status,
+        instance.status_tracker.previous("status"),
+    ):
+        transaction.on_commit(lambda: refresh_route_statistics(instance))
+
+
+@receiver(post_delete, sender=TransportApplication)
+def handle_completed_application_delete(sender, instance, **kwargs):
+    if instance.status == TransportApplicationStatus.COMPLETED:
+        transaction.on_commit(lambda: refresh_route_statistics(instance))
+
+
+@receiver(post_migrate)
+def backfill_route_statistics(sender, using="default", **kwargs):
+    """
+    Первичное заполнение статистики маршрутов после миграций, если она
+    еще пуста (далее она поддерживается обработчиками выше)
+    """
+    if sender.name != "logistics":
+        return
+    tables = connections[using].introspection.table_names()
+    if not {
+        CityRouteStatistics._meta.db_table,
+        RegionRouteStatistics._meta.db_table,
+    } <= set(tables):
+        return
+    if (
+        CityRouteStatistics.objects.using(using).exists()
+        or RegionRouteStatistics.objects.using(using).exists()
+    ):
+        return
+    rebuild_route_statistics()
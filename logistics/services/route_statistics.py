@@ -0,0 +1,189 @@
+"""
+Статистика стоимости доставки по маршрутам (город-город и регион-регион).
+
+Статистика пары пересчитывается одним агрегирующим запросом, когда заявка
+входит в статус "Выполнена" или выходит из него, и при удалении
+выполненной заявки (см. logistics/receivers.py). Пустые таблицы
+заполняются после migrate, полная перестройка - командой
+rebuild_route_statistics.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Aggregate, Avg, Case, Count, F, FloatField, When
+from django.db.models.functions import Cast, Coalesce
+
+from common.geo import EarthDistance, LlToEarth
+from logistics.models import (
+    CityRouteStatistics,
+    RegionRouteStatistics,
+    TransportApplication,
+)
+
+log = logging.getLogger(__name__)
+
+# Маршруты короче этого расстояния не участвуют в расчете цены за км
+MIN_ROUTE_DISTANCE_KM = 1
+
+
+class PercentileCont(Aggregate):
+    function = "percentile_cont"
+    template = (
+        "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    )
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile: float, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+def _point(latitude_field, longitude_field, city_field):
+    return LlToEarth(
+        Cast(
+            Coalesce(F(latitude_field), F(f"{city_field}__latitude")),
+            FloatField(),
+        ),
+        Cast(
+            Coalesce(F(longitude_field), F(f"{city_field}__longitude")),
+            FloatField(),
+        ),
+    )
+
+
+def _completed_applications():
+    return (
+        TransportApplication.objects.get_completed()
+        .filter(approved_logistics_offer__isnull=False)
+        .annotate(
+            price=Cast("approved_logistics_offer__amount", FloatField()),
+            distance_km=EarthDistance(
+                _point(
+                    "shipping_latitude", "shipping_longitude", "shipping_city"
+                ),
+                _point(
+                    "delivery_latitude", "delivery_longitude", "delivery_city"
+                ),
+            )
+            / 1000,
+        )
+        .annotate(
+            price_per_km=Case(
+                When(
+                    distance_km__gte=MIN_ROUTE_DISTANCE_KM,
+                    then=F("price") / F("distance_km"),
+                ),
+                output_field=FloatField(),
+            )
+        )
+    )
+
+
+def _aggregate(queryset, shipping_field, delivery_field):
+    """Статистика по парам (shipping_field, delivery_field) одним GROUP BY"""
+    return (
+        queryset.filter(
+            **{
+                f"{shipping_field}__isnull": False,
+                f"{delivery_field}__isnull": False,
+            }
+        )
+        .values(shipping_id=F(shipping_field), delivery_id=F(delivery_field))
+        .annotate(
+            applications_count=Count("id"),
+            average_price=Avg("price"),
+            median_price=PercentileCont("price", 0.5),
+            average_price_per_km=Avg("price_per_km"),
+            median_price_per_km=PercentileCont("price_per_km", 0.5),
+            p10_price_per_km=PercentileCont("price_per_km", 0.1),
+            p90_price_per_km=PercentileCont("price_per_km", 0.9),
+        )
+        .order_by()
+    )
+
+
+def _statistics_fields(row: dict) -> dict:
+    return {
+        key: value
+        for key, value in row.items()
+        if key not in ("shipping_id", "delivery_id")
+    }
+
+
+# (модель статистики, поле заявки для отгрузки, для доставки, поля модели)
+ROUTE_LEVELS = (
+    (
+        CityRouteStatistics,
+        "shipping_city",
+        "delivery_city",
+        ("shipping_city_id", "delivery_city_id"),
+    ),
+    (
+        RegionRouteStatistics,
+        "shipping_city__region",
+        "delivery_city__region",
+        ("shipping_region_id", "delivery_region_id"),
+    ),
+)
+
+
+def refresh_route_statistics(application: TransportApplication):
+    """Пересчет статистики маршрутов, в которые входит заявка"""
+    applications = _completed_applications()
+    for model, shipping_field, delivery_field, keys in ROUTE_LEVELS:
+        shipping_id = _get_value(application, shipping_field)
+        delivery_id = _get_value(application, delivery_field)
+        if shipping_id is None or delivery_id is None:
+            continue
+
+        rows = list(
+            _aggregate(
+                applications.filter(
+                    **{
+                        shipping_field: shipping_id,
+                        delivery_field: delivery_id,
+                    }
+                ),
+                shipping_field,
+                delivery_field,
+            )
+        )
+        lookup = dict(zip(keys, (shipping_id, delivery_id)))
+        if rows:
+            model.objects.update_or_create(
+                **lookup, defaults=_statistics_fields(rows[0])
+            )
+        else:
+            model.objects.filter(**lookup).delete()
+
+
+def rebuild_route_statistics() -> dict:
+    """Полная перестройка статистики по всем выполненным заявкам"""
+    applications = _completed_applications()
+    created = {}
+    with transaction.atomic():
+        for model, shipping_field, delivery_field, keys in ROUTE_LEVELS:
+            objects = [
+                model(
+                    **dict(
+                        zip(keys, (row["shipping_id"], row["delivery_id"]))
+                    ),
+                    **_statistics_fields(row),
+                )
+                for row in _aggregate(
+                    applications, shipping_field, delivery_field
+                )
+            ]
+            model.objects.all().delete()
+            model.objects.bulk_create(objects, batch_size=1000)
+            created[model._meta.db_table] = len(objects)
+    log.info("Route statistics rebuilt: %s", created)
+    return created
+
+
+def _get_value(application, field):
+    """Значение поля заявки, в том числе вида shipping_city__region"""
+    if "__" not in field:
+        return getattr(application, f"{field}_id")
+    city_field, attr = field.split("__")
+    city = getattr(application, city_field)
+    return getattr(city, f"{attr}_id", None) if city else None
@@ -10,10 +10,16 @@ from pydantic import BaseModel
 class NotificationSerializer(NonNullDynamicFieldsModelSerializer):
     object_url = serializers.SerializerMethodField()
     content_type = serializers.SerializerMethodField()
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = Notification
 
+    def get_is_read(self, instance: Notification) -> bool:
+        # Для общих уведомлений прочтение определяется курсором пользователя
+        # (см. NotificationQuerySet.annotate_is_read)
+        return getattr(instance, "is_read_by_user", instance.is_read)
+
     def get_object_url(self, instance: Notification):
         from chat.models import Message
 
@@ -1,6 +1,6 @@
-from django.db.models import Q
-from rest_framework import generics, filters
+from rest_framework import generics, filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
@@ -11,8 +11,8 @@ from notification.api.serializers import (
     UpdateNotificationSerializer,
     NotificationCount,
 )
-from notification.models import Notification
-from user.models import UserRole
+from notification.models import Notification, NotificationReadCursor
+from notification.services import push, unread_counters
 
 
 class NotificationViewSet(
@@ -36,43 +36,86 @@ class NotificationViewSet(
     }
 
     def get_queryset(self):
-        qs = self.filter_queryset(super().get_queryset()).order_by(
-            "-created_at"
-        )
-
         user = self.request.user
-
-        user_notification_query_node = Q(user=user)
-
+        qs = (
+            self.filter_queryset(super().get_queryset())
+            .for_user(user)
+            .order_by("-created_at")
+        )
         if user.is_anonymous:
-            return qs.none()
-        if user.role == UserRole.COMPANY_ADMIN or UserRole.COMPANY_STAFF:
-            return qs.filter(
-                Q(company=user.company) | user_notification_query_node
-            )
-        if user.role == UserRole.MANAGER:
-            return qs.filter(
-                Q(company__manager=user) | user_notification_query_node
-            )
-        if user.role == UserRole.LOGIST:
-            return qs.filter(user_notification_query_node)
-
-        if user.role in [UserRole.ADMIN, UserRole.SUPER_ADMIN]:
             return qs
+        return qs.annotate_is_read(user)
 
     def retrieve(self, request, *args, **kwargs):
         """Overriding retrieve method, so we can mark Notifications as read after request"""
         notification = self.get_object()
-        if not notification.is_read:
+        if notification.is_broadcast:
+            NotificationReadCursor.mark_read(request.user, notification.pk)
+            unread_counters.broadcast_cursor_moved(request.user)
+            push.push_unread_count(request.user)
+            notification.is_read_by_user = True
+        elif not notification.is_read:
             notification.is_read = True
             notification.save()
+            unread_counters.notification_read_changed(notification, True)
+            push.push_read(notification)
         return Response(NotificationSerializer(notification).data)
 
+    def perform_update(self, serializer):
+        notification = serializer.instance
+        if not notification.is_broadcast:
+            was_read = notification.is_read
+            serializer.save()
+            if notification.is_read != was_read:
+                unread_counters.notification_read_changed(
+                    notification, notification.is_read
+                )
+                push.push_read(notification, notification.is_read)
+            return
+        # Общее уведомление одно на всех получателей: вместо записи в него
+        # сдвигаем курсор прочтения пользователя
+        if serializer.validated_data.get("is_read"):
+            NotificationReadCursor.mark_read(
+                self.request.user, notification.pk
+            )
+            unread_counters.broadcast_cursor_moved(self.request.user)
+            push.push_unread_count(self.request.user)
+            notification.is_read_by_user = True
+
+    def perform_destroy(self, instance):
+        if instance.is_broadcast:
+            raise PermissionDenied("Общее уведомление нельзя удалить")
+        if not instance.is_read:
+            push.push_read(instance)
+        instance.delete()
+        unread_counters.notification_deleted(instance)
+
+    @action(detail=False, methods=["POST"])
+    def read_all(self, request):
+        """Отметить все уведомления ленты прочитанными"""
+        qs = self.get_queryset()
+        # Только собственные уведомления: лента администратора - вся
+        # таблица, и ее нельзя помечать прочитанной целиком
+        Notification.objects.personal_for(request.user).filter(
+            is_read=False
+        ).update(is_read=True)
+        last_broadcast_id = (
+            qs.filter(topic__isnull=False)
+            .order_by("-pk")
+            .values_list("pk", flat=True)
+            .first()
+        )
+        if last_broadcast_id:
+            NotificationReadCursor.mark_read(request.user, last_broadcast_id)
+        unread_counters.reset_user_counters(request.user)
+        push.push_unread_count(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=False, methods=["GET"])
     def unread_count(self, request):
         # Посылает количество непрочитанных оповещений на страницу профиля компании
         return Response(
             NotificationCount(
-                unread_count=self.get_queryset().filter(is_read=False).count()
+                unread_count=unread_counters.get_unread_count(request.user)
             ).dict()
         )
@@ -0,0 +1,83 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections
+from rest_framework import status
+
+from notification.models import NotificationTopic
+from notification.services.push import (
+    get_company_group,
+    get_topic_group,
+    get_user_group,
+)
+from notification.services.unread_counters import get_unread_count
+from user.models import Favorite, UserRole
+
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Уведомления пользователя в реальном времени вместо опроса
+    /notifications/unread_count. Подписки на компании, сделанные после
+    подключения, начинают работать после переподключения
+    """
+
+    async def connect(self):
+        await database_sync_to_async(close_old_connections)()
+        self.user = self.scope["user"]
+        self.notification_groups = []
+
+        if not self.user or self.user.is_anonymous:
+            await self.close(code=status.HTTP_401_UNAUTHORIZED)
+            return
+
+        self.notification_groups = await database_sync_to_async(
+            self.get_user_groups
+        )()
+        for group in self.notification_groups:
+            await self.channel_layer.group_add(group, self.channel_name)
+
+        await self.accept()
+        unread_count = await database_sync_to_async(get_unread_count)(
+            self.user
+        )
+        await self.send_json(
+            {"event": "unread_count", "unread_count": unread_count}
+        )
+
+    def get_user_groups(self) -> list[str]:
+        """Группы совпадают с составом ленты (NotificationQuerySet.for_user)"""
+        from company.models import Company
+
+        user = self.user
+        groups = [get_user_group(user.pk)]
+        if (
+            user.role in (UserRole.COMPANY_ADMIN, UserRole.COMPANY_STAFF)
+            and user.company_id
+        ):
+            groups.append(get_company_group(user.company_id))
+        if user.role == UserRole.MANAGER:
+            groups.extend(
+                get_company_group(company_id)
+                for company_id in Company.objects.filter(
+                    manager=user
+                ).values_list("pk", flat=True)
+            )
+        if user.role == UserRole.LOGIST:
+            groups.append(get_topic_group(NotificationTopic.LOGISTS))
+        groups.extend(
+            get_topic_group(NotificationTopic.COMPANY_FOLLOWERS, company_id)
+            for company_id in Favorite.objects.filter(
+                user=user,
+                content_type=ContentType.objects.get_for_model(Company),
+            ).values_list("object_id", flat=True)
+        )
+        return groups
+
+    async def disconnect(self, close_code):
+        for group in self.notification_groups:
+            await self.channel_layer.group_discard(group, self.channel_name)
+
+        await database_sync_to_async(close_old_connections)()
+
+    async def notification_event(self, event):
+        await self.send_json(event["payload"])
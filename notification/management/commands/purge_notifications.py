@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from notification.services.retention import (
+    DEFAULT_BATCH_SIZE,
+    purge_notifications,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаление устаревших уведомлений (сроки хранения задаются "
+        "настройками NOTIFICATION_*_RETENTION_DAYS), запускать по расписанию"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=DEFAULT_BATCH_SIZE
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Только посчитать уведомления, подлежащие удалению",
+        )
+
+    def handle(self, *args, **options):
+        count = purge_notifications(
+            batch_size=options["batch_size"], dry_run=options["dry_run"]
+        )
+        verb = "to purge" if options["dry_run"] else "purged"
+        self.stdout.write(f"Notifications {verb}: {count}")
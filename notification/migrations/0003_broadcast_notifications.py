@@ -0,0 +1,85 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("company", "0009_geocode_cache"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("notification", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationReadCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "last_read_id",
+                    models.BigIntegerField(
+                        default=0,
+                        verbose_name="Последнее прочитанное общее уведомление",
+                    ),
+                ),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Курсор прочтения уведомлений",
+                "verbose_name_plural": "Курсоры прочтения уведомлений",
+                "db_table": "notification_read_cursors",
+            },
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="topic",
+            field=models.PositiveSmallIntegerField(
+                blank=True,
+                choices=[(1, "Все логисты"), (2, "Подписчики компании")],
+                null=True,
+                verbose_name="Тема рассылки",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="topic_company",
+            field=models.ForeignKey(
+                blank=True,
+                help_text='Для темы "Подписчики компании"',
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="+",
+                to="company.company",
+                verbose_name="Компания рассылки",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("topic__isnull", False)),
+                fields=["topic", "topic_company", "created_at"],
+                name="notifications_topic",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notificationreadcursor",
+            name="user",
+            field=models.OneToOneField(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="notification_read_cursor",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Пользователь",
+            ),
+        ),
+    ]
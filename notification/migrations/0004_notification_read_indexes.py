@@ -0,0 +1,27 @@
+# Generated by Django 4.1.3 on 2026-10-19 04:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notification", "0003_broadcast_notifications"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "is_read", "created_at"],
+                name="notifications_user_read",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["company", "is_read", "created_at"],
+                name="notifications_company_read",
+            ),
+        ),
+    ]
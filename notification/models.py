@@ -2,13 +2,101 @@ from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models import BooleanField, Case, Exists, F, OuterRef, Q, When
+from django.db.models.expressions import ExpressionWrapper
 
+from bulk_update_or_create import BulkUpdateOrCreateQuerySet
+from common.model_fields import get_field_from_choices
 from common.models import BaseNameModel
+from notification.signals import notifications_created
+from user.models import Favorite, UserRole
 
 
 User = get_user_model()
 
 
+class NotificationTopic(models.IntegerChoices):
+    LOGISTS = 1, "Все логисты"
+    COMPANY_FOLLOWERS = 2, "Подписчики компании"
+
+
+class NotificationQuerySet(BulkUpdateOrCreateQuerySet, models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        # bulk_create не отправляет post_save (см. receivers.py)
+        notifications_created.send(sender=self.model, notifications=objs)
+        return objs
+
+    @staticmethod
+    def _personal_q(user) -> Q:
+        personal = Q(user=user)
+        if (
+            user.role in (UserRole.COMPANY_ADMIN, UserRole.COMPANY_STAFF)
+            and user.company_id
+        ):
+            personal |= Q(company_id=user.company_id)
+        if user.role == UserRole.MANAGER:
+            personal |= Q(company__manager=user)
+        return personal
+
+    def personal_for(self, user):
+        """
+        Личные уведомления пользователя и его компании (или компаний
+        менеджера) без общих. В отличие от for_user, администраторам
+        не возвращает всю таблицу
+        """
+        if user.is_anonymous:
+            return self.none()
+        return self.filter(self._personal_q(user), topic__isnull=True)
+
+    def for_user(self, user):
+        """
+        Лента пользователя: личные уведомления, уведомления его компании
+        (или компаний менеджера) и общие уведомления по темам, на которые
+        он подписан. Общие уведомления видны только с момента подписки
+        """
+        if user.is_anonymous:
+            return self.none()
+        if user.role in (UserRole.ADMIN, UserRole.SUPER_ADMIN):
+            return self
+
+        personal = self._personal_q(user)
+
+        from company.models import Company
+
+        followed_companies = Favorite.objects.filter(
+            user=user,
+            content_type=ContentType.objects.get_for_model(Company),
+            object_id=OuterRef("topic_company_id"),
+            created_at__lte=OuterRef("created_at"),
+        )
+        broadcast = Q(topic=NotificationTopic.COMPANY_FOLLOWERS) & Q(
+            Exists(followed_companies)
+        )
+        if user.role == UserRole.LOGIST:
+            broadcast |= Q(
+                topic=NotificationTopic.LOGISTS,
+                created_at__gte=user.date_joined,
+            )
+        return self.filter(personal | broadcast)
+
+    def annotate_is_read(self, user):
+        """
+        is_read_by_user: для личных уведомлений - поле is_read, для общих -
+        положение курсора прочтения пользователя
+        """
+        last_read_id = NotificationReadCursor.get_last_read_id(user)
+        return self.annotate(
+            is_read_by_user=Case(
+                When(topic__isnull=True, then=F("is_read")),
+                default=ExpressionWrapper(
+                    Q(pk__lte=last_read_id), output_field=BooleanField()
+                ),
+                output_field=BooleanField(),
+            )
+        )
+
+
 class Notification(BaseNameModel):
     company = models.ForeignKey(
         "company.Company",
@@ -25,14 +113,111 @@ class Notification(BaseNameModel):
     user = models.ForeignKey(
         User, on_delete=models.CASCADE, verbose_name="Пользователь", null=True
     )
+    # Общее уведомление: одна запись на событие вместо записи на каждого
+    # получателя, получатели определяются темой при чтении ленты
+    topic = get_field_from_choices(
+        "Тема рассылки", NotificationTopic, null=True, blank=True
+    )
+    topic_company = models.ForeignKey(
+        "company.Company",
+        on_delete=models.CASCADE,
+        verbose_name="Компания рассылки",
+        help_text="Для темы \"Подписчики компании\"",
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+
+    objects = NotificationQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Уведомление"
         verbose_name_plural = "Уведомления"
         db_table = "notifications"
+        # Ожидаемые планы (PostgreSQL):
+        # - счетчики непрочитанных (services/unread_counters.py) и ленты
+        #   пользователя/компании: Index (Only) Scan по notifications_user_read
+        #   и notifications_company_read с условием is_read = false;
+        # - лента (for_user ... ORDER BY created_at DESC): BitmapOr по тем же
+        #   индексам и notifications_topic для рассылок, затем Sort по
+        #   created_at только выбранных строк вместо Seq Scan всей таблицы;
+        # - purge_notifications: Index Scan по первичному ключу с фильтром
+        #   по сроку хранения и LIMIT пачки, старые уведомления имеют
+        #   меньшие id и находятся в начале индекса.
+        indexes = [
+            models.Index(
+                fields=["topic", "topic_company", "created_at"],
+                name="notifications_topic",
+                condition=Q(topic__isnull=False),
+            ),
+            models.Index(
+                fields=["user", "is_read", "created_at"],
+                name="notifications_user_read",
+            ),
+            models.Index(
+                fields=["company", "is_read", "created_at"],
+                name="notifications_company_read",
+            ),
+        ]
 
     @staticmethod
     def create_notification(company, content_object, message):
         return Notification.objects.create(
             company=company, content_object=content_object, name=message
         )
+
+    @staticmethod
+    def create_broadcast(topic, content_object, message, company=None):
+        return Notification.objects.create(
+            topic=topic,
+            topic_company=company,
+            content_object=content_object,
+            name=message,
+        )
+
+    @property
+    def is_broadcast(self):
+        return self.topic is not None
+
+
+class NotificationReadCursor(models.Model):
+    """
+    Курсор прочтения общих уведомлений: все общие уведомления с id не больше
+    last_read_id считаются прочитанными пользователем
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        verbose_name="Пользователь",
+        related_name="notification_read_cursor",
+    )
+    last_read_id = models.BigIntegerField(
+        "Последнее прочитанное общее уведомление", default=0
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Курсор прочтения уведомлений"
+        verbose_name_plural = "Курсоры прочтения уведомлений"
+        db_table = "notification_read_cursors"
+
+    @staticmethod
+    def get_last_read_id(user) -> int:
+        return (
+            NotificationReadCursor.objects.filter(user=user)
+            .values_list("last_read_id", flat=True)
+            .first()
+            or 0
+        )
+
+    @staticmethod
+    def mark_read(user, notification_id: int):
+        """Сдвигает курсор вперед (назад никогда не двигается)"""
+        cursor, created = NotificationReadCursor.objects.get_or_create(
+            user=user, defaults={"last_read_id": notification_id}
+        )
+        if not created:
+            NotificationReadCursor.objects.filter(
+                pk=cursor.pk, last_read_id__lt=notification_id
+            ).update(last_read_id=notification_id)
@@ -1,12 +1,15 @@
 """
-Subscribing to signals from other app models and creating notifications on their updates
+Subscribing to signals from other app models and creating notifications on their updates.
+Notifications are created after the transaction commits in the worker pool
+(see common.dispatch)
 """
-from django.contrib.auth import get_user_model
-from django.contrib.contenttypes.models import ContentType
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from common.dispatch import deferred_receiver
+
 from chat.models import Message
+from chat.signals import messages_created
 from company.models import CompanyVerificationRequest
 from company.signals import verification_status_changed
 from exchange.models import (
@@ -21,15 +24,34 @@ from exchange.signals import (
 )
 from logistics.models import TransportApplication
 from logistics.signals import transport_application_status_update
-from notification.models import Notification
-from user.models import UserRole, Favorite
+from notification.models import Notification, NotificationTopic
+from notification.services import push, unread_counters
+from notification.signals import notifications_created
+
+
+@receiver(post_save, sender=Notification)
+def handle_new_notification(
+    sender, instance: Notification, created, **kwargs
+):
+    if created:
+        notifications_created.send(sender=sender, notifications=[instance])
+
 
-User = get_user_model()
+@receiver(notifications_created, sender=Notification)
+def update_unread_counters(sender, notifications, **kwargs):
+    unread_counters.notifications_created(notifications)
 
 
-@receiver(post_save, sender=Message)
-def handle_new_message(sender, instance: Message, created, **kwargs):
-    if created and hasattr(instance.chat, "deal"):
+@deferred_receiver(notifications_created, heavy=True, sender=Notification)
+def push_notifications(sender, notifications, **kwargs):
+    push.push_created(notifications)
+
+
+@deferred_receiver(messages_created, sender=Message, heavy=True)
+def handle_new_messages(sender, messages, **kwargs):
+    for instance in messages:
+        if not hasattr(instance.chat, "deal"):
+            continue
         sender_company = instance.author.company
         receiver_company = (
             instance.chat.deal.supplier_company
@@ -44,7 +66,7 @@ def handle_new_message(sender, instance: Message, created, **kwargs):
         )
 
 
-@receiver(post_save, sender=RecyclablesDeal)
+@deferred_receiver(post_save, sender=RecyclablesDeal, heavy=True)
 def handle_new_recyclables_deal(
     sender, instance: RecyclablesDeal, created, **kwargs
 ):
@@ -57,7 +79,7 @@ def handle_new_recyclables_deal(
         )
 
 
-@receiver(post_save, sender=EquipmentDeal)
+@deferred_receiver(post_save, sender=EquipmentDeal, heavy=True)
 def handle_new_equipment_deal(
     sender, instance: EquipmentDeal, created, **kwargs
 ):
@@ -70,7 +92,9 @@ def handle_new_equipment_deal(
         )
 
 
-@receiver(verification_status_changed, sender=CompanyVerificationRequest)
+@deferred_receiver(
+    verification_status_changed, sender=CompanyVerificationRequest, heavy=True
+)
 def handle_verification_status_change(
     sender, instance: CompanyVerificationRequest, **kwargs
 ):
@@ -87,7 +111,9 @@ def handle_verification_status_change(
     )
 
 
-@receiver(recyclables_deal_status_changed, sender=RecyclablesDeal)
+@deferred_receiver(
+    recyclables_deal_status_changed, sender=RecyclablesDeal, heavy=True
+)
 def handle_recyclables_deal_status_change(
     sender, instance: RecyclablesDeal, **kwargs
 ):
@@ -105,7 +131,9 @@ def handle_recyclables_deal_status_change(
     Notification.objects.bulk_create(to_create)
 
 
-@receiver(transport_application_status_update, sender=TransportApplication)
+@deferred_receiver(
+    transport_application_status_update, sender=TransportApplication, heavy=True
+)
 def handle_transport_application_status_change(
     sender, instance: TransportApplication, **kwargs
 ):
@@ -135,78 +163,53 @@ def handle_transport_application_status_change(
     Notification.objects.bulk_create(to_create)
 
 
-@receiver(post_save, sender=TransportApplication)
+@deferred_receiver(post_save, sender=TransportApplication, heavy=True)
 def handle_new_transport_application(
     sender, instance: TransportApplication, created, **kwargs
 ):
+    # Одно общее уведомление для всех логистов (см. NotificationTopic)
     if created:
-        logists = User.objects.filter(role=UserRole.LOGIST)
-        to_create = []
-        for logist in logists:
-            to_create.append(
-                Notification(
-                    user=logist,
-                    content_object=instance,
-                    name="Создана новая заявка на транспорт",
-                )
-            )
-
-        Notification.objects.bulk_create(to_create)
+        Notification.create_broadcast(
+            NotificationTopic.LOGISTS,
+            instance,
+            message="Создана новая заявка на транспорт",
+        )
 
 
-@receiver(post_save, sender=RecyclablesApplication)
+@deferred_receiver(post_save, sender=RecyclablesApplication, heavy=True)
 def handle_new_recyclables_application(
     sender, instance: RecyclablesApplication, created, **kwargs
 ):
     if not created:
         return
 
-    company = instance.company
-    company_content_type = ContentType.objects.get_for_model(company)
-    users_to_notify = Favorite.objects.filter(
-        content_type=company_content_type, object_id=company.pk
-    ).values_list("user", flat=True)
-
-    to_create = []
-    for user in users_to_notify:
-        to_create.append(
-            Notification(
-                name="Компания из вашего списка подписок создала заявку на вторсырье",
-                user_id=user,
-                content_object=instance,
-            )
-        )
-
-    Notification.objects.bulk_create(to_create)
+    # Одно общее уведомление для подписчиков компании
+    Notification.create_broadcast(
+        NotificationTopic.COMPANY_FOLLOWERS,
+        instance,
+        message="Компания из вашего списка подписок создала заявку на вторсырье",
+        company=instance.company,
+    )
 
 
-@receiver(post_save, sender=EquipmentApplication)
-def handle_new_recyclables_application(
+@deferred_receiver(post_save, sender=EquipmentApplication, heavy=True)
+def handle_new_equipment_application(
     sender, instance: EquipmentApplication, created, **kwargs
 ):
     if not created:
         return
 
-    company = instance.company
-    company_content_type = ContentType.objects.get_for_model(company)
-    users_to_notify = Favorite.objects.filter(
-        content_type=company_content_type, object_id=company.pk
-    ).values_list("user", flat=True)
-
-    to_create = []
-    for user in users_to_notify:
-        to_create.append(
-            Notification(
-                name="Компания из вашего списка подписок создала заявку на оборудование",
-                user=user,
-                content_object=instance,
-            )
-        )
-
-    Notification.objects.bulk_create(to_create)
+    Notification.create_broadcast(
+        NotificationTopic.COMPANY_FOLLOWERS,
+        instance,
+        message="Компания из вашего списка подписок создала заявку на оборудование",
+        company=instance.company,
+    )
 
 
-@receiver(application_status_changed, sender=RecyclablesApplication)
+@deferred_receiver(
+    application_status_changed, sender=RecyclablesApplication, heavy=True
+)
 def handle_recyclables_application_status_change(
     sender, instance: RecyclablesApplication, **kwargs
 ):
@@ -223,7 +226,9 @@ def handle_recyclables_application_status_change(
     Notification.objects.bulk_create(to_create)
 
 
-@receiver(application_status_changed, sender=EquipmentApplication)
+@deferred_receiver(
+    application_status_changed, sender=EquipmentApplication, heavy=True
+)
 def handle_recyclables_equipment_status_change(
     sender, instance: EquipmentApplication, **kwargs
 ):
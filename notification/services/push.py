@@ -0,0 +1,112 @@
+"""
+Отправка уведомлений в websocket (NotificationConsumer) через channel layer.
+
+Группы:
+- notifications.user.<id> - личные уведомления и события прочтения;
+- notifications.company.<id> - уведомления компании (сотрудники компании и
+  ее менеджер);
+- notifications.topic.<topic>[.<company_id>] - общие уведомления по теме.
+События отправляются после коммита транзакции. Клиент держит счетчик
+непрочитанных: событие содержит либо изменение счетчика
+(unread_count_delta), либо его новое значение (unread_count).
+"""
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+log = logging.getLogger(__name__)
+
+EVENT_TYPE = "notification.event"
+
+
+def get_user_group(user_id) -> str:
+    return f"notifications.user.{user_id}"
+
+
+def get_company_group(company_id) -> str:
+    return f"notifications.company.{company_id}"
+
+
+def get_topic_group(topic, company_id=None) -> str:
+    if company_id:
+        return f"notifications.topic.{topic}.{company_id}"
+    return f"notifications.topic.{topic}"
+
+
+def get_notification_group(notification) -> str | None:
+    if notification.is_broadcast:
+        return get_topic_group(
+            notification.topic, notification.topic_company_id
+        )
+    if notification.user_id:
+        return get_user_group(notification.user_id)
+    if notification.company_id:
+        return get_company_group(notification.company_id)
+    return None
+
+
+def _send(group: str, payload: dict):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(
+            group, {"type": EVENT_TYPE, "payload": payload}
+        )
+    except Exception:
+        # Ошибка доставки не должна ломать запрос: клиент дочитает ленту
+        log.exception("Failed to push notification event to %s", group)
+
+
+def _push_created(notifications):
+    from notification.api.serializers import NotificationSerializer
+
+    for notification in notifications:
+        group = get_notification_group(notification)
+        if group is None:
+            continue
+        _send(
+            group,
+            {
+                "event": "created",
+                "notification": dict(
+                    NotificationSerializer(notification).data
+                ),
+                "unread_count_delta": 1,
+            },
+        )
+
+
+def push_created(notifications):
+    notifications = list(notifications)
+    transaction.on_commit(lambda: _push_created(notifications))
+
+
+def push_read(notification, is_read: bool = True):
+    """Личное уведомление или уведомление компании прочитано (или наоборот)"""
+    group = get_notification_group(notification)
+    if group is None:
+        return
+    payload = {
+        "event": "read" if is_read else "unread",
+        "id": notification.pk,
+        "unread_count_delta": -1 if is_read else 1,
+    }
+    transaction.on_commit(lambda: _send(group, payload))
+
+
+def push_unread_count(user):
+    """
+    Новое значение счетчика пользователя, когда изменение нельзя выразить
+    одной дельтой (сдвиг курсора общих уведомлений, прочтение всей ленты)
+    """
+    from notification.services.unread_counters import get_unread_count
+
+    transaction.on_commit(
+        lambda: _send(
+            get_user_group(user.pk),
+            {"event": "unread_count", "unread_count": get_unread_count(user)},
+        )
+    )
@@ -0,0 +1,76 @@
+"""
+Очистка таблицы уведомлений (запускается командой purge_notifications
+по расписанию).
+
+Удаляются:
+- прочитанные личные уведомления и уведомления компаний старше
+  NOTIFICATION_RETENTION_DAYS;
+- общие уведомления (рассылки) старше NOTIFICATION_BROADCAST_RETENTION_DAYS,
+  прочтение у них хранится курсором, поэтому они удаляются целиком;
+- непрочитанные уведомления старше NOTIFICATION_UNREAD_RETENTION_DAYS
+  (0 - не удалять).
+Удаление идет пачками по первичному ключу, чтобы не держать долгие
+блокировки и не раздувать WAL одной транзакцией.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from notification.models import Notification
+from notification.services import unread_counters
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+def get_expired_notifications(now=None):
+    now = now or timezone.now()
+    expired = Q(
+        topic__isnull=True,
+        is_read=True,
+        created_at__lt=now
+        - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS),
+    ) | Q(
+        topic__isnull=False,
+        created_at__lt=now
+        - timedelta(days=settings.NOTIFICATION_BROADCAST_RETENTION_DAYS),
+    )
+    if settings.NOTIFICATION_UNREAD_RETENTION_DAYS:
+        expired |= Q(
+            topic__isnull=True,
+            is_read=False,
+            created_at__lt=now
+            - timedelta(days=settings.NOTIFICATION_UNREAD_RETENTION_DAYS),
+        )
+    return Notification.objects.filter(expired)
+
+
+def purge_notifications(batch_size=DEFAULT_BATCH_SIZE, dry_run=False) -> int:
+    """
+    :return: количество удаленных (для dry_run - подлежащих удалению)
+        уведомлений
+    """
+    expired = get_expired_notifications()
+    if dry_run:
+        return expired.count()
+
+    deleted = 0
+    while True:
+        batch = list(
+            expired.order_by("pk").values_list("pk", flat=True)[:batch_size]
+        )
+        if not batch:
+            break
+        # На уведомления никто не ссылается, поэтому delete() выполняется
+        # одним DELETE без выборки объектов
+        deleted += Notification.objects.filter(pk__in=batch).delete()[0]
+        log.info("Purged %s notifications", deleted)
+
+    if deleted:
+        # Среди удаленных могли быть непрочитанные рассылки
+        unread_counters.invalidate_broadcasts()
+    return deleted
@@ -0,0 +1,178 @@
+"""
+Счетчики непрочитанных уведомлений для NotificationViewSet.unread_count.
+
+Лента пользователя складывается из трех независимых счетчиков:
+- личные уведомления (user=пользователь);
+- уведомления компании без адресата (company=компания, user=None), общий
+  счетчик на всех сотрудников компании;
+- общие уведомления (рассылки) после курсора прочтения. Для каждой темы
+  ведется последовательность (счетчик рассылок темы). Пользователь
+  хранит число непрочитанных рассылок вместе с номерами последовательностей
+  своих тем и id последней учтенной рассылки. Если номер какой-то темы
+  изменился, досчитываются только рассылки после этого id. Рассылка для
+  логистов не трогает счетчики пользователей других ролей.
+Менеджерам и администраторам лента считается по БД: их немного, а
+состав ленты зависит от закрепленных компаний.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+
+from common.counters import change_counters, get_counters, reset_counters
+from user.models import UserRole
+
+# Меняется при удалении рассылок (retention): все счетчики рассылок
+# пересчитываются с курсора прочтения
+BROADCAST_EPOCH_KEY = "unread:notifications:broadcast_epoch"
+
+
+def _personal_key(user_id) -> str:
+    return f"unread:notifications:user:{user_id}"
+
+
+def _company_key(company_id) -> str:
+    return f"unread:notifications:company:{company_id}"
+
+
+def _broadcast_key(user_id) -> str:
+    return f"unread:notifications:broadcast:{user_id}"
+
+
+def _topic_sequence_key(topic) -> str:
+    return f"unread:notifications:topic_sequence:{topic}"
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def _bump_topic_sequences(topics):
+    for topic in topics:
+        _incr(_topic_sequence_key(topic))
+
+
+def _get_user_topics(user) -> list:
+    from notification.models import NotificationTopic
+
+    topics = [NotificationTopic.COMPANY_FOLLOWERS]
+    if user.role == UserRole.LOGIST:
+        topics.append(NotificationTopic.LOGISTS)
+    return topics
+
+
+def _get_broadcast_count(user) -> int:
+    from notification.models import Notification, NotificationReadCursor
+
+    topics = _get_user_topics(user)
+    key = _broadcast_key(user.pk)
+    sequence_keys = [_topic_sequence_key(topic) for topic in topics]
+    values = cache.get_many([key, BROADCAST_EPOCH_KEY, *sequence_keys])
+    epoch = values.get(BROADCAST_EPOCH_KEY, 0)
+    sequences = [values.get(sequence_key, 0) for sequence_key in sequence_keys]
+    state = values.get(key)
+    if state and state["epoch"] != epoch:
+        state = None
+    if state and state["sequences"] == sequences:
+        return state["count"]
+
+    if state:
+        count, last_id = state["count"], state["last_id"]
+    else:
+        count = 0
+        last_id = NotificationReadCursor.get_last_read_id(user)
+    new = (
+        Notification.objects.for_user(user)
+        .filter(topic__in=topics, pk__gt=last_id)
+        .aggregate(count=Count("pk"), last_id=Max("pk"))
+    )
+    state = {
+        "epoch": epoch,
+        "sequences": sequences,
+        "count": count + new["count"],
+        "last_id": new["last_id"] or last_id,
+    }
+    cache.set(key, state, settings.UNREAD_COUNTERS_TIMEOUT)
+    return state["count"]
+
+
+def _counter_key(notification):
+    """Счетчик, в который входит личное уведомление или уведомление компании"""
+    if notification.user_id:
+        return _personal_key(notification.user_id)
+    if notification.company_id:
+        return _company_key(notification.company_id)
+    return None
+
+
+def get_unread_count(user) -> int:
+    from notification.models import Notification
+
+    if user.role in (UserRole.ADMIN, UserRole.SUPER_ADMIN, UserRole.MANAGER):
+        return (
+            Notification.objects.for_user(user)
+            .annotate_is_read(user)
+            .filter(is_read_by_user=False)
+            .count()
+        )
+
+    unread = Notification.objects.filter(topic__isnull=True, is_read=False)
+    computes = {
+        _personal_key(user.pk): lambda: unread.filter(user=user).count(),
+    }
+    if (
+        user.role in (UserRole.COMPANY_ADMIN, UserRole.COMPANY_STAFF)
+        and user.company_id
+    ):
+        computes[_company_key(user.company_id)] = lambda: unread.filter(
+            company_id=user.company_id, user__isnull=True
+        ).count()
+    return sum(get_counters(computes).values()) + _get_broadcast_count(user)
+
+
+def notifications_created(notifications):
+    deltas = Counter()
+    topics = set()
+    for notification in notifications:
+        if notification.is_broadcast:
+            topics.add(notification.topic)
+        elif not notification.is_read:
+            key = _counter_key(notification)
+            if key:
+                deltas[key] += 1
+    change_counters(deltas)
+    if topics:
+        transaction.on_commit(lambda: _bump_topic_sequences(topics))
+
+
+def notification_read_changed(notification, is_read: bool):
+    key = _counter_key(notification)
+    if key:
+        change_counters({key: -1 if is_read else 1})
+
+
+def notification_deleted(notification):
+    if not notification.is_broadcast and not notification.is_read:
+        notification_read_changed(notification, is_read=True)
+
+
+def broadcast_cursor_moved(user):
+    reset_counters(_broadcast_key(user.pk))
+
+
+def reset_user_counters(user):
+    """После массового прочтения ленты: пересчитать счетчики по БД"""
+    keys = [_personal_key(user.pk), _broadcast_key(user.pk)]
+    if user.company_id:
+        keys.append(_company_key(user.company_id))
+    reset_counters(*keys)
+
+
+def invalidate_broadcasts():
+    """Сбросить счетчики общих уведомлений у всех пользователей"""
+    transaction.on_commit(lambda: _incr(BROADCAST_EPOCH_KEY))
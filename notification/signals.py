@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Созданы уведомления (Notification.objects.create и bulk_create),
+# аргумент notifications - список созданных уведомлений
+notifications_created = Signal()
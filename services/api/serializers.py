@@ -0,0 +1,36 @@
+from rest_framework import serializers
+
+# Ограничение на размер матрицы (отправления x доставки) в одном запросе
+MAX_DELIVERY_COST_PAIRS = 10_000
+
+
+class CoordinatesSerializer(serializers.Serializer):
+    latitude = serializers.FloatField(min_value=-90, max_value=90)
+    longitude = serializers.FloatField(min_value=-180, max_value=180)
+
+
+class BatchDeliveryCostSerializer(serializers.Serializer):
+    origin = CoordinatesSerializer(
+        required=False, help_text="Одна точка отправления"
+    )
+    origins = CoordinatesSerializer(
+        many=True,
+        required=False,
+        allow_empty=False,
+        help_text="Несколько точек отправления (матрица N x M)",
+    )
+    destinations = CoordinatesSerializer(many=True, allow_empty=False)
+
+    def validate(self, attrs):
+        if ("origin" in attrs) == ("origins" in attrs):
+            raise serializers.ValidationError(
+                "Необходимо указать либо origin, либо origins"
+            )
+        pairs_count = len(attrs.get("origins", [None])) * len(
+            attrs["destinations"]
+        )
+        if pairs_count > MAX_DELIVERY_COST_PAIRS:
+            raise serializers.ValidationError(
+                f"Не больше {MAX_DELIVERY_COST_PAIRS} пар точек за запрос"
+            )
+        return attrs
@@ -4,6 +4,11 @@ from services.api import views
 urlpatterns = [
     path("geocode/", views.yandex_geocoder, name="geocode"),
     path("approximate_price", views.approx_price, name="approximate_price"),
+    path(
+        "approximate_prices",
+        views.approximate_prices,
+        name="approximate_prices",
+    ),
     #path('send_offers_by_email', views.send_offers_by_email, name='send_offers_by_email'),
     path(
         "approximate_price_using_cities",
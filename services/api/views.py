@@ -7,13 +7,13 @@ from rest_framework.response import Response
 from drf_yasg import openapi as api
 
 from company.models import City
+from services.api.serializers import BatchDeliveryCostSerializer
 from config import settings
 from services.models import DeliveryCost
 from services.validators import validate_logistics_coordinates
-from services.yandex_geo import YandexGeocoderClient
-from config.settings import YANDEX_GEOCODER_API_KEY
+from services.yandex_geo import get_geocoder_client
 
-geocoder_client = YandexGeocoderClient(YANDEX_GEOCODER_API_KEY)
+geocoder_client = get_geocoder_client()
 
 
 @swagger_auto_schema(
@@ -149,3 +149,30 @@ def approximate_price_using_cities(request):
     return Response(delivery_data.dict())
 
 
+@swagger_auto_schema(
+    method="post",
+    request_body=BatchDeliveryCostSerializer,
+)
+@api_view(["POST"])
+def approximate_prices(request):
+    """
+    Стоимость доставки от одной точки (origin) до списка точек (destinations)
+    или матрица для нескольких точек отправления (origins).
+    Для origin возвращается список в порядке destinations,
+    для origins - список строк по одной на каждую точку отправления
+    """
+    serializer = BatchDeliveryCostSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    data = serializer.validated_data
+
+    origins = data["origins"] if "origins" in data else [data["origin"]]
+    matrix = DeliveryCost.matrix_from_coordinates(
+        [(point["latitude"], point["longitude"]) for point in origins],
+        [
+            (point["latitude"], point["longitude"])
+            for point in data["destinations"]
+        ],
+        settings.PRICE_PER_KM,
+    )
+    results = [[cost.dict() for cost in row] for row in matrix]
+    return Response(results if "origins" in data else results[0])
@@ -0,0 +1,69 @@
+"""
+Векторизованный расчет расстояний между наборами точек.
+
+Расстояние считается по формуле Ламберта для эллипсоида WGS-84: центральный
+угол между приведенными широтами (как в haversine) с поправкой на сжатие.
+Один проход NumPy по матрице N x M заменяет N * M вызовов geopy.geodesic.
+
+Точность относительно geopy.distance.geodesic (Карни, WGS-84): относительное
+расхождение не больше GEODESIC_RELATIVE_TOLERANCE = 0.005% для расстояний
+до 15 000 км (на практике до 0.001%), что покрывает любые маршруты в
+пределах России (не длиннее ~9 000 км); на типичных маршрутах около
+0.00015% (1.5 м на 1000 км). Проверяется командой
+delivery_distance_benchmark на точках в границах России. Ближе к
+диаметрально противоположным точкам (от ~17 500 км) формула Ламберта
+теряет точность (расхождение больше 0.005%), для таких расстояний допуск не
+гарантируется. Для сравнения, haversine на сфере ошибается до 0.5%.
+"""
+import numpy as np
+
+# WGS-84
+EQUATORIAL_RADIUS_KM = 6378.137
+FLATTENING = 1 / 298.257223563
+
+# Допустимое относительное расхождение с geopy.distance.geodesic для
+# расстояний до 15 000 км (см. docstring модуля)
+GEODESIC_RELATIVE_TOLERANCE = 5e-5
+
+
+def _as_points(points) -> np.ndarray:
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise ValueError("Ожидается список пар (широта, долгота)")
+    return points
+
+
+def distance_matrix(origins, destinations) -> np.ndarray:
+    """
+    Матрица расстояний в километрах размера len(origins) x len(destinations).
+    Точки задаются парами (широта, долгота) в градусах
+    """
+    origins = np.radians(_as_points(origins))
+    destinations = np.radians(_as_points(destinations))
+
+    # Приведенные широты
+    beta1 = np.arctan((1 - FLATTENING) * np.tan(origins[:, 0]))[:, None]
+    beta2 = np.arctan((1 - FLATTENING) * np.tan(destinations[:, 0]))[None, :]
+    delta_lambda = destinations[:, 1][None, :] - origins[:, 1][:, None]
+
+    # Центральный угол по формуле haversine
+    h = (
+        np.sin((beta2 - beta1) / 2) ** 2
+        + np.cos(beta1) * np.cos(beta2) * np.sin(delta_lambda / 2) ** 2
+    )
+    sigma = 2 * np.arcsin(np.sqrt(np.clip(h, 0.0, 1.0)))
+
+    # Поправка Ламберта на сжатие эллипсоида
+    p = (beta1 + beta2) / 2
+    q = (beta2 - beta1) / 2
+    sin_sigma = np.sin(sigma)
+    cos_half_sq = np.cos(sigma / 2) ** 2
+    sin_half_sq = np.sin(sigma / 2) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = (sigma - sin_sigma) * np.sin(p) ** 2 * np.cos(q) ** 2 / cos_half_sq
+        y = (sigma + sin_sigma) * np.cos(p) ** 2 * np.sin(q) ** 2 / sin_half_sq
+    correction = np.nan_to_num(x, nan=0.0, posinf=0.0) + np.nan_to_num(
+        y, nan=0.0, posinf=0.0
+    )
+
+    return EQUATORIAL_RADIUS_KM * (sigma - FLATTENING / 2 * correction)
@@ -0,0 +1,98 @@
+"""
+Локальная заглушка Yandex геокодера для разработки и тестов.
+
+Отвечает на GET /1.x/?geocode=...&results=N ответом в формате геокодера.
+Координаты детерминированы (зависят от текста запроса), населенный пункт -
+первая часть запроса до запятой. Запуск:
+
+    python -m services.geocoder_stub --port 8081
+    YANDEX_GEOCODER_BASE_URL=http://127.0.0.1:8081 python manage.py ...
+
+Количество обработанных запросов доступно по GET /stats.
+"""
+import argparse
+import hashlib
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+log = logging.getLogger(__name__)
+
+
+def build_response(query: str, results: int) -> dict:
+    locality = query.split(",")[0].strip() or query
+    feature_members = []
+    for index in range(results):
+        digest = hashlib.md5(f"{query}:{index}".encode()).digest()
+        # Точка в пределах европейской части России
+        latitude = 45 + digest[0] / 255 * 15
+        longitude = 30 + digest[1] / 255 * 30
+        text = f"Россия, {locality}" + (f", {index}" if index else "")
+        feature_members.append(
+            {
+                "GeoObject": {
+                    "metaDataProperty": {
+                        "GeocoderMetaData": {
+                            "text": text,
+                            "Address": {
+                                "Components": [
+                                    {"kind": "country", "name": "Россия"},
+                                    {"kind": "locality", "name": locality},
+                                ]
+                            },
+                        }
+                    },
+                    "Point": {"pos": f"{longitude:.6f} {latitude:.6f}"},
+                }
+            }
+        )
+    return {
+        "response": {"GeoObjectCollection": {"featureMember": feature_members}}
+    }
+
+
+class GeocoderStubHandler(BaseHTTPRequestHandler):
+    requests_count = 0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/stats":
+            return self._send(200, {"requests": self.requests_count})
+        if url.path.rstrip("/") != "/1.x":
+            return self._send(404, {"error": "Not found"})
+
+        params = parse_qs(url.query)
+        query = params.get("geocode", [""])[0]
+        if not query:
+            return self._send(400, {"error": "geocode is required"})
+        results = int(params.get("results", [10])[0])
+
+        type(self).requests_count += 1
+        self._send(200, build_response(query, results))
+
+    def _send(self, status, body):
+        content = json.dumps(body, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        log.debug(format, *args)
+
+
+def run(host="127.0.0.1", port=8081):
+    server = ThreadingHTTPServer((host, port), GeocoderStubHandler)
+    log.info("Geocoder stub listening on %s:%s", host, port)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    run(args.host, args.port)
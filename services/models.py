@@ -13,6 +13,15 @@ class DeliveryCost(BaseModel):
     distance: float
     total_price: float
 
+    @classmethod
+    def from_distance(cls, distance, price_per_km):
+        total_price = distance * price_per_km
+        return cls(
+            price_per_km=round(price_per_km, 2),
+            distance=round(distance, 2),
+            total_price=round(total_price, 2),
+        )
+
     @classmethod
     def from_coordinates(
         cls, departure_coordinates, delivery_coordinates, price_per_km
@@ -20,9 +29,36 @@ class DeliveryCost(BaseModel):
         from geopy.distance import geodesic
 
         distance = geodesic(departure_coordinates, delivery_coordinates).km
-        total_price = distance * price_per_km
-        return cls(
-            price_per_km=round(price_per_km, 2),
-            distance=round(distance, 2),
-            total_price=round(total_price, 2),
+        return cls.from_distance(distance, price_per_km)
+
+    @classmethod
+    def matrix_from_coordinates(
+        cls, departure_coordinates, delivery_coordinates, price_per_km
+    ) -> list[list["DeliveryCost"]]:
+        """
+        Стоимость доставки для каждой пары (отправление, доставка).
+        Расстояния считаются одним векторизованным проходом
+        (точность относительно geodesic - см. services.distance)
+        """
+        import numpy as np
+
+        from services.distance import distance_matrix
+
+        distances = distance_matrix(
+            departure_coordinates, delivery_coordinates
         )
+        total_prices = np.round(distances * price_per_km, 2).tolist()
+        distances = np.round(distances, 2).tolist()
+        price_per_km = round(price_per_km, 2)
+        # Значения уже посчитаны и округлены, валидация pydantic не нужна
+        return [
+            [
+                cls.construct(
+                    price_per_km=price_per_km,
+                    distance=distance,
+                    total_price=total_price,
+                )
+                for distance, total_price in zip(row, total_row)
+            ]
+            for row, total_row in zip(distances, total_prices)
+        ]
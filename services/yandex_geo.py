@@ -1,30 +1,74 @@
 import logging
-from typing import List, Dict
+import re
+from datetime import timedelta
+from functools import lru_cache
+from typing import List, Dict, Optional
 
-from requests import Session
+from asgiref.sync import sync_to_async
+from django.utils import timezone
 
 from services.models import AddressData
-from company.models import City
-from config.settings import YANDEX_GEOCODER_BASE_URL
+from company.models import City, GeocodeCache
+from config.settings import (
+    GEOCODE_CACHE_TTL,
+    YANDEX_GEOCODER_API_KEY,
+    YANDEX_GEOCODER_BASE_URL,
+)
 
 log = logging.getLogger(__name__)
 
 from common.HTTPClient.client import BaseClient
 
 
+def normalize_geocode_query(query: str) -> str:
+    """Ключ кеша: регистр, пробелы и знаки препинания по краям не важны"""
+    return re.sub(r"\s+", " ", query.lower().replace("ё", "е")).strip(" ,.")
+
+
+class GeocodeCacheStore:
+    """
+    Хранилище ответов геокодера для кеша BaseClient: таблица GeocodeCache,
+    ключ - (нормализованный запрос, количество результатов)
+    """
+
+    def get(self, key) -> Optional[Dict]:
+        query, results = key
+        return (
+            GeocodeCache.objects.filter(
+                query=query,
+                results=results,
+                updated_at__gte=timezone.now()
+                - timedelta(seconds=GEOCODE_CACHE_TTL),
+            )
+            .values_list("response", flat=True)
+            .first()
+        )
+
+    def set(self, key, value, timeout=None):
+        query, results = key
+        GeocodeCache.objects.update_or_create(
+            query=query, results=results, defaults={"response": value}
+        )
+
+
 class YandexGeocoderClient(BaseClient):
     _DEFAULT_BASE_URL = YANDEX_GEOCODER_BASE_URL
 
     def __init__(self, api_key, base_url=None, **kwargs):
+        kwargs.setdefault("cache", GeocodeCacheStore())
+        super().__init__(base_url=base_url, **kwargs)
         self.api_key = api_key
-        self._session = Session()
-        self.kwargs = kwargs or {}
-        self.base_url = base_url or self._DEFAULT_BASE_URL
 
     def get_addresses(self, raw_addresses, addresses_to_return=10):
         raw_json = self._make_request(raw_addresses, addresses_to_return)
         return self._parse_response(raw_json)
 
+    async def aget_addresses(self, raw_addresses, addresses_to_return=10):
+        raw_json = await self._arequest(
+            **self._get_request_params(raw_addresses, addresses_to_return)
+        )
+        return await sync_to_async(self._parse_response)(raw_json)
+
     def get_coordinates_from_city(self, city: City):
         city_name = city.name
         if city.latitude and city.longitude:
@@ -34,7 +78,19 @@ class YandexGeocoderClient(BaseClient):
                 latitude=city.latitude,
                 longitude=city.longitude,
             )
-        raw_json = self._make_request(city_name, 1)
+        address = self.geocode_city(city)
+
+        # Сохраняем координаты в город, чтобы больше не обращаться к геокодеру
+        city.latitude = address.latitude
+        city.longitude = address.longitude
+        City.objects.filter(pk=city.pk).update(
+            latitude=city.latitude, longitude=city.longitude
+        )
+        return address
+
+    def geocode_city(self, city: City) -> AddressData:
+        """Координаты города по геокодеру (с кешем), без записи в город"""
+        raw_json = self._make_request(city.name, 1)
         return self._parse_city_coordinates(raw_json, city.pk)
 
     def _parse_city_coordinates(self, response_body, city_pk):
@@ -46,7 +102,8 @@ class YandexGeocoderClient(BaseClient):
             "GeocoderMetaData"
         ]["text"]
 
-        object_lat, object_long = map(
+        # Геокодер возвращает координаты в порядке "долгота широта"
+        object_long, object_lat = map(
             float, geo_object["GeoObject"]["Point"]["pos"].split()
         )
 
@@ -61,19 +118,35 @@ class YandexGeocoderClient(BaseClient):
         log.info(
             f"Yandex geocoder request with address: {raw_adresses} and {addresses_to_return} addresses."
         )
-        url = "/1.x/"
-        params = {
-            "apikey": self.api_key,
-            "format": "json",
-            "geocode": raw_adresses,
-            "results": addresses_to_return,
+        return self._request(
+            **self._get_request_params(raw_adresses, addresses_to_return)
+        )
+
+    def _get_request_params(self, raw_adresses, addresses_to_return):
+        return {
+            "url": "/1.x/",
+            "get_params": {
+                "apikey": self.api_key,
+                "format": "json",
+                "geocode": raw_adresses,
+                "results": addresses_to_return,
+            },
         }
-        return self._request(url=url, get_params=params)
+
+    def _get_cache_key(self, url, get_params):
+        return (
+            normalize_geocode_query(get_params["geocode"]),
+            int(get_params["results"]),
+        )
 
     def _parse_response(self, response_body: Dict) -> List[AddressData]:
         geo_objects = response_body["response"]["GeoObjectCollection"][
             "featureMember"
         ]
+        # Города всех адресов ответа получаем/создаем одним набором запросов
+        city_ids = self._get_city_ids(
+            {self._get_city_name(geo_object) for geo_object in geo_objects}
+        )
         parsed_geo_objects: List[AddressData] = list()
 
         for geo_object in geo_objects:
@@ -85,7 +158,7 @@ class YandexGeocoderClient(BaseClient):
                 float, geo_object["GeoObject"]["Point"]["pos"].split()
             )
 
-            city_id = self._get_city_id(geo_object)
+            city_id = city_ids.get(self._get_city_name(geo_object))
             # Checking if city have been extracted from geocoder response, if no, than skip current address
             if not city_id:
                 continue
@@ -101,7 +174,8 @@ class YandexGeocoderClient(BaseClient):
 
         return parsed_geo_objects
 
-    def _get_city_id(self, geo_object):
+    @staticmethod
+    def _get_city_name(geo_object) -> Optional[str]:
         address_components = geo_object["GeoObject"]["metaDataProperty"][
             "GeocoderMetaData"
         ]["Address"]["Components"]
@@ -113,13 +187,36 @@ class YandexGeocoderClient(BaseClient):
         city_component = list(
             filter(lambda x: x["kind"] == "locality", address_components)
         )
-        # If we successfully extracted city component, then we can extract city name
-        # And then we can get city id from DB
-        city_name = city_component[0]["name"] if city_component else None
-        if not city_name:
-            return None
-
-        # Возможны лаги работы с БД
-        # TODO: оптимизировать поиск/создание кучи объектов
-        city, created = City.objects.get_or_create(name=city_name)
-        return city.pk
+        return city_component[0]["name"] if city_component else None
+
+    @staticmethod
+    def _get_city_ids(city_names) -> Dict[str, int]:
+        """Id городов по названиям, отсутствующие города создаются"""
+        city_names = {name for name in city_names if name}
+        if not city_names:
+            return {}
+
+        city_ids = {}
+        for pk, name in (
+            City.objects.filter(name__in=city_names)
+            .order_by("-pk")
+            .values_list("pk", "name")
+        ):
+            # При дублях названий берем город с наименьшим id
+            city_ids[name] = pk
+
+        missing = [
+            City(name=name) for name in city_names if name not in city_ids
+        ]
+        for city in City.objects.bulk_create(missing):
+            city_ids[city.name] = city.pk
+        return city_ids
+
+
+@lru_cache(maxsize=None)
+def get_geocoder_client() -> YandexGeocoderClient:
+    """
+    Общий клиент процесса: сессия с пулом соединений создается один раз и
+    переиспользуется всеми запросами
+    """
+    return YandexGeocoderClient(YANDEX_GEOCODER_API_KEY)
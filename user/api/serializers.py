@@ -67,16 +67,15 @@ class UserSerializer(NonNullDynamicFieldsModelSerializer):
 
     def get_company(self, obj):
         company = obj.my_company if hasattr(obj, "my_company") else obj.company
-        if self.context.get("pop_company_review"):
-            exclude_arg = {"exclude": ("reviews",)}
-        else:
-            exclude_arg = {}
-        if company:
+        if not company:
+            return None
+        if self.context.get("compact_company"):
             return LazyRefSerializer(
-                "company.api.serializers.CompanySerializer",
-                company,
-                **exclude_arg,
+                "company.api.serializers.CompactCompanySerializer", company
             ).data
+        return LazyRefSerializer(
+            "company.api.serializers.CompanySerializer", company
+        ).data
 
 
 class UpdateUserRoleSerializer(BaseCreateSerializer):
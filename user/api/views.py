@@ -1,6 +1,5 @@
 import json
 import os
-from django.db.models import Q
 from django.contrib.auth import get_user_model, logout
 from django.core.mail import send_mail
 from django_filters import FilterSet
@@ -17,6 +16,7 @@ from rest_framework.views import APIView
 from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 
 from requests import post
+from company.api.permissions import CompanyStaffPermission
 from company.models import Company
 from user.api.serializers import (
     CreateUserSerializer,
@@ -71,24 +71,25 @@ class AuthViewSet(CreateModelMixin, viewsets.GenericViewSet):
             return Response(status=status.HTTP_201_CREATED)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
-    @action(methods=["GET"], detail=False)
+    @action(
+        methods=["GET"],
+        detail=False,
+        permission_classes=(CompanyStaffPermission,),
+    )
     def company_staff(self, request, *args, **kwargs):
-        company_id = request.query_params['id']
-        current_company = Company.objects.get(id=company_id)
-        if current_company.owner:
-            staff = User.objects.filter(~Q(id=current_company.owner.id), company_id=current_company.id)
-
-            serializer = self.get_serializer(staff, many=True)
-
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        if current_company.id:
-            staff = User.objects.filter(company_id=current_company.id)
-
-            serializer = self.get_serializer(staff, many=True)
+        # Сотрудники - пользователи компании (User.company_id) кроме
+        # владельца, массив staff заполняется не при всех способах
+        # привязки пользователя к компании
+        company = get_object_or_404(
+            Company.objects.values("id", "owner_id"),
+            id=request.query_params["id"],
+        )
+        staff = User.objects.filter(company_id=company["id"]).order_by("id")
+        if company["owner_id"]:
+            staff = staff.exclude(id=company["owner_id"])
+        serializer = self.get_serializer(staff, many=True)
 
-            return Response(serializer.data, status=status.HTTP_200_OK)
-        else:
-            return Response(status=status.HTTP_204_NO_CONTENT)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
         responses={
@@ -1,18 +1,34 @@
 import os
 import logging
-import requests
 
-from requests.adapters import HTTPAdapter, Retry
+from common.HTTPClient.client import BaseClient
 
-logging.basicConfig(level=logging.DEBUG)
+log = logging.getLogger(__name__)
 
-s = requests.Session()
 
-retries = Retry(
-    total=5, backoff_factor=0.1, status_forcelist=[500, 502, 503, 504]
-)
+class SmsRuClient(BaseClient):
+    _DEFAULT_BASE_URL = "https://sms.ru"
+    # /code/call звонит пользователю: повтор после таймаута или 5xx
+    # может сделать еще один звонок, повторяем только ошибки соединения
+    _RETRY_STATUS = False
+
+    def __init__(self, api_id, base_url=None, **kwargs):
+        super().__init__(base_url=base_url, **kwargs)
+        self.api_id = api_id
 
-s.mount("https://", HTTPAdapter(max_retries=retries))
+    def code_call(self, phone: str, ip=-1):
+        """
+        source: https://sms.ru/api/code_call
+        """
+        return self._request(
+            url="/code/call",
+            get_params={"api_id": self.api_id, "phone": phone, "ip": ip},
+        )
+
+
+sms_ru_client = SmsRuClient(
+    os.getenv("SMS_RU_API_ID", "7FDDF797-98F4-B144-99A9-61164A8B5DE2")
+)
 
 
 def make_phone_call(phone: str, ip: str):
@@ -28,12 +44,7 @@ def make_phone_call(phone: str, ip: str):
     # FIXME: При передаче ip адреса клиента вызывала ошибку что запрос сделан из частной сети,
     #  необходимо отправить запрос в смс.ру с уточнением причины, пока установлен параметр
     #  -1 как отправка звонка вручную
-    params = {"api_id": '7FDDF797-98F4-B144-99A9-61164A8B5DE2', "phone": phone,
-              "ip": -1}  # {"api_id": os.environ["SMS_RU_API_ID"], "phone": phone, "ip": -1}
-
-    result = s.get(url="https://sms.ru/code/call", params=params)
-#
-    data = result.json()
+    data = sms_ru_client.code_call(phone, ip=-1)
 
     #data = {
     #    'status': "OK",
@@ -0,0 +1,33 @@
+"""
+Кеш пользователей для авторизации websocket-подключений.
+
+При массовом переподключении клиентов (например, после деплоя) каждое
+подключение проверяет JWT и загружает пользователя. Подпись и срок
+токена проверяются без БД, а сам пользователь берется из кеша по id
+(WS_AUTH_CACHE_TIMEOUT). Запись сбрасывается при сохранении и удалении
+пользователя (см. user/receivers.py).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _get_cache_key(user_id) -> str:
+    return f"ws_user:{user_id}"
+
+
+def get_cached_user(user_id):
+    """:return: пользователь или None, если его нет"""
+    key = _get_cache_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = get_user_model().objects.filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, settings.WS_AUTH_CACHE_TIMEOUT)
+    return user
+
+
+def invalidate_user(user_id):
+    """Сбросить кеш пользователя после коммита текущей транзакции"""
+    transaction.on_commit(lambda: cache.delete(_get_cache_key(user_id)))